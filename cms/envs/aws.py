@@ -237,6 +237,8 @@ if AWS_SECRET_ACCESS_KEY == "":
 
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
+# Only spot-check the format of split modulestore structures as they're loaded and saved
+SPLIT_STRUCTURE_VALIDATION = ENV_TOKENS.get('SPLIT_STRUCTURE_VALIDATION', 'sampled')
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
@@ -576,6 +576,7 @@ INSTALLED_APPS = (
     'course_creators',
     'student',  # misleading name due to sharing with lms
     'openedx.core.djangoapps.course_groups',  # not used in cms (yet), but tests run
+    'openedx.core.djangoapps.course_overviews',  # so course edits invalidate the lms's course overviews
 
     # Tracking
     'track',
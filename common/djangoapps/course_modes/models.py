@@ -266,20 +266,28 @@ class CourseMode(models.Model):
         return 0
 
     @classmethod
-    def has_payment_options(cls, course_id):
+    def has_payment_options(cls, course_id, modes=None):
         """Determines if there is any mode that has payment options
 
         Check the dict of course modes and see if any of them have a minimum price or
         suggested prices. Returns True if any course mode has a payment option.
 
         Args:
-            course_mode_dict (dict): Dictionary mapping course mode slugs to Modes
+            course_id (CourseKey): The course to check.
+
+        Keyword Arguments:
+            modes (list of `Mode`): If provided, search through this list
+                of course modes.  This can be used to avoid an additional
+                database query if you have already loaded the modes list.
 
         Returns:
             True if any course mode has a payment option.
 
         """
-        for mode in cls.modes_for_course(course_id):
+        if modes is None:
+            modes = cls.modes_for_course(course_id)
+
+        for mode in modes:
             if mode.min_price > 0 or mode.suggested_prices != '':
                 return True
         return False
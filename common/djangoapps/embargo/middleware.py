@@ -30,8 +30,10 @@ EMBARGO_SITE_REDIRECT_URL = 'https://www.edx.org/'
 # if EMBARGO_SITE_REDIRECT_URL is missing, a HttpResponseForbidden is returned.
 
 """
+from collections import OrderedDict
 from functools import partial
 import logging
+import threading
 import pygeoip
 from lazy import lazy
 
@@ -48,6 +50,34 @@ from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 log = logging.getLogger(__name__)
 
+# The number of recently looked up IP addresses whose country codes are kept by each process
+COUNTRY_CODE_CACHE_SIZE = 1000
+
+_geoip_databases = {}  # pylint: disable=invalid-name
+_country_codes = OrderedDict()  # pylint: disable=invalid-name
+_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def _geoip_database(path):
+    """
+    Return the GeoIP database at `path`, which is opened (memory-mapped) once per process.
+    """
+    database = _geoip_databases.get(path)
+    if database is None:
+        with _lock:
+            database = _geoip_databases.get(path)
+            if database is None:
+                database = _geoip_databases[path] = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+    return database
+
+
+def clear_country_code_cache():
+    """
+    Forget the country codes looked up for IP addresses by this process.
+    """
+    with _lock:
+        _country_codes.clear()
+
 
 class EmbargoMiddleware(object):
     """
@@ -123,15 +153,17 @@ class EmbargoMiddleware(object):
             A unicode message if the user is embargoed, otherwise `None`
 
         """
+        ip_filter = IPFilter.current()
+
         # If blacklisted, immediately fail
-        if ip_addr in IPFilter.current().blacklist_ips:
+        if ip_addr in ip_filter.blacklist_ips:
             return self.REASONS['ip_blacklist'].format(
                 ip_addr=ip_addr,
                 from_course=self._from_course_msg(course_id, course_is_embargoed)
             )
 
         # If we're white-listed, then allow access
-        if ip_addr in IPFilter.current().whitelist_ips:
+        if ip_addr in ip_filter.whitelist_ips:
             return None
 
         # Retrieve the country code from the IP address
@@ -193,10 +225,22 @@ class EmbargoMiddleware(object):
             str: A 2-letter country code.
 
         """
+        with _lock:
+            if ip_addr in _country_codes:
+                # re-insert to mark it as the most recently used
+                country_code = _country_codes[ip_addr] = _country_codes.pop(ip_addr)
+                return country_code
+
         if ip_addr.find(':') >= 0:
-            return pygeoip.GeoIP(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
+            country_code = _geoip_database(settings.GEOIPV6_PATH).country_code_by_addr(ip_addr)
         else:
-            return pygeoip.GeoIP(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+            country_code = _geoip_database(settings.GEOIP_PATH).country_code_by_addr(ip_addr)
+
+        with _lock:
+            _country_codes[ip_addr] = country_code
+            while len(_country_codes) > COUNTRY_CODE_CACHE_SIZE:
+                _country_codes.popitem(last=False)
+        return country_code
 
     @property
     def _embargo_redirect_response(self):
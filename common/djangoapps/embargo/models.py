@@ -11,6 +11,8 @@ file and check it in at the same time as your model changes. To do that,
 3. Add the migration file created in edx-platform/common/djangoapps/embargo/migrations/
 """
 
+from bisect import bisect_right
+
 import ipaddr
 
 from django.db import models
@@ -89,11 +91,25 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are merged into sorted, non-overlapping ranges of addresses
+        (for each IP version), so that checking an address is a binary search.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            # IP version -> ([first address of each range], [last address of each range])
+            self._ranges = {}
+            for network in sorted(self.networks, key=lambda net: (net.version, int(net.network))):
+                firsts, lasts = self._ranges.setdefault(network.version, ([], []))
+                first, last = int(network.network), int(network.broadcast)
+                if lasts and first <= lasts[-1] + 1:
+                    lasts[-1] = max(lasts[-1], last)
+                else:
+                    firsts.append(first)
+                    lasts.append(last)
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -104,26 +120,43 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
-                    return True
+            if ip.version not in self._ranges:
+                return False
+            firsts, lasts = self._ranges[ip.version]
+            index = bisect_right(firsts, int(ip)) - 1
+            return index >= 0 and int(ip) <= lasts[index]
 
-            return False
+    # The IPFilterLists parsed by this process, keyed by the comma-separated list they were parsed from.
+    # ConfigurationModel.current() gives a fresh copy of the entry from the cache on every call, so
+    # the parsed lists are kept here, where they survive for as long as the configuration is current.
+    _ip_filter_lists = {}
+    MAX_CACHED_IP_FILTER_LISTS = 16
+
+    @classmethod
+    def _ip_filter_list(cls, ips):
+        """
+        Return the IPFilterList for the comma-separated list of IP addresses and networks `ips`.
+        """
+        if ips == '':
+            return []
+        ip_filter_list = cls._ip_filter_lists.get(ips)
+        if ip_filter_list is None:
+            ip_filter_list = cls.IPFilterList([addr.strip() for addr in ips.split(',')])
+            if len(cls._ip_filter_lists) >= cls.MAX_CACHED_IP_FILTER_LISTS:
+                cls._ip_filter_lists.clear()
+            cls._ip_filter_lists[ips] = ip_filter_list
+        return ip_filter_list
 
     @property
     def whitelist_ips(self):
         """
         Return a list of valid IP addresses to whitelist
         """
-        if self.whitelist == '':
-            return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
         """
         Return a list of valid IP addresses to blacklist
         """
-        if self.blacklist == '':
-            return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._ip_filter_list(self.blacklist)
@@ -21,6 +21,7 @@ from xmodule.modulestore.tests.django_utils import (
 
 # Explicitly import the cache from ConfigurationModel so we can reset it after each test
 from config_models.models import cache
+from embargo.middleware import clear_country_code_cache
 from embargo.models import EmbargoedCourse, EmbargoedState, IPFilter
 
 
@@ -63,6 +64,7 @@ class EmbargoMiddlewareTests(ModuleStoreTestCase):
         # Explicitly clear ConfigurationModel's cache so tests have a clear cache
         # and don't interfere with each other
         cache.clear()
+        clear_country_code_cache()
         self.patcher.stop()
 
     def mock_country_code_by_addr(self, ip_addr):
@@ -130,6 +132,14 @@ class EmbargoMiddlewareTests(ModuleStoreTestCase):
         response = self.client.get(self.regular_page, HTTP_X_FORWARDED_FOR='2001:250::', REMOTE_ADDR='2001:250::')
         self.assertEqual(response.status_code, 200)
 
+    def test_country_code_cached(self):
+        with mock.patch.object(pygeoip.GeoIP, 'country_code_by_addr', return_value='CU') as mock_lookup:
+            for __ in range(3):
+                response = self.client.get(self.embargoed_page, HTTP_X_FORWARDED_FOR='1.0.0.0', REMOTE_ADDR='1.0.0.0')
+                self.assertEqual(response.status_code, 302)
+        # The country is only looked up in the GeoIP database once
+        self.assertEqual(mock_lookup.call_count, 1)
+
     def test_ip_exceptions(self):
         # Explicitly whitelist/blacklist some IPs
         IPFilter(
@@ -95,3 +95,16 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.0.1' in cblacklist)
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
+
+    def test_ip_ranges(self):
+        ips = IPFilter.IPFilterList(['10.0.0.0/16', '10.0.128.0/24', '10.1.0.0/16', '192.168.1.1', '2001:db8::/32'])
+        for addr in ['10.0.0.0', '10.0.255.255', '10.1.4.2', '192.168.1.1', '2001:db8::1']:
+            self.assertIn(addr, ips)
+        not_blocked = ['9.255.255.255', '10.2.0.0', '192.168.1.0', '192.168.1.2', '2001:db9::', '::ffff:10.0.0.1', 'junk']
+        for addr in not_blocked:
+            self.assertNotIn(addr, ips)
+
+    def test_ip_lists_parsed_once(self):
+        IPFilter(whitelist='127.0.0.1', blacklist='18.244.51.3').save()
+        self.assertIs(IPFilter.current().whitelist_ips, IPFilter.current().whitelist_ips)
+        self.assertIs(IPFilter.current().blacklist_ips, IPFilter.current().blacklist_ips)
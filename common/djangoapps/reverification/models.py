@@ -53,3 +53,14 @@ class MidcourseReverificationWindow(ValidateOnSaveMixin, models.Model):
             return cls.objects.get(course_id=course_id, start_date__lte=date, end_date__gte=date)
         except cls.DoesNotExist:
             return None
+
+    @classmethod
+    def get_windows_for_courses(cls, course_ids, date):
+        """
+        Returns a dict mapping course ids to the windows open for those courses on a particular
+        date, with one query for all the courses. Courses without an open window are left out.
+        """
+        return {
+            window.course_id: window
+            for window in cls.objects.filter(course_id__in=course_ids, start_date__lte=date, end_date__gte=date)
+        }
@@ -1,5 +1,7 @@
 import logging
 import re
+import threading
+from collections import OrderedDict
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -11,6 +13,71 @@ from xmodule.contentstore.content import StaticContent
 
 log = logging.getLogger(__name__)
 
+# The number of static url resolutions (and rewriters) kept by each process
+STATIC_URL_CACHE_SIZE = 10000
+
+
+class LRUCache(object):
+    """
+    A small, thread-safe dict-like cache which holds at most `max_size` entries, evicting
+    the least recently used one to make room for new ones.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for `key` (marking it as the most recently used), or `default`.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                return default
+            self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, evicting the least recently used entry if the cache is full.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Compiled url replacement regexes, by prefix
+_URL_REPLACE_REGEXES = {}
+
+# Rewriters, by (data_directory, course_id, static_asset_path)
+_STATIC_URL_REWRITERS = LRUCache(STATIC_URL_CACHE_SIZE)
+
+# The urls static paths resolve to, by (data_directory, course_id, static_asset_path, prefix, path)
+_RESOLVED_STATIC_URLS = LRUCache(STATIC_URL_CACHE_SIZE)
+
+
+def clear_static_url_caches():
+    """
+    Forget the cached rewriters and static url resolutions (e.g., after the static files
+    or the course's modulestore have changed, as they do in tests).
+    """
+    _STATIC_URL_REWRITERS.clear()
+    _RESOLVED_STATIC_URLS.clear()
+
 
 def _url_replace_regex(prefix):
     """
@@ -28,6 +95,16 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_replace_regex(prefix):
+    """
+    Return the compiled `_url_replace_regex(prefix)`, compiling it only once per process.
+    """
+    regex = _URL_REPLACE_REGEXES.get(prefix)
+    if regex is None:
+        regex = _URL_REPLACE_REGEXES[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -69,7 +146,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -89,7 +166,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -97,6 +174,10 @@ def process_static_urls(text, replacement_function, data_dir=None):
     Run an arbitrary replacement function on any urls matching the static file
     directory
     """
+    # Most text has no static urls at all, so don't bother running the regex over it
+    if '/static/' not in text and (not settings.STATIC_URL or settings.STATIC_URL not in text):
+        return text
+
     def wrap_part_extraction(match):
         """
         Unwraps a match group for the captures specified in _url_replace_regex
@@ -108,14 +189,11 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    regex = _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    ))
+    return regex.sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -147,8 +225,38 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    rewriter_key = (data_directory, course_id, static_asset_path)
+    rewriter = _STATIC_URL_REWRITERS.get(rewriter_key)
+    if rewriter is None:
+        rewriter = StaticURLRewriter(data_directory, course_id, static_asset_path)
+        _STATIC_URL_REWRITERS.set(rewriter_key, rewriter)
+    return rewriter.rewrite(text)
+
+
+class StaticURLRewriter(object):
+    """
+    Rewrites the static urls in text for one (data_directory, course_id, static_asset_path),
+    as described in `replace_static_urls`.
+
+    The url each static path resolves to only depends on the static files which have been
+    collected and on the course's modulestore, so resolutions are cached by the process
+    (except in DEBUG mode, where static files can come and go).
+    """
+    def __init__(self, data_directory, course_id, static_asset_path):
+        self.data_directory = data_directory
+        self.course_id = course_id
+        self.static_asset_path = static_asset_path
+        self._is_xml_course = None
+
+    def rewrite(self, text):
+        """
+        Return `text` with its static urls replaced.
+        """
+        return process_static_urls(
+            text, self.replace_static_url, data_dir=self.static_asset_path or self.data_directory
+        )
 
-    def replace_static_url(original, prefix, quote, rest):
+    def replace_static_url(self, original, prefix, quote, rest):
         """
         Replace a single matched url.
         """
@@ -158,12 +266,32 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             return original
 
         # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
+        if settings.DEBUG:
+            if finders.find(rest, True):
+                return original
+            return "".join([quote, self.resolve_url(prefix, rest), quote])
+
+        cache_key = (self.data_directory, self.course_id, self.static_asset_path, prefix, rest)
+        url = _RESOLVED_STATIC_URLS.get(cache_key)
+        if url is None:
+            url = self.resolve_url(prefix, rest)
+            _RESOLVED_STATIC_URLS.set(cache_key, url)
+        return "".join([quote, url, quote])
+
+    def is_xml_course(self):
+        """
+        Return whether the course is stored in an XML modulestore (looking it up only once).
+        """
+        if self._is_xml_course is None:
+            self._is_xml_course = modulestore().get_modulestore_type(self.course_id) == ModuleStoreEnum.Type.xml
+        return self._is_xml_course
+
+    def resolve_url(self, prefix, rest):
+        """
+        Return the url which the static path `rest` (matched after `prefix`) should be replaced with.
+        """
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        if (not self.static_asset_path) and self.course_id and not self.is_xml_course():
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
@@ -179,10 +307,10 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+                url = StaticContent.convert_legacy_static_url_with_course_id(rest, self.course_id)
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+            course_path = "/".join((self.static_asset_path or self.data_directory, rest))
 
             try:
                 if staticfiles_storage.exists(rest):
@@ -195,6 +323,4 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
                     rest, str(err)))
                 url = "".join([prefix, course_path])
 
-        return "".join([quote, url, quote])
-
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+        return url
@@ -1,12 +1,13 @@
 import re
 
-from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
+from nose.tools import assert_equals, assert_true, assert_false, with_setup  # pylint: disable=no-name-in-module
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
     _url_replace_regex,
     process_static_urls,
-    make_static_urls_absolute
+    make_static_urls_absolute,
+    clear_static_url_caches,
 )
 from mock import patch, Mock
 
@@ -63,6 +64,7 @@ def test_static_urls(mock_request):
     assert_equals(result, '\"http:///static/file.png\"')
 
 
+@with_setup(clear_static_url_caches)
 @patch('static_replace.staticfiles_storage')
 def test_storage_url_exists(mock_storage):
     mock_storage.exists.return_value = True
@@ -73,6 +75,7 @@ def test_storage_url_exists(mock_storage):
     mock_storage.url.called_once_with('data_dir/file.png')
 
 
+@with_setup(clear_static_url_caches)
 @patch('static_replace.staticfiles_storage')
 def test_storage_url_not_exists(mock_storage):
     mock_storage.exists.return_value = False
@@ -83,6 +86,7 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.called_once_with('file.png')
 
 
+@with_setup(clear_static_url_caches)
 @patch('static_replace.StaticContent')
 @patch('static_replace.modulestore')
 def test_mongo_filestore(mock_modulestore, mock_static_content):
@@ -102,6 +106,7 @@ def test_mongo_filestore(mock_modulestore, mock_static_content):
     mock_static_content.convert_legacy_static_url_with_course_id.assert_called_once_with('file.png', COURSE_KEY)
 
 
+@with_setup(clear_static_url_caches)
 @patch('static_replace.settings')
 @patch('static_replace.modulestore')
 @patch('static_replace.staticfiles_storage')
@@ -116,6 +121,36 @@ def test_data_dir_fallback(mock_storage, mock_modulestore, mock_settings):
     assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
 
 
+@with_setup(clear_static_url_caches)
+@patch('static_replace.modulestore')
+@patch('static_replace.staticfiles_storage')
+def test_static_url_resolution_cached(mock_storage, mock_modulestore):
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    text = '<img src="/static/file.png"/><img src="/static/file.png"/><a href="/static/other.pdf">'
+
+    first = replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY)
+    assert_equals(first, replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY))
+    assert_equals(mock_storage.exists.call_count, 2)
+    assert_equals(mock_modulestore.return_value.get_modulestore_type.call_count, 1)
+
+    # the same path can resolve differently for a different course
+    replace_static_urls(text, DATA_DIRECTORY, SlashSeparatedCourseKey('org', 'other', 'run'))
+    assert_equals(mock_storage.exists.call_count, 4)
+
+    clear_static_url_caches()
+    assert_equals(first, replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY))
+    assert_equals(mock_storage.exists.call_count, 6)
+
+
+def test_no_static_urls():
+    def processor(*args):  # pylint: disable=unused-argument,missing-docstring
+        raise AssertionError("There are no urls to process")
+
+    text = '<p>Nothing to see <a href="/course/here">here</a></p>'
+    assert_true(process_static_urls(text, processor) is text)
+
+
 def test_raw_static_check():
     """
     Make sure replace_static_urls leaves alone things that end in '.raw'
@@ -127,6 +162,7 @@ def test_raw_static_check():
     assert_equals(path, replace_static_urls(path, text))
 
 
+@with_setup(clear_static_url_caches)
 @patch('static_replace.staticfiles_storage')
 @patch('static_replace.modulestore')
 def test_static_url_with_query(mock_modulestore, mock_storage):
@@ -0,0 +1,92 @@
+"""
+Benchmark of replacing the static urls in the fragments of a large unit. Run it with
+``-a benchmark`` to see the timings.
+"""
+import logging
+import shutil
+import timeit
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from django.core.files.storage import FileSystemStorage
+from mock import patch, Mock
+from nose.plugins.attrib import attr
+
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from static_replace import replace_static_urls, clear_static_url_caches, _URL_REPLACE_REGEXES
+from xmodule.modulestore.mongo import MongoModuleStore
+
+log = logging.getLogger(__name__)
+
+COURSE_KEY = SlashSeparatedCourseKey('org', 'course', 'run')
+
+
+def make_fragment(num, num_urls=20):
+    """
+    Return the html of a component with `num_urls` static urls, some of which are shared
+    with the other components.
+    """
+    parts = [u'<div class="xblock" data-id="{}">'.format(num)]
+    for url_num in range(num_urls):
+        parts.append(
+            u'<p>Some text about figure {url_num}, which is long enough to look like course content, '
+            u'with a link to <a href="/course/handouts">the handouts</a>.</p>'
+            u'<img src="/static/images/figure_{num}_{url_num}.png" alt="figure"/>'
+            u'<script src="/static/js/shared_{shared}.js"></script>'.format(
+                num=num, url_num=url_num, shared=url_num % 5
+            )
+        )
+    parts.append(u'</div>')
+    return u''.join(parts)
+
+
+@attr('benchmark')
+class TestReplaceStaticUrlsPerformance(TestCase):
+    """
+    Compare replacing the static urls of a 30 component unit (and of 30 components without any
+    static urls) with cold caches for each fragment, as every fragment was processed before the
+    rewriters were cached, and with warm caches.
+    """
+    NUM_FRAGMENTS = 30
+    REPEAT = 20
+
+    def setUp(self):
+        super(TestReplaceStaticUrlsPerformance, self).setUp()
+        static_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        self.addCleanup(clear_static_url_caches)
+        for patcher in (
+                patch('static_replace.staticfiles_storage', FileSystemStorage(location=static_root)),
+                patch('static_replace.modulestore', Mock(return_value=Mock(MongoModuleStore))),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.fragments = [make_fragment(num) for num in range(self.NUM_FRAGMENTS)]
+        self.fragments.extend(u'<p>Component {} has no static urls</p>'.format(num) for num in range(30))
+
+    def _replace_unit(self, cold):
+        """
+        Replace the static urls in each fragment of the unit, and return the results.
+        """
+        results = []
+        for fragment in self.fragments:
+            if cold:
+                clear_static_url_caches()
+                _URL_REPLACE_REGEXES.clear()
+            results.append(replace_static_urls(fragment, 'data_dir', COURSE_KEY))
+        return results
+
+    def test_replace_unit(self):
+        cold_results = self._replace_unit(True)
+        cold_time = timeit.timeit(lambda: self._replace_unit(True), number=self.REPEAT) / self.REPEAT
+        self._replace_unit(False)
+        warm_time = timeit.timeit(lambda: self._replace_unit(False), number=self.REPEAT) / self.REPEAT
+
+        self.assertEqual(cold_results, self._replace_unit(False))
+        self.assertIn(u'/c4x/org/course/asset/images_figure_0_0.png', cold_results[0])
+        log.info(
+            "replace_static_urls over %d fragments (%d bytes): cold caches %.2fms, warm caches %.2fms",
+            len(self.fragments), sum(len(fragment) for fragment in self.fragments),
+            cold_time * 1000, warm_time * 1000
+        )
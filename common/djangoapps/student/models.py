@@ -1131,12 +1131,20 @@ class CourseEnrollment(models.Model):
         enroll_dict['total'] = total
         return enroll_dict
 
-    def is_paid_course(self):
+    def is_paid_course(self, modes=None):
         """
         Returns True, if course is paid
+
+        If `modes` (the course's non-expired `Mode`s) is given, it is used instead
+        of querying the course modes.
         """
-        paid_course = CourseMode.objects.filter(Q(course_id=self.course_id) & Q(mode_slug='honor') &
-                                                (Q(expiration_datetime__isnull=True) | Q(expiration_datetime__gte=datetime.now(pytz.UTC)))).exclude(min_price=0)
+        if modes is not None:
+            paid_course = any(mode.slug == 'honor' and mode.min_price != 0 for mode in modes)
+        else:
+            paid_course = CourseMode.objects.filter(
+                Q(course_id=self.course_id) & Q(mode_slug='honor') &
+                (Q(expiration_datetime__isnull=True) | Q(expiration_datetime__gte=datetime.now(pytz.UTC)))
+            ).exclude(min_price=0)
         if paid_course or self.mode == 'professional':
             return True
 
@@ -1156,10 +1164,13 @@ class CourseEnrollment(models.Model):
         """Changes this `CourseEnrollment` record's mode to `mode`.  Saves immediately."""
         self.update_enrollment(mode=mode)
 
-    def refundable(self):
+    def refundable(self, modes=None, has_certificate=None):
         """
         For paid/verified certificates, students may receive a refund if they have
         a verified certificate and the deadline for refunds has not yet passed.
+
+        `modes` (the course's non-expired `Mode`s) and `has_certificate` (whether the
+        student has a certificate for the course) can be given to avoid querying them.
         """
         # In order to support manual refunds past the deadline, set can_refund on this object.
         # On unenrolling, the "UNENROLL_DONE" signal calls CertificateItem.refund_cert_callback(),
@@ -1170,12 +1181,14 @@ class CourseEnrollment(models.Model):
             return True
 
         # If the student has already been given a certificate they should not be refunded
-        if GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+        if has_certificate is None:
+            has_certificate = GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None
+        if has_certificate:
             return False
 
         #TODO - When Course administrators to define a refund period for paid courses then refundable will be supported. # pylint: disable=fixme
 
-        course_mode = CourseMode.mode_for_course(self.course_id, 'verified')
+        course_mode = CourseMode.mode_for_course(self.course_id, 'verified', modes=modes)
         if course_mode is None:
             return False
         else:
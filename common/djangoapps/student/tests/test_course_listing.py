@@ -8,7 +8,7 @@ from student.tests.factories import UserFactory
 from student.roles import GlobalStaff
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.modulestore.django import modulestore
 from xmodule.error_module import ErrorDescriptor
@@ -74,6 +74,19 @@ class TestCourseListing(ModuleStoreTestCase):
         courses_list = list(get_course_enrollment_pairs(self.student, None, []))
         self.assertEqual(len(courses_list), 0)
 
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_course_listing_uses_overviews(self):
+        """
+        Test that once the courses' overviews are stored, listing them doesn't read the modulestore
+        """
+        for number in range(3):
+            self._create_course_with_access_groups(SlashSeparatedCourseKey('Org1', 'Course{}'.format(number), 'Run1'))
+
+        self.assertEqual(len(list(get_course_enrollment_pairs(self.student, None, []))), 3)
+        with check_mongo_calls(0):
+            courses_list = list(get_course_enrollment_pairs(self.student, None, []))
+        self.assertEqual(len(courses_list), 3)
+
     def test_errored_course_regular_access(self):
         """
         Test the course list for regular staff when get_course returns an ErrorDescriptor
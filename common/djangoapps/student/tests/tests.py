@@ -13,7 +13,9 @@ import unittest
 from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.signals import request_started
 from django.core.urlresolvers import reverse
+from django.db import connection, reset_queries
 from django.test import TestCase
 from django.test.client import RequestFactory, Client
 from django.test.utils import override_settings
@@ -32,10 +34,11 @@ from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 
 # These imports refer to lms djangoapps.
 # Their testcases are only run under lms.
-from bulk_email.models import Optout  # pylint: disable=import-error
+from bulk_email.models import Optout, CourseAuthorization  # pylint: disable=import-error
 from certificates.models import CertificateStatuses  # pylint: disable=import-error
 from certificates.tests.factories import GeneratedCertificateFactory  # pylint: disable=import-error
 import shoppingcart  # pylint: disable=import-error
+from reverification.tests.factories import MidcourseReverificationWindowFactory
 
 
 log = logging.getLogger(__name__)
@@ -352,6 +355,58 @@ class DashboardTest(ModuleStoreTestCase):
 
         self.assertFalse(enrollment.refundable())
 
+    def _enroll_in_new_course(self):
+        """
+        Enroll the user as verified in a new course, which has a verified mode, an open
+        reverification window and email enabled, and in which the user has a certificate.
+        """
+        course = CourseFactory.create()
+        CourseModeFactory.create(
+            course_id=course.id,
+            mode_slug='verified',
+            mode_display_name='Verified',
+            expiration_datetime=datetime.now(pytz.UTC) + timedelta(days=1)
+        )
+        CourseEnrollment.enroll(self.user, course.id, mode='verified')
+        GeneratedCertificateFactory.create(
+            user=self.user,
+            course_id=course.id,
+            status=CertificateStatuses.downloadable,
+            mode='verified'
+        )
+        MidcourseReverificationWindowFactory.create(course_id=course.id)
+        CourseAuthorization.objects.create(course_id=course.id, email_enabled=True)
+
+    def _dashboard_query_count(self):
+        """
+        Return the number of queries made to render the dashboard.
+        """
+        # the test client resets the queries at the start of the request
+        request_started.disconnect(reset_queries)
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            queries_before = len(connection.queries)
+            response = self.client.get(reverse('dashboard'))
+            self.assertEqual(response.status_code, 200)
+            return len(connection.queries) - queries_before
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+            request_started.connect(reset_queries)
+
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_dashboard_queries_independent_of_enrollments(self):
+        self.client.login(username="jack", password="test")
+        self._enroll_in_new_course()
+        # the first view of the dashboard stores the overview of the course
+        self.client.get(reverse('dashboard'))
+        queries_with_one_course = self._dashboard_query_count()
+
+        for __ in range(3):
+            self._enroll_in_new_course()
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(self._dashboard_query_count(), queries_with_one_course)
+
 
 class EnrollInCourseTest(TestCase):
     """Tests enrolling and unenrolling in courses."""
@@ -57,7 +57,9 @@ from student.models import (
 from student.forms import PasswordResetFormNoActive
 
 from verify_student.models import SoftwareSecurePhotoVerification, MidcourseReverificationWindow
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, GeneratedCertificate, certificate_status, certificate_status_for_student
+)
 from dark_lang.models import DarkLangConfig
 
 from xmodule.modulestore.django import modulestore
@@ -79,6 +81,7 @@ import external_auth.views
 from bulk_email.models import Optout, CourseAuthorization
 import shoppingcart
 from shoppingcart.models import DonationConfiguration
+from openedx.core.djangoapps.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.user_api.models import UserPreference
 from lang_pref import LANGUAGE_KEY
 
@@ -103,7 +106,6 @@ from student.helpers import (
     auth_pipeline_urls, set_logged_in_cookie,
     check_verify_status_by_course
 )
-from xmodule.error_module import ErrorDescriptor
 from shoppingcart.models import CourseRegistrationCode
 from openedx.core.djangoapps.user_api.api import profile as profile_api
 
@@ -116,6 +118,13 @@ AUDIT_LOG = logging.getLogger("audit")
 
 ReverifyInfo = namedtuple('ReverifyInfo', 'course_id course_name course_number date status display')  # pylint: disable=invalid-name
 
+# Everything the dashboard displays about one of the user's courses, see get_dashboard_courses
+DashboardCourse = namedtuple(  # pylint: disable=invalid-name
+    'DashboardCourse',
+    'course enrollment modes all_modes show_courseware_link cert_status show_email_settings course_mode_info '
+    'show_refund_option is_paid_course is_course_blocked reverification'
+)
+
 
 def csrf_token(context):
     """A csrf token that can be included in a form."""
@@ -177,10 +186,11 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course):
+def cert_info(user, course, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
-    student and course.  Returns a dictionary with keys:
+    student and course.  `cert_status` is the student's certificate_status_for_student
+    in the course, if it's already loaded.  Returns a dictionary with keys:
 
     'status': one of 'generating', 'ready', 'notpassing', 'processing', 'restricted'
     'show_download_url': bool
@@ -193,7 +203,9 @@ def cert_info(user, course):
     if not course.may_certify():
         return {}
 
-    return _cert_info(user, course, certificate_status_for_student(user, course.id))
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course.id)
+    return _cert_info(user, course, cert_status)
 
 
 def reverification_info(course_enrollment_pairs, user, statuses):
@@ -212,9 +224,16 @@ def reverification_info(course_enrollment_pairs, user, statuses):
             dict["must_reverify"] = []
             dict["must_reverify"] = [some information]
     """
+    return _reverifications_by_status(course_reverification_infos(user, course_enrollment_pairs).values(), statuses)
+
+
+def _reverifications_by_status(infos, statuses):
+    """
+    Group the ReverifyInfos (which may include Nones, for courses without reverification info)
+    by their status, see reverification_info.
+    """
     reverifications = defaultdict(list)
-    for (course, enrollment) in course_enrollment_pairs:
-        info = single_course_reverification_info(user, course, enrollment)
+    for info in infos:
         if info:
             reverifications[info.status].append(info)
 
@@ -240,44 +259,121 @@ def single_course_reverification_info(user, course, enrollment):  # pylint: disa
         ReverifyInfo: (course_id, course_name, course_number, date, status)
         OR, None: None if there is no re-verification info for this enrollment
     """
-    window = MidcourseReverificationWindow.get_window(course.id, datetime.datetime.now(UTC))
+    return course_reverification_infos(user, [(course, enrollment)]).get(course.id)
 
-    # If there's no window OR the user is not verified, we don't get reverification info
-    if (not window) or (enrollment.mode != "verified"):
-        return None
-    return ReverifyInfo(
-        course.id, course.display_name, course.number,
-        window.end_date.strftime('%B %d, %Y %X %p'),
-        SoftwareSecurePhotoVerification.user_status(user, window)[0],
-        SoftwareSecurePhotoVerification.display_status(user, window),
-    )
+
+def course_reverification_infos(user, course_enrollment_pairs):
+    """Returns midcourse reverification-related information for user's enrollments in courses.
+
+    For each course that has an open re-verification window, and in which the user has a verified
+    enrollment, we return a tuple with relevant information. The windows and the user's
+    reverifications are loaded with one query each, however many courses there are.
+
+    Args:
+        user (User): the user we want to get information for
+        course_enrollment_pairs (list): list of (course, enrollment) tuples
+
+    Returns:
+        dict: mapping course ids to ReverifyInfo: (course_id, course_name, course_number, date, status, display).
+        Courses without re-verification info are left out.
+    """
+    verified_courses = {
+        course.id: course for course, enrollment in course_enrollment_pairs if enrollment.mode == "verified"
+    }
+    windows = MidcourseReverificationWindow.get_windows_for_courses(verified_courses.keys(), datetime.datetime.now(UTC))
+    statuses = SoftwareSecurePhotoVerification.reverification_statuses(user, windows.values())
+
+    infos = {}
+    for course_id, window in windows.iteritems():
+        course = verified_courses[course_id]
+        status, display = statuses[window.id]
+        infos[course_id] = ReverifyInfo(
+            course.id, course.display_name, course.number,
+            window.end_date.strftime('%B %d, %Y %X %p'),
+            status,
+            display,
+        )
+    return infos
 
 
 def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
-    Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
+    Get the relevant set of (CourseOverview, CourseEnrollment) pairs to be displayed on
     a student's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        store = modulestore()
-        with store.bulk_operations(enrollment.course_id):
-            course = store.get_course(enrollment.course_id)
-            if course and not isinstance(course, ErrorDescriptor):
-
-                # if we are in a Microsite, then filter out anything that is not
-                # attributed (by ORG) to that Microsite
-                if course_org_filter and course_org_filter != course.location.org:
-                    continue
-                # Conversely, if we are not in a Microsite, then let's filter out any enrollments
-                # with courses attributed (by ORG) to Microsites
-                elif course.location.org in org_filter_out_set:
-                    continue
-
-                yield (course, enrollment)
-            else:
-                log.error("User {0} enrolled in {2} course {1}".format(
-                    user.username, enrollment.course_id, "broken" if course else "non-existent"
-                ))
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    overviews = CourseOverview.get_from_ids([enrollment.course_id for enrollment in enrollments])
+    for enrollment in enrollments:
+        course = overviews.get(enrollment.course_id)
+        if course is not None:
+
+            # if we are in a Microsite, then filter out anything that is not
+            # attributed (by ORG) to that Microsite
+            if course_org_filter and course_org_filter != course.location.org:
+                continue
+            # Conversely, if we are not in a Microsite, then let's filter out any enrollments
+            # with courses attributed (by ORG) to Microsites
+            elif course.location.org in org_filter_out_set:
+                continue
+
+            yield (course, enrollment)
+        else:
+            log.error("User {0} enrolled in broken or non-existent course {1}".format(
+                user.username, enrollment.course_id
+            ))
+
+
+def get_dashboard_courses(request, course_enrollment_pairs):
+    """
+    Get the DashboardCourses, with everything the dashboard displays about each course,
+    of the given (course, enrollment) pairs of the request's user, in the same order.
+
+    Each kind of data (course modes, certificates, email authorizations, registration codes,
+    reverifications and access roles) is loaded with one query for all the courses, so the
+    number of queries doesn't grow with the number of enrollments.  (The only exception is
+    opting out of email from blocked courses, see is_course_blocked.)
+    """
+    user = request.user
+    course_ids = [course.id for course, __ in course_enrollment_pairs]
+
+    all_course_modes, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(course_ids)
+    certificates = {
+        certificate.course_id: certificate
+        for certificate in GeneratedCertificate.objects.filter(user=user, course_id__in=course_ids)
+    }
+    email_enabled_course_ids = CourseAuthorization.instructor_email_enabled_courses(course_ids)
+    redeemed_registration_codes = defaultdict(list)
+    for registration_code in CourseRegistrationCode.objects.filter(
+            course_id__in=course_ids, registrationcoderedemption__redeemed_by=user
+    ).select_related('invoice'):
+        redeemed_registration_codes[registration_code.course_id].append(registration_code)
+    reverifications = course_reverification_infos(user, course_enrollment_pairs)
+
+    dashboard_courses = []
+    for course, enrollment in course_enrollment_pairs:
+        modes = unexpired_course_modes[course.id]
+        modes_dict = {mode.slug: mode for mode in modes}
+        certificate = certificates.get(course.id)
+        dashboard_courses.append(DashboardCourse(
+            course=course,
+            enrollment=enrollment,
+            modes=modes_dict,
+            all_modes=all_course_modes[course.id],
+            show_courseware_link=has_access(user, 'load', course),
+            cert_status=cert_info(user, course, certificate_status(certificate)),
+            # only show email settings for Mongo course and when bulk email is turned on
+            show_email_settings=(
+                settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
+                modulestore().get_modulestore_type(course.id) != ModuleStoreEnum.Type.xml and
+                course.id in email_enabled_course_ids
+            ),
+            course_mode_info=complete_course_mode_info(course.id, enrollment, modes=modes_dict),
+            show_refund_option=enrollment.refundable(modes=modes, has_certificate=certificate is not None),
+            is_paid_course=enrollment.is_paid_course(modes=modes),
+            is_course_blocked=is_course_blocked(request, redeemed_registration_codes[course.id], course.id),
+            reverification=reverifications.get(course.id),
+        ))
+    return dashboard_courses
 
 
 def _cert_info(user, course, cert_status):
@@ -502,15 +598,11 @@ def dashboard(request):
     # sort the enrollment pairs by the enrollment date
     course_enrollment_pairs.sort(key=lambda x: x[1].created, reverse=True)
 
-    # Retrieve the course modes for each course
-    enrolled_course_ids = [course.id for course, __ in course_enrollment_pairs]
-    all_course_modes, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(enrolled_course_ids)
+    # Load everything displayed about each course in bulk, rather than course by course
+    dashboard_courses = get_dashboard_courses(request, course_enrollment_pairs)
     course_modes_by_course = {
-        course_id: {
-            mode.slug: mode
-            for mode in modes
-        }
-        for course_id, modes in unexpired_course_modes.iteritems()
+        dashboard_course.course.id: dashboard_course.modes
+        for dashboard_course in dashboard_courses
     }
 
     # Check to see if the student has recently enrolled in a course.
@@ -536,18 +628,16 @@ def dashboard(request):
         staff_access = True
         errored_courses = modulestore().get_errored_courses()
 
-    show_courseware_links_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
-                                          if has_access(request.user, 'load', course))
+    show_courseware_links_for = frozenset(
+        dashboard_course.course.id for dashboard_course in dashboard_courses
+        if dashboard_course.show_courseware_link
+    )
 
     # Construct a dictionary of course mode information
-    # used to render the course list.  We re-use the course modes dict
-    # we loaded earlier to avoid hitting the database.
+    # used to render the course list.
     course_mode_info = {
-        course.id: complete_course_mode_info(
-            course.id, enrollment,
-            modes=course_modes_by_course[course.id]
-        )
-        for course, enrollment in course_enrollment_pairs
+        dashboard_course.course.id: dashboard_course.course_mode_info
+        for dashboard_course in dashboard_courses
     }
 
     # Determine the per-course verification status
@@ -568,23 +658,19 @@ def dashboard(request):
         verify_status_by_course = check_verify_status_by_course(
             user,
             course_enrollment_pairs,
-            all_course_modes
+            {dashboard_course.course.id: dashboard_course.all_modes for dashboard_course in dashboard_courses}
         )
     else:
         verify_status_by_course = {}
 
     cert_statuses = {
-        course.id: cert_info(request.user, course)
-        for course, _enrollment in course_enrollment_pairs
+        dashboard_course.course.id: dashboard_course.cert_status
+        for dashboard_course in dashboard_courses
     }
 
-    # only show email settings for Mongo course and when bulk email is turned on
     show_email_settings_for = frozenset(
-        course.id for course, _enrollment in course_enrollment_pairs if (
-            settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(course.id) != ModuleStoreEnum.Type.xml and
-            CourseAuthorization.instructor_email_enabled(course.id)
-        )
+        dashboard_course.course.id for dashboard_course in dashboard_courses
+        if dashboard_course.show_email_settings
     )
 
     # Verification Attempts
@@ -593,16 +679,18 @@ def dashboard(request):
 
     # Gets data for midcourse reverifications, if any are necessary or have failed
     statuses = ["approved", "denied", "pending", "must_reverify"]
-    reverifications = reverification_info(course_enrollment_pairs, user, statuses)
+    reverifications = _reverifications_by_status(
+        [dashboard_course.reverification for dashboard_course in dashboard_courses], statuses
+    )
 
-    show_refund_option_for = frozenset(course.id for course, _enrollment in course_enrollment_pairs
-                                       if _enrollment.refundable())
+    show_refund_option_for = frozenset(dashboard_course.course.id for dashboard_course in dashboard_courses
+                                       if dashboard_course.show_refund_option)
 
-    block_courses = frozenset(course.id for course, enrollment in course_enrollment_pairs
-                              if is_course_blocked(request, CourseRegistrationCode.objects.filter(course_id=course.id, registrationcoderedemption__redeemed_by=request.user), course.id))
+    block_courses = frozenset(dashboard_course.course.id for dashboard_course in dashboard_courses
+                              if dashboard_course.is_course_blocked)
 
-    enrolled_courses_either_paid = frozenset(course.id for course, _enrollment in course_enrollment_pairs
-                                             if _enrollment.is_paid_course())
+    enrolled_courses_either_paid = frozenset(dashboard_course.course.id for dashboard_course in dashboard_courses
+                                             if dashboard_course.is_paid_course)
     # get info w.r.t ExternalAuthMap
     external_auth_map = None
     try:
@@ -744,7 +832,7 @@ def _allow_donation(course_modes, course_id):
     """
     donations_enabled = DonationConfiguration.current().enabled
     is_verified_mode = CourseMode.has_verified_mode(course_modes[course_id])
-    has_payment_option = CourseMode.has_payment_options(course_id)
+    has_payment_option = CourseMode.has_payment_options(course_id, modes=course_modes[course_id].values())
     return donations_enabled and not is_verified_mode and not has_payment_option
 
 
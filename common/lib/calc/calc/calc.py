@@ -2,11 +2,18 @@
 Parser and evaluator for FormulaResponse and NumericalResponse
 
 Uses pyparsing to parse. Main function as of now is evaluator().
+
+Parsing is much slower than evaluating, so parsed expressions are cached by
+compile_expression(), and a parsed expression can be evaluated for a whole
+list of samples of its variables at once with CompiledExpression.evaluate_samples().
 """
 
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +80,17 @@ SUFFIXES = {
 }
 
 
+# The number of parsed expressions to keep in the cache used by compile_expression()
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
+# The default functions which operate on each element of numpy arrays (and so can be
+# used when evaluating many samples at once). The others (e.g. factorial) make
+# `evaluate_samples` fall back to evaluating each sample separately.
+VECTORIZED_FUNCTIONS = frozenset(
+    name for name in DEFAULT_FUNCTIONS if name not in ('fact', 'factorial', 'arccot')
+)
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -80,6 +98,14 @@ class UndefinedVariable(Exception):
     pass
 
 
+class NotVectorizable(Exception):
+    """
+    Indicate that an expression can't be evaluated for many samples at once
+    with the same result as evaluating each sample separately.
+    """
+    pass
+
+
 def lower_dict(input_dict):
     """
     Convert all keys in a dictionary to lowercase; keep their original values.
@@ -121,8 +147,8 @@ def eval_atom(parse_result):
 
     In the case of parenthesis, ignore them.
     """
-    # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    # Find the first number (or array of samples) in the list
+    result = next(k for k in parse_result if not isinstance(k, basestring))
     return result
 
 
@@ -136,7 +162,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if not isinstance(k, basestring)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -173,10 +199,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
-            current_op = operator.add
-        elif token == '-':
-            current_op = operator.sub
+        # Compare only the operators, since a token may be an array of samples
+        if isinstance(token, basestring):
+            if token == '+':
+                current_op = operator.add
+            elif token == '-':
+                current_op = operator.sub
         else:
             total = current_op(total, token)
     return total
@@ -191,15 +219,31 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
-            current_op = operator.mul
-        elif token == '/':
-            current_op = operator.truediv
+        # Compare only the operators, since a token may be an array of samples
+        if isinstance(token, basestring):
+            if token == '*':
+                current_op = operator.mul
+            elif token == '/':
+                current_op = operator.truediv
         else:
             prod = current_op(prod, token)
     return prod
 
 
+def eval_parallel_samples(parse_result):
+    """
+    Compute the parallel resistors operator over numbers or arrays of samples.
+
+    A zero among the inputs makes that sample NaN, which isn't vectorized.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    values = [e for e in parse_result if not isinstance(e, basestring)]
+    if any(numpy.any(numpy.asarray(e) == 0) for e in values):
+        raise NotVectorizable("parallel resistor with zero resistance")
+    return 1. / sum(1. / e for e in values)
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
@@ -224,38 +268,162 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+_compiled_expressions = OrderedDict()  # pylint: disable=invalid-name
+_compiled_expressions_lock = threading.Lock()  # pylint: disable=invalid-name
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
-
-    return math_interpreter.reduce_tree(evaluate_actions)
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return the CompiledExpression for the string `math_expr`.
+
+    Parsed expressions are immutable, so the most recently used are cached (by
+    expression and case sensitivity) and shared by every caller.
+
+    Raises a pyparsing ParseException if the expression can't be parsed.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        compiled = _compiled_expressions.pop(key, None)
+        if compiled is not None:
+            # re-insert to mark it as the most recently used
+            _compiled_expressions[key] = compiled
+            return compiled
+
+    compiled = CompiledExpression(math_expr, case_sensitive)
+
+    with _compiled_expressions_lock:
+        _compiled_expressions[key] = compiled
+        while len(_compiled_expressions) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _compiled_expressions.popitem(last=False)
+    return compiled
+
+
+class CompiledExpression(object):
+    """
+    A parsed math expression, which can be evaluated repeatedly without parsing it again.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr`. Raises a pyparsing ParseException if it can't be parsed.
+        """
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+
+        # An empty expression evaluates to NaN.
+        if math_expr.strip() == "":
+            self.math_interpreter = None
+        else:
+            self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self.math_interpreter.parse_algebra()
+
+        if case_sensitive:
+            self.casify = lambda x: x
+        else:
+            self.casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression, and return a float (or complex).
+
+        -Variables are passed as a dictionary from string to value. They must be
+         python numbers.
+        -Unary functions are passed as a dictionary from string to function.
+        """
+        # No need to go further.
+        if self.math_interpreter is None:
+            return float('nan')
+
+        # Get our variables together...
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        return self.math_interpreter.reduce_tree(self._evaluate_actions(all_variables, all_functions))
+
+    def evaluate_samples(self, variables_list, functions=None):
+        """
+        Evaluate the expression for each of the dicts of variables in `variables_list`,
+        and return the list of results.
+
+        When every sample defines the same variables, the expression is evaluated once
+        for all of the samples, with the value of each variable as a numpy array. If
+        that would give a different result (or raise a different error) than evaluating
+        the samples one at a time (e.g. division by zero, or functions like factorial
+        which don't operate on arrays), each sample is evaluated separately instead.
+        """
+        functions = functions or {}
+        if not variables_list:
+            return []
+        if self.math_interpreter is None:
+            return [float('nan')] * len(variables_list)
+
+        names = set(variables_list[0])
+        if functions or len(variables_list) == 1 or any(set(variables) != names for variables in variables_list):
+            # The samples can't be put into arrays, or may use functions which can't handle them
+            return self._evaluate_each(variables_list, functions)
+
+        samples = dict(
+            (name, numpy.array([variables[name] for variables in variables_list]))
+            for name in names
+        )
+        if any(values.dtype.kind not in 'fc' for values in samples.itervalues()):
+            # numpy integers overflow silently, unlike python's
+            return self._evaluate_each(variables_list, functions)
+
+        all_variables, all_functions = add_defaults(samples, {}, self.case_sensitive)
+        # Raise the same error for undefined variables as the first sample would
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        try:
+            # Make any floating point error raise an exception (rather than warn and
+            # return inf or nan), so that we can fall back to the scalar evaluation
+            # which reports it the same way it always has.
+            with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+                result = self.math_interpreter.reduce_tree(
+                    self._evaluate_actions(all_variables, all_functions, vectorized=True)
+                )
+        except Exception:  # pylint: disable=broad-except
+            return self._evaluate_each(variables_list, functions)
+
+        result = numpy.asarray(result)
+        if result.ndim == 0:
+            # The expression doesn't depend on any of the variables
+            return [result.item()] * len(variables_list)
+        return result.tolist()
+
+    def _evaluate_each(self, variables_list, functions):
+        """
+        Evaluate the expression for each of the dicts of variables in `variables_list` in turn.
+        """
+        return [self.evaluate(variables, functions) for variables in variables_list]
+
+    def _evaluate_actions(self, all_variables, all_functions, vectorized=False):
+        """
+        Return the actions for reduce_tree which evaluate the tree with the given variables
+        and functions.
+        """
+        casify = self.casify
+
+        def function(parse_result):
+            """ Apply the function, checking whether it can be vectorized """
+            name = casify(parse_result[0])
+            if vectorized and name not in VECTORIZED_FUNCTIONS:
+                raise NotVectorizable(name)
+            return all_functions[name](parse_result[1])
+
+        return {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': function,
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel_samples if vectorized else eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
 
 
 class ParseAugmenter(object):
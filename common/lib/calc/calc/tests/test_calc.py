@@ -559,3 +559,86 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Test that compiled expressions are cached, and that evaluating many samples at
+    once gives the same results as calc.evaluator gives for each sample.
+    """
+
+    def assert_samples_match(self, expression, variables_list, case_sensitive=False):
+        """
+        Check that evaluate_samples gives what evaluator does for each sample
+        """
+        expected = [
+            calc.evaluator(variables, {}, expression, case_sensitive=case_sensitive)
+            for variables in variables_list
+        ]
+        compiled = calc.compile_expression(expression, case_sensitive)
+        results = compiled.evaluate_samples(variables_list)
+        self.assertEqual(len(results), len(expected))
+        for result, expected_result in zip(results, expected):
+            if numpy.isnan(expected_result):
+                self.assertTrue(numpy.isnan(result))
+            else:
+                self.assertAlmostEqual(result, expected_result)
+
+    def test_compiled_expression_is_cached(self):
+        compiled = calc.compile_expression("x^2 + 1")
+        self.assertIs(compiled, calc.compile_expression("x^2 + 1"))
+        self.assertIsNot(compiled, calc.compile_expression("x^2 + 1", case_sensitive=True))
+        self.assertIsNot(compiled, calc.compile_expression("x^2 + 2"))
+
+    def test_cache_is_bounded(self):
+        first = calc.compile_expression("1 + 1")
+        for num in range(calc.COMPILED_EXPRESSION_CACHE_SIZE):
+            calc.compile_expression(str(num))
+        self.assertIsNot(first, calc.compile_expression("1 + 1"))
+
+    def test_parse_errors_are_raised(self):
+        with self.assertRaises(ParseException):
+            calc.compile_expression("1 +* 2")
+        with self.assertRaises(ParseException):
+            calc.compile_expression("1 +* 2").evaluate_samples([{}, {}])
+
+    def test_samples(self):
+        samples = [{'x': 0.5 * num, 'y': 2.0 - num} for num in range(1, 10)]
+        self.assert_samples_match("3*x^2 + y/2 - sin(x)*exp(y)", samples)
+        self.assert_samples_match("sqrt(x) || x", samples)
+        self.assert_samples_match("x*j + 1", samples)
+        self.assert_samples_match("X + Y", samples)
+        self.assert_samples_match("2^3^2", samples)
+        self.assert_samples_match("", samples)
+
+    def test_complex_samples(self):
+        samples = [{'z': complex(num, 1)} for num in range(5)]
+        self.assert_samples_match("z^2 + 1/z", samples)
+
+    def test_samples_fall_back_to_evaluator(self):
+        samples = [{'x': float(num)} for num in range(-2, 3)]
+        # numpy warns for values outside of a function's domain
+        self.assert_samples_match("sqrt(x) + arccos(x)", samples)
+        self.assert_samples_match("x || 3", samples)
+        self.assert_samples_match("arccot(x)", samples)
+        # non-vectorized function
+        self.assert_samples_match("fact(3) * x", samples)
+        # integer samples
+        self.assert_samples_match("x^30", [{'x': 7}, {'x': 8}])
+        # samples with different variables
+        self.assert_samples_match("x", [{'x': 1.0}, {'x': 2.0, 'y': 3.0}])
+        # user functions
+        self.assertEqual(
+            calc.compile_expression("f(x)").evaluate_samples([{'x': 1.0}, {'x': 2.0}], {'f': lambda x: x + 1}),
+            [2.0, 3.0]
+        )
+
+    def test_sample_errors(self):
+        samples = [{'x': float(num)} for num in range(-2, 3)]
+        compiled = calc.compile_expression("1/x")
+        with self.assertRaises(ZeroDivisionError):
+            compiled.evaluate_samples(samples)
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.compile_expression("fact(x)").evaluate_samples(samples)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'QWSEKO'):
+            calc.compile_expression("x + QWSEKO").evaluate_samples(samples)
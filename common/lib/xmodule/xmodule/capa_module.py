@@ -159,6 +159,18 @@ class CapaDescriptor(CapaFields, RawDescriptor):
             path[8:],
         ]
 
+    @property
+    def max_score_depends_on_student(self):
+        """
+        Whether the maximum score of this problem may differ between students. If not, the
+        maximum score is the same for every student.
+
+        Students only get different problems through the python in its scripts, which can read the
+        student's anonymous id as well as the random seed, so a problem with scripts may differ
+        between students even if it's never randomized.
+        """
+        return '<script' in self.data
+
     @property
     def non_editable_metadata_fields(self):
         non_editable_fields = super(CapaDescriptor, self).non_editable_metadata_fields
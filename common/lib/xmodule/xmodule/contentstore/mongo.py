@@ -1,6 +1,9 @@
+import datetime
+import hashlib
 import pymongo
 import gridfs
-from gridfs.errors import NoFile
+from gridfs.errors import NoFile, FileExists, CorruptGridFile
+from tempfile import SpooledTemporaryFile
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 
@@ -12,11 +15,40 @@ from fs.osfs import OSFS
 import os
 import json
 from bson.son import SON
+from bson.objectid import ObjectId
 from opaque_keys.edx.keys import AssetKey
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 
+# assets bigger than this are buffered on disk while they're hashed
+MAX_IN_MEMORY_BLOB_SIZE = 16 * 1024 * 1024
+
+# how long a blob which no asset references is kept, in case it's saved again, before it's deleted
+BLOB_GRACE_PERIOD = datetime.timedelta(days=1)
+
+# how many times storing a blob is tried, clearing stale chunks in between, before giving up
+BLOB_SAVE_ATTEMPTS = 3
+
 
 class MongoContentStore(ContentStore):
+    """
+    A content store which keeps assets in mongo.
+
+    Each asset has an entry in the `fs.files` collection (named by the bucket) holding its course
+    relative attributes, such as its display name, content type and thumbnail. The asset's data is
+    stored once per distinct content, in the `fs.blobs` GridFS bucket, as a blob whose id is the
+    SHA-1 of the data; the entry's `blob_id` references it. So saving the same data in several
+    assets or courses (e.g. re-importing or re-running a course) only stores the data once, and
+    copying a course's assets only copies their entries.
+
+    When the last entry referencing a blob is deleted, the blob is marked as unreferenced rather
+    than deleted, and it's deleted by a later sweep once it has stayed unreferenced for
+    BLOB_GRACE_PERIOD. Saving the blob's data again clears the mark, atomically with finding the
+    blob, and the sweep only deletes a blob whose mark hasn't changed since it checked that no
+    entry references it, so a concurrent save or copy can't be left referencing a deleted blob.
+
+    Entries saved before assets were stored in blobs are GridFS files holding their own data
+    (they don't have a `blob_id`); they're read and deleted as such.
+    """
 
     # pylint: disable=unused-argument
     def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None, **kwargs):
@@ -42,6 +74,11 @@ class MongoContentStore(ContentStore):
         self.fs = gridfs.GridFS(_db, bucket)
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
+        self.fs_chunks = _db[bucket + ".chunks"]
+
+        self.blobs = gridfs.GridFS(_db, bucket + ".blobs")
+        self.blob_files = _db[bucket + ".blobs.files"]
+        self.blob_chunks = _db[bucket + ".blobs.chunks"]
 
     def close_connections(self):
         """
@@ -59,64 +96,171 @@ class MongoContentStore(ContentStore):
 
     def save(self, content):
         content_id, content_son = self.asset_db_key(content.location)
+        blob = self._save_blob(content.data)
 
-        # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
-        # Then you can upload as many versions as you like and access by date or version. Because we use
-        # the location as the _id, we must delete before adding (there's no replace method in gridFS)
-        self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
-
+        previous = self.fs_files.find_one({'_id': content_id}, {'blob_id': True})
         thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
-        with self.fs.new_file(_id=content_id, filename=unicode(content.location), content_type=content.content_type,
-                              displayname=content.name, content_son=content_son,
-                              thumbnail_location=thumbnail_location,
-                              import_path=content.import_path,
-                              # getattr b/c caching may mean some pickled instances don't have attr
-                              locked=getattr(content, 'locked', False)) as fp:
-            if hasattr(content.data, '__iter__'):
-                for chunk in content.data:
-                    fp.write(chunk)
-            else:
-                fp.write(content.data)
-
+        self.fs_files.save(self._asset_entry(
+            content_id, content_son, blob, filename=unicode(content.location), contentType=content.content_type,
+            displayname=content.name, thumbnail_location=thumbnail_location, import_path=content.import_path,
+            # getattr b/c caching may mean some pickled instances don't have attr
+            locked=getattr(content, 'locked', False)
+        ))
+
+        # only release the previous data once the entry references the new data
+        if previous is not None and 'blob_id' not in previous:
+            # the asset was saved as a GridFS file, which the entry has replaced: delete its data
+            self.fs_chunks.remove({'files_id': content_id})
+        elif previous is not None and previous['blob_id'] != blob['_id']:
+            self._release_blobs([previous['blob_id']])
         return content
 
+    def _save_blob(self, data):
+        """
+        Store data as a blob identified by its SHA-1, unless the same data is already stored (in
+        which case the blob is no longer marked as unreferenced), and return the blob's file document.
+        """
+        chunks = data if hasattr(data, '__iter__') else [data]
+        sha1, md5, length = hashlib.sha1(), hashlib.md5(), 0
+        with SpooledTemporaryFile(max_size=MAX_IN_MEMORY_BLOB_SIZE) as buffered:
+            for chunk in chunks:
+                sha1.update(chunk)
+                md5.update(chunk)
+                length += len(chunk)
+                buffered.write(chunk)
+            blob_id = sha1.hexdigest()
+            # only a blob whose stored data is the data just hashed is returned
+            sound_blob = {'_id': blob_id, 'length': length, 'md5': md5.hexdigest()}
+
+            blob = self.blob_files.find_and_modify(sound_blob, {'$unset': {'unreferenced_at': True}}, new=True)
+            attempts = 0
+            while blob is None:
+                if attempts == BLOB_SAVE_ATTEMPTS:
+                    raise CorruptGridFile("couldn't store blob {}".format(blob_id))
+                if attempts:
+                    # chunks left without a files document (e.g. by an interrupted upload), or a files
+                    # document made over them, would otherwise be mistaken for this data
+                    self._remove_corrupt_blob(sound_blob)
+                attempts += 1
+                buffered.seek(0)
+                try:
+                    self.blobs.put(buffered, _id=blob_id)
+                except FileExists:
+                    # another process stored the same data first, or stale chunks are in the way
+                    pass
+                blob = self.blob_files.find_and_modify(sound_blob, {'$unset': {'unreferenced_at': True}}, new=True)
+        return blob
+
+    def _remove_corrupt_blob(self, sound_blob):
+        """
+        Delete the files document of the given blob if its length or md5 don't match `sound_blob`'s, and
+        then the blob's chunks unless a sound files document was stored meanwhile.
+        """
+        self.blob_files.remove({
+            '_id': sound_blob['_id'],
+            '$or': [{'length': {'$ne': sound_blob['length']}}, {'md5': {'$ne': sound_blob['md5']}}],
+        })
+        if self.blob_files.find_one({'_id': sound_blob['_id']}, {'_id': True}) is None:
+            self.blob_chunks.remove({'files_id': sound_blob['_id']})
+
+    @staticmethod
+    def _asset_entry(content_id, content_son, blob, **attrs):
+        """
+        Return the entry of an asset whose data is the given blob.
+        """
+        attrs.update({
+            '_id': content_id,
+            'content_son': content_son,
+            'blob_id': blob['_id'],
+            'length': blob['length'],
+            'md5': blob['md5'],
+            'uploadDate': datetime.datetime.utcnow(),
+        })
+        return attrs
+
+    def _release_blobs(self, blob_ids):
+        """
+        Mark those of the given blobs which no asset references any more as unreferenced, and
+        delete the blobs which have been unreferenced for longer than BLOB_GRACE_PERIOD.
+        """
+        now = datetime.datetime.utcnow()
+        for blob_id in set(blob_ids):
+            if self.fs_files.find_one({'blob_id': blob_id}, {'_id': True}) is None:
+                self.blob_files.update(
+                    {'_id': blob_id, 'unreferenced_at': {'$exists': False}}, {'$set': {'unreferenced_at': now}}
+                )
+        self._sweep_unreferenced_blobs(now - BLOB_GRACE_PERIOD)
+
+    def _sweep_unreferenced_blobs(self, cutoff):
+        """
+        Delete the blobs which were marked as unreferenced before `cutoff` and still aren't referenced,
+        and the chunks written before `cutoff` which have no files document (left by interrupted uploads).
+        """
+        for blob in self.blob_files.find({'unreferenced_at': {'$lte': cutoff}}, {'unreferenced_at': True}):
+            # matches only while no save has cleared the mark since the blob was found
+            marked_blob = {'_id': blob['_id'], 'unreferenced_at': blob['unreferenced_at']}
+            if self.fs_files.find_one({'blob_id': blob['_id']}, {'_id': True}) is not None:
+                # an asset referenced the blob again after it was marked
+                self.blob_files.update(marked_blob, {'$unset': {'unreferenced_at': True}})
+            elif self.blob_files.remove(marked_blob)['n']:
+                self.blob_chunks.remove({'files_id': blob['_id']})
+
+        # chunk ids are generated when they're written, so uploads still in progress are left alone
+        old_chunks = {'_id': {'$lt': ObjectId.from_datetime(cutoff)}}
+        for blob_id in self.blob_chunks.find(old_chunks, {'files_id': True}).distinct('files_id'):
+            if self.blob_files.find_one({'_id': blob_id}, {'_id': True}) is None:
+                self.blob_chunks.remove(dict(old_chunks, files_id=blob_id))
+
+    def _delete_assets(self, assets):
+        """
+        Delete the given asset entries and, when they were the last references to their blobs, the blobs.
+        """
+        for asset in assets:
+            # deletes the entry, and its data if the asset was saved as a GridFS file
+            self.fs.delete(self.make_id_son(asset))
+        self._release_blobs(asset['blob_id'] for asset in assets if 'blob_id' in asset)
+
     def delete(self, location_or_id):
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
-        self.fs.delete(location_or_id)
+        asset = self.fs_files.find_one({'_id': location_or_id}, {'blob_id': True})
+        if asset is not None:
+            self._delete_assets([asset])
 
     def find(self, location, throw_on_not_found=True, as_stream=False):
         content_id, __ = self.asset_db_key(location)
 
         try:
-            if as_stream:
+            asset = self.fs_files.find_one({'_id': content_id})
+            if asset is None:
+                raise NoFile(content_id)
+            if 'blob_id' in asset:
+                fp = self.blobs.get(asset['blob_id'])
+            else:
                 fp = self.fs.get(content_id)
-                thumbnail_location = getattr(fp, 'thumbnail_location', None)
-                if thumbnail_location:
-                    thumbnail_location = location.course_key.make_asset_key(
-                        'thumbnail',
-                        thumbnail_location[4]
-                    )
+
+            thumbnail_location = asset.get('thumbnail_location')
+            if thumbnail_location:
+                thumbnail_location = location.course_key.make_asset_key(
+                    'thumbnail',
+                    thumbnail_location[4]
+                )
+            if as_stream:
                 return StaticContentStream(
-                    location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
+                    location, asset['displayname'], asset['contentType'], fp, last_modified_at=asset['uploadDate'],
                     thumbnail_location=thumbnail_location,
-                    import_path=getattr(fp, 'import_path', None),
-                    length=fp.length, locked=getattr(fp, 'locked', False)
+                    import_path=asset.get('import_path'),
+                    length=asset['length'], locked=asset.get('locked', False)
                 )
             else:
-                with self.fs.get(content_id) as fp:
-                    thumbnail_location = getattr(fp, 'thumbnail_location', None)
-                    if thumbnail_location:
-                        thumbnail_location = location.course_key.make_asset_key(
-                            'thumbnail',
-                            thumbnail_location[4]
-                        )
+                with fp:
                     return StaticContent(
-                        location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
+                        location, asset['displayname'], asset['contentType'], fp.read(),
+                        last_modified_at=asset['uploadDate'],
                         thumbnail_location=thumbnail_location,
-                        import_path=getattr(fp, 'import_path', None),
-                        length=fp.length, locked=getattr(fp, 'locked', False)
+                        import_path=asset.get('import_path'),
+                        length=asset['length'], locked=asset.get('locked', False)
                     )
         except NoFile:
             if throw_on_not_found:
@@ -163,7 +307,7 @@ class MongoContentStore(ContentStore):
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
             for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'blob_id']:
                     policy.setdefault(asset['asset_key'].name, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
@@ -191,10 +335,14 @@ class MongoContentStore(ContentStore):
             ])
             items = self.fs_files.find(query)
             assets_to_delete = assets_to_delete + items.count()
+            blob_ids = []
             for asset in items:
                 self.fs.delete(asset[prefix])
+                if 'blob_id' in asset:
+                    blob_ids.append(asset['blob_id'])
 
             self.fs_files.remove(query)
+            self._release_blobs(blob_ids)
         return assets_to_delete
 
     def _get_all_content_for_course(self, course_key, get_thumbnails=False, start=0, maxresults=-1, sort=None):
@@ -263,7 +411,7 @@ class MongoContentStore(ContentStore):
         :param location:  a c4x asset location
         """
         for attr in attr_dict.iterkeys():
-            if attr in ['_id', 'md5', 'uploadDate', 'length']:
+            if attr in ['_id', 'md5', 'uploadDate', 'length', 'blob_id']:
                 raise AttributeError("{} is a protected attribute.".format(attr))
         asset_db_key, __ = self.asset_db_key(location)
         # catch upsert error and raise NotFoundError if asset doesn't exist
@@ -291,14 +439,18 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        This implementation only copies the assets' entries, which reference the same blobs as the
+        source assets. The data of source assets which were saved as GridFS files is stored as blobs.
         """
         source_query = query_for_course(source_course_key)
-        # it'd be great to figure out how to do all of this on the db server and not pull the bits over
+        copies = []
         for asset in self.fs_files.find(source_query):
             asset_key = self.make_id_son(asset)
-            # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
+            if 'blob_id' in asset:
+                blob = {'_id': asset['blob_id'], 'length': asset['length'], 'md5': asset['md5']}
+            else:
+                # don't convert from string until fs access
+                blob = self._save_blob(self.fs.get(asset_key))
             if isinstance(asset_key, basestring):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
@@ -314,29 +466,39 @@ class MongoContentStore(ContentStore):
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
 
-            self.fs.put(
-                source_content.read(),
-                _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
-                displayname=asset['displayname'], content_son=asset_key,
+            copies.append(self._asset_entry(
+                asset_id, asset_key, blob, filename=asset['filename'], contentType=asset['contentType'],
+                displayname=asset['displayname'],
                 # thumbnail is not technically correct but will be functionally correct as the code
                 # only looks at the name which is not course relative.
                 thumbnail_location=asset['thumbnail_location'],
                 import_path=asset['import_path'],
                 # getattr b/c caching may mean some pickled instances don't have attr
                 locked=asset.get('locked', False)
+            ))
+        if copies:
+            # like save, clear the blobs' unreferenced marks before the copies reference them, and leave
+            # out the copies of assets whose blobs were deleted since (the source assets were deleted)
+            blob_ids = list(set(copy['blob_id'] for copy in copies))
+            self.blob_files.update(
+                {'_id': {'$in': blob_ids}, 'unreferenced_at': {'$exists': True}},
+                {'$unset': {'unreferenced_at': True}},
+                multi=True
             )
+            stored_blob_ids = set(
+                blob['_id'] for blob in self.blob_files.find({'_id': {'$in': blob_ids}}, {'_id': True})
+            )
+            copies = [copy for copy in copies if copy['blob_id'] in stored_blob_ids]
+        if copies:
+            self.fs_files.insert(copies)
 
     def delete_all_course_assets(self, course_key):
         """
-        Delete all assets identified via this course_key. Dangerous operation which may remove assets
-        referenced by other runs or other courses.
+        Delete all assets identified via this course_key, and the blobs which only they referenced.
         :param course_key:
         """
         course_query = query_for_course(course_key)
-        matching_assets = self.fs_files.find(course_query)
-        for asset in matching_assets:
-            asset_key = self.make_id_son(asset)
-            self.fs.delete(asset_key)
+        self._delete_assets(list(self.fs_files.find(course_query, {'_id': True, 'blob_id': True})))
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -404,6 +566,10 @@ class MongoContentStore(ContentStore):
             [('content_son.org', pymongo.ASCENDING), ('content_son.course', pymongo.ASCENDING), ('display_name', pymongo.ASCENDING)],
             sparse=True
         )
+        # needed to find whether any asset still references a blob
+        self.fs_files.create_index('blob_id', sparse=True)
+        # needed to find the unreferenced blobs to delete
+        self.blob_files.create_index('unreferenced_at', sparse=True)
 
 
 def query_for_course(course_key, category=None):
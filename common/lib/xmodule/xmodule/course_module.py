@@ -645,7 +645,198 @@ class CourseFields(object):
     )
 
 
-class CourseDescriptor(CourseFields, SequenceDescriptor):
+class CourseSummaryMixin(object):
+    """
+    The dates and display names of a course which the catalog and dashboard show, computed from
+    its settings. This is shared by CourseDescriptor and the overviews of courses stored for the
+    catalog and dashboard, which have the same attributes without being XBlocks.
+    """
+    def summary_i18n_service(self):
+        """
+        Return the i18n service used to format the course's dates.
+        """
+        return self.runtime.service(self, "i18n")
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the specified course end date.
+        Returns False if there is no end date specified.
+        """
+        if self.end is None:
+            return False
+
+        return datetime.now(UTC()) > self.end
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        show_early = self.certificates_display_behavior in ('early_with_info', 'early_no_info') or self.certificates_show_before_end
+        return show_early or self.has_ended()
+
+    def has_started(self):
+        return datetime.now(UTC()) > self.start
+
+    @property
+    def is_newish(self):
+        """
+        Returns if the course has been flagged as new. If
+        there is no flag, return a heuristic value considering the
+        announcement and the start dates.
+        """
+        flag = self.is_new
+        if flag is None:
+            # Use a heuristic if the course has not been flagged
+            announcement, start, now = self._sorting_dates()
+            if announcement and (now - announcement).days < 30:
+                # The course has been announced for less that month
+                return True
+            elif (now - start).days < 1:
+                # The course has not started yet
+                return True
+            else:
+                return False
+        elif isinstance(flag, basestring):
+            return flag.lower() in ['true', 'yes', 'y']
+        else:
+            return bool(flag)
+
+    @property
+    def sorting_score(self):
+        """
+        Returns a tuple that can be used to sort the courses according
+        the how "new" they are. The "newness" score is computed using a
+        heuristic that takes into account the announcement and
+        (advertized) start dates of the course if available.
+
+        The lower the number the "newer" the course.
+        """
+        # Make courses that have an announcement date shave a lower
+        # score than courses than don't, older courses should have a
+        # higher score.
+        announcement, start, now = self._sorting_dates()
+        scale = 300.0  # about a year
+        if announcement:
+            days = (now - announcement).days
+            score = -exp(-days / scale)
+        else:
+            days = (now - start).days
+            score = exp(days / scale)
+        return score
+
+    def _sorting_dates(self):
+        # utility function to get datetime objects for dates used to
+        # compute the is_new flag and the sorting_score
+
+        announcement = self.announcement
+        if announcement is not None:
+            announcement = announcement
+
+        try:
+            start = dateutil.parser.parse(self.advertised_start)
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=UTC())
+        except (ValueError, AttributeError):
+            start = self.start
+
+        now = datetime.now(UTC())
+
+        return announcement, start, now
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the desired text corresponding the course's start date and time in UTC.  Prefers .advertised_start,
+        then falls back to .start
+        """
+        i18n = self.summary_i18n_service()
+        _ = i18n.ugettext
+        strftime = i18n.strftime
+
+        def try_parse_iso_8601(text):
+            try:
+                result = Date().from_json(text)
+                if result is None:
+                    result = text.title()
+                else:
+                    result = strftime(result, format_string)
+                    if format_string == "DATE_TIME":
+                        result = self._add_timezone_string(result)
+            except ValueError:
+                result = text.title()
+
+            return result
+
+        if isinstance(self.advertised_start, basestring):
+            return try_parse_iso_8601(self.advertised_start)
+        elif self.start_date_is_still_default:
+            # Translators: TBD stands for 'To Be Determined' and is used when a course
+            # does not yet have an announced start date.
+            return _('TBD')
+        else:
+            when = self.advertised_start or self.start
+
+            if format_string == "DATE_TIME":
+                return self._add_timezone_string(strftime(when, format_string))
+
+            return strftime(when, format_string)
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, i.e. .start has not been modified,
+        and .advertised_start has not been set.
+        """
+        return self.advertised_start is None and self.start == CourseFields.start.default
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the end date or date_time for the course formatted as a string.
+
+        If the course does not have an end date set (course.end is None), an empty string will be returned.
+        """
+        if self.end is None:
+            return ''
+        else:
+            strftime = self.summary_i18n_service().strftime
+            date_time = strftime(self.end, format_string)
+            return date_time if format_string == "SHORT_DATE" else self._add_timezone_string(date_time)
+
+    def _add_timezone_string(self, date_time):
+        """
+        Adds 'UTC' string to the end of start/end date and time texts.
+        """
+        return date_time + u" UTC"
+
+    @property
+    def number(self):
+        return self.location.course
+
+    @property
+    def display_number_with_default(self):
+        """
+        Return a display course number if it has been specified, otherwise return the 'course' that is in the location
+        """
+        if self.display_coursenumber:
+            return self.display_coursenumber
+
+        return self.number
+
+    @property
+    def org(self):
+        return self.location.org
+
+    @property
+    def display_org_with_default(self):
+        """
+        Return a display organization if it has been specified, otherwise return the 'org' that is in the location
+        """
+        if self.display_organization:
+            return self.display_organization
+
+        return self.org
+
+
+class CourseDescriptor(CourseSummaryMixin, CourseFields, SequenceDescriptor):
     module_class = SequenceModule
 
     def __init__(self, *args, **kwargs):
@@ -800,26 +991,6 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
 
         return xml_object
 
-    def has_ended(self):
-        """
-        Returns True if the current time is after the specified course end date.
-        Returns False if there is no end date specified.
-        """
-        if self.end is None:
-            return False
-
-        return datetime.now(UTC()) > self.end
-
-    def may_certify(self):
-        """
-        Return True if it is acceptable to show the student a certificate download link
-        """
-        show_early = self.certificates_display_behavior in ('early_with_info', 'early_no_info') or self.certificates_show_before_end
-        return show_early or self.has_ended()
-
-    def has_started(self):
-        return datetime.now(UTC()) > self.start
-
     @property
     def grader(self):
         return grader_from_conf(self.raw_grader)
@@ -909,72 +1080,6 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
 
         return set(config.get("cohorted_discussions", []))
 
-    @property
-    def is_newish(self):
-        """
-        Returns if the course has been flagged as new. If
-        there is no flag, return a heuristic value considering the
-        announcement and the start dates.
-        """
-        flag = self.is_new
-        if flag is None:
-            # Use a heuristic if the course has not been flagged
-            announcement, start, now = self._sorting_dates()
-            if announcement and (now - announcement).days < 30:
-                # The course has been announced for less that month
-                return True
-            elif (now - start).days < 1:
-                # The course has not started yet
-                return True
-            else:
-                return False
-        elif isinstance(flag, basestring):
-            return flag.lower() in ['true', 'yes', 'y']
-        else:
-            return bool(flag)
-
-    @property
-    def sorting_score(self):
-        """
-        Returns a tuple that can be used to sort the courses according
-        the how "new" they are. The "newness" score is computed using a
-        heuristic that takes into account the announcement and
-        (advertized) start dates of the course if available.
-
-        The lower the number the "newer" the course.
-        """
-        # Make courses that have an announcement date shave a lower
-        # score than courses than don't, older courses should have a
-        # higher score.
-        announcement, start, now = self._sorting_dates()
-        scale = 300.0  # about a year
-        if announcement:
-            days = (now - announcement).days
-            score = -exp(-days / scale)
-        else:
-            days = (now - start).days
-            score = exp(days / scale)
-        return score
-
-    def _sorting_dates(self):
-        # utility function to get datetime objects for dates used to
-        # compute the is_new flag and the sorting_score
-
-        announcement = self.announcement
-        if announcement is not None:
-            announcement = announcement
-
-        try:
-            start = dateutil.parser.parse(self.advertised_start)
-            if start.tzinfo is None:
-                start = start.replace(tzinfo=UTC())
-        except (ValueError, AttributeError):
-            start = self.start
-
-        now = datetime.now(UTC())
-
-        return announcement, start, now
-
     @lazy
     def grading_context(self):
         """
@@ -1040,70 +1145,6 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
         """Return the course_id for this course"""
         return self.location.course_key
 
-    def start_datetime_text(self, format_string="SHORT_DATE"):
-        """
-        Returns the desired text corresponding the course's start date and time in UTC.  Prefers .advertised_start,
-        then falls back to .start
-        """
-        i18n = self.runtime.service(self, "i18n")
-        _ = i18n.ugettext
-        strftime = i18n.strftime
-
-        def try_parse_iso_8601(text):
-            try:
-                result = Date().from_json(text)
-                if result is None:
-                    result = text.title()
-                else:
-                    result = strftime(result, format_string)
-                    if format_string == "DATE_TIME":
-                        result = self._add_timezone_string(result)
-            except ValueError:
-                result = text.title()
-
-            return result
-
-        if isinstance(self.advertised_start, basestring):
-            return try_parse_iso_8601(self.advertised_start)
-        elif self.start_date_is_still_default:
-            # Translators: TBD stands for 'To Be Determined' and is used when a course
-            # does not yet have an announced start date.
-            return _('TBD')
-        else:
-            when = self.advertised_start or self.start
-
-            if format_string == "DATE_TIME":
-                return self._add_timezone_string(strftime(when, format_string))
-
-            return strftime(when, format_string)
-
-    @property
-    def start_date_is_still_default(self):
-        """
-        Checks if the start date set for the course is still default, i.e. .start has not been modified,
-        and .advertised_start has not been set.
-        """
-        return self.advertised_start is None and self.start == CourseFields.start.default
-
-    def end_datetime_text(self, format_string="SHORT_DATE"):
-        """
-        Returns the end date or date_time for the course formatted as a string.
-
-        If the course does not have an end date set (course.end is None), an empty string will be returned.
-        """
-        if self.end is None:
-            return ''
-        else:
-            strftime = self.runtime.service(self, "i18n").strftime
-            date_time = strftime(self.end, format_string)
-            return date_time if format_string == "SHORT_DATE" else self._add_timezone_string(date_time)
-
-    def _add_timezone_string(self, date_time):
-        """
-        Adds 'UTC' string to the end of start/end date and time texts.
-        """
-        return date_time + u" UTC"
-
     @property
     def forum_posts_allowed(self):
         date_proxy = Date()
@@ -1120,31 +1161,3 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
             log.exception("Error parsing discussion_blackouts for course {0}".format(self.id))
 
         return True
-
-    @property
-    def number(self):
-        return self.location.course
-
-    @property
-    def display_number_with_default(self):
-        """
-        Return a display course number if it has been specified, otherwise return the 'course' that is in the location
-        """
-        if self.display_coursenumber:
-            return self.display_coursenumber
-
-        return self.number
-
-    @property
-    def org(self):
-        return self.location.org
-
-    @property
-    def display_org_with_default(self):
-        """
-        Return a display organization if it has been specified, otherwise return the 'org' that is in the location
-        """
-        if self.display_organization:
-            return self.display_organization
-
-        return self.org
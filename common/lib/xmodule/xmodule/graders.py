@@ -40,6 +40,17 @@ def aggregate_scores(scores, section_name="summary"):
     return all_total, graded_total
 
 
+def weighted_score(raw_correct, raw_total, weight):
+    """
+    Return the (correct, total) score tuple after applying a problem's weight to its raw score.
+
+    If there's no weight, or the problem has no points to scale, the raw score is returned unchanged.
+    """
+    if weight is None or raw_total == 0:
+        return (raw_correct, raw_total)
+    return (float(raw_correct) * weight / raw_total, float(weight))
+
+
 def invalid_args(func, argdict):
     """
     Given a function and a dictionary of arguments, returns a set of arguments
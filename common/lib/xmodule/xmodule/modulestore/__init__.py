@@ -882,6 +882,15 @@ class ModuleStoreReadBase(BulkOperationsMixin, ModuleStoreRead):
                 return course
         return None
 
+    def get_course_keys(self, **kwargs):
+        """
+        Returns a list of the keys of the courses in this modulestore.
+
+        Default impl--the ids of the courses from get_courses. Modulestores which can list
+        their courses without loading them should override this.
+        """
+        return [course.id for course in self.get_courses(**kwargs)]
+
     def has_course(self, course_id, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
@@ -11,6 +11,7 @@ from django.conf import settings
 if not settings.configured:
     settings.configure()
 from django.core.cache import get_cache, InvalidCacheBackendError
+from django.dispatch import Signal
 import django.utils
 
 import re
@@ -19,6 +20,8 @@ import threading
 from xmodule.util.django import get_current_request_hostname
 import xmodule.modulestore  # pylint: disable=unused-import
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.mongo_connection import StructureValidation
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.contentstore.django import contentstore
 import xblock.reference.plugins
@@ -32,6 +35,10 @@ except ImportError:
 
 ASSET_IGNORE_REGEX = getattr(settings, "ASSET_IGNORE_REGEX", r"(^\._.*$)|(^\.DS_Store$)|(^.*~$)")
 
+# Sent (with the course_key) after a course is published or otherwise edited through the Mixed modulestore.
+# Edits to blocks which are always published (such as the course itself) are published immediately.
+course_published = Signal(providing_args=["course_key"])
+
 
 def load_function(path):
     """
@@ -70,10 +77,21 @@ def create_modulestore_instance(engine, content_store, doc_store_config, options
 
     if issubclass(class_, MixedModuleStore):
         _options['create_modulestore_instance'] = create_modulestore_instance
+        _options['signal_handler'] = course_published
 
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        _options.setdefault(
+            'structure_validation', getattr(settings, 'SPLIT_STRUCTURE_VALIDATION', StructureValidation.FULL)
+        )
+        try:
+            _options['structure_cache_subsystem'] = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            # the shared tier is optional; structures are still cached in-process
+            pass
+
     return class_(
         contentstore=content_store,
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
@@ -209,6 +209,113 @@ def inherit_metadata(descriptor, inherited_data):
         pass
 
 
+class InheritedMetadataTree(object):
+    """
+    The metadata each block of a course inherits from its ancestors, stored as each container's
+    own inheritable metadata plus a pointer from each block to its parent, rather than as a copy
+    of the inherited metadata for every block. A block's inherited metadata is resolved by
+    walking up its ancestors the first time it's asked for, and then cached; blocks which don't
+    override anything share their parent's resolved dict.
+
+    Blocks are identified by strings (the mongo modulestore uses the unicode of their published
+    locations). Like the dict it replaces, the tree is read with `get`.
+    """
+    def __init__(self):
+        self._parents = {}
+        self._own_metadata = {}
+        self._resolved = {}
+
+    @classmethod
+    def compute(cls, root, containers):
+        """
+        Return the tree of the course whose root block is `root`. `containers` maps each
+        block which has children to a tuple of the list of its children and its own
+        inheritable metadata. Blocks without children needn't be in `containers`.
+
+        The tree is walked iteratively, so deep courses don't hit the recursion limit.
+        """
+        tree = cls()
+        if root not in containers:
+            return tree
+
+        to_process = [root]
+        processed = set()
+        while to_process:
+            block = to_process.pop()
+            if block in processed:
+                continue
+            processed.add(block)
+
+            children, metadata = containers[block]
+            if metadata:
+                tree._own_metadata[block] = metadata
+            for child in children:
+                if child != root:
+                    tree._parents[child] = block
+            # process the children in order (the stack pops the last one first)
+            to_process.extend(reversed([child for child in children if child in containers]))
+        return tree
+
+    def get(self, block, default=None):
+        """
+        Return the metadata that block inherits, or default if it isn't a descendant of the root
+        """
+        if block not in self._parents:
+            return default
+        resolved = self._resolved.get(block)
+        if resolved is None:
+            resolved = self._resolve(block)
+        return resolved
+
+    def _resolve(self, block):
+        """
+        Resolve and cache the inherited metadata of block and of its unresolved ancestors
+        """
+        chain = []
+        seen = set()
+        ancestor = block
+        while ancestor in self._parents and ancestor not in self._resolved and ancestor not in seen:
+            chain.append(ancestor)
+            seen.add(ancestor)
+            ancestor = self._parents[ancestor]
+
+        if ancestor in self._resolved:
+            inherited = self._resolved[ancestor]
+        else:
+            # the root, which inherits nothing
+            inherited = self._own_metadata.get(ancestor, {})
+
+        for ancestor in reversed(chain):
+            own_metadata = self._own_metadata.get(ancestor)
+            if own_metadata:
+                inherited = dict(inherited)
+                inherited.update(own_metadata)
+            self._resolved[ancestor] = inherited
+        return self._resolved[block]
+
+    def __len__(self):
+        return len(self._parents)
+
+    def __getstate__(self):
+        """
+        Pickle the tree compactly: each block once, the index of each block's parent, and the
+        containers' own metadata. The resolved metadata isn't pickled.
+        """
+        blocks = list(set(self._parents).union(self._parents.itervalues()).union(self._own_metadata))
+        indexes = {block: index for index, block in enumerate(blocks)}
+        parents = [indexes.get(self._parents.get(block)) for block in blocks]
+        own_metadata = {indexes[block]: metadata for block, metadata in self._own_metadata.iteritems()}
+        return blocks, parents, own_metadata
+
+    def __setstate__(self, state):
+        blocks, parents, own_metadata = state
+        self._parents = {
+            block: blocks[parent] for block, parent in zip(blocks, parents) if parent is not None
+        }
+        self._own_metadata = {blocks[index]: metadata for index, metadata in own_metadata.iteritems()}
+        self._resolved = {}
+
+
 def own_metadata(module):
     """
     Return a dictionary that contains only non-inherited field keys,
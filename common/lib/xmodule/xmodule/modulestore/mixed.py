@@ -30,6 +30,31 @@ new_contract('LibraryLocator', LibraryLocator)
 
 log = logging.getLogger(__name__)
 
+# The methods which modify a course's content, and so make anything cached from
+# the course for the current request stale
+COURSE_EDIT_METHODS = frozenset([
+    'create_item', 'create_child', 'import_xblock', 'update_item', 'delete_item',
+    'revert_to_published', 'publish', 'unpublish', 'convert_to_draft',
+])
+
+
+def signals_course_edits(func):
+    """
+    A decorator for the methods which edit courses. Once the method returns, the store's signal_handler
+    is sent the course_published signal for each course it edited, unless the course is in a bulk
+    operation, in which case the signal is sent when the outermost bulk operation ends.
+    """
+    @functools.wraps(func)
+    def inner(self, *args, **kwargs):
+        """
+        Call the method, then signal the edits to courses which aren't in a bulk operation.
+        """
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._send_course_published()  # pylint: disable=protected-access
+    return inner
+
 
 def strip_key(func):
     """
@@ -98,13 +123,21 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
     """
     ModuleStore knows how to route requests to the right persistence ms
     """
-    def __init__(self, contentstore, mappings, stores, i18n_service=None, fs_service=None, create_modulestore_instance=None, **kwargs):
+    def __init__(
+        self, contentstore, mappings, stores, i18n_service=None, fs_service=None, create_modulestore_instance=None,
+        signal_handler=None, **kwargs
+    ):
         """
         Initialize a MixedModuleStore. Here we look into our passed in kwargs which should be a
         collection of other modulestore configuration information
+
+        signal_handler, if given, is a django Signal which is sent (with the course_key) after
+        each course is edited through this store.
         """
         super(MixedModuleStore, self).__init__(contentstore, **kwargs)
 
+        self.signal_handler = signal_handler
+
         if create_modulestore_instance is None:
             raise ValueError('MixedModuleStore constructor must be passed a create_modulestore_instance function')
 
@@ -261,6 +294,19 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
                     courses[course_id] = course
         return courses.values()
 
+    @strip_key
+    def get_course_keys(self, **kwargs):
+        '''
+        Returns a list of the keys of the courses in this modulestore, without loading the courses where
+        the underlying modulestores allow it.
+        '''
+        course_keys = set()
+        for store in self.modulestores:
+            course_keys.update(
+                self._clean_course_id_for_mapping(course_key) for course_key in store.get_course_keys(**kwargs)
+            )
+        return list(course_keys)
+
     @strip_key
     def get_libraries(self, **kwargs):
         """
@@ -343,12 +389,14 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._get_modulestore_for_courseid(course_id)
         return store.has_course(course_id, ignore_case, **kwargs)
 
+    @signals_course_edits
     def delete_course(self, course_key, user_id):
         """
         See xmodule.modulestore.__init__.ModuleStoreWrite.delete_course
         """
         assert(isinstance(course_key, CourseKey))
         store = self._get_modulestore_for_courseid(course_key)
+        self._course_edited(course_key)
         return store.delete_course(course_key, user_id)
 
     @contract(asset_metadata='AssetMetadata')
@@ -516,6 +564,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return errs
 
     @strip_key
+    @signals_course_edits
     def create_course(self, org, course, run, user_id, **kwargs):
         """
         Creates and returns the course.
@@ -538,6 +587,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # create the course
         store = self._verify_modulestore_support(None, 'create_course')
         course = store.create_course(org, course, run, user_id, **kwargs)
+        self._course_edited(course.id)
 
         # add new course to the mapping
         self.mappings[course_key] = store
@@ -573,6 +623,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return library
 
     @strip_key
+    @signals_course_edits
     def clone_course(self, source_course_id, dest_course_id, user_id, fields=None, **kwargs):
         """
         See the superclass for the general documentation.
@@ -587,6 +638,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         # for a temporary period of time, we may want to hardcode dest_modulestore as split if there's a split
         # to have only course re-runs go to split. This code, however, uses the config'd priority
         dest_modulestore = self._get_modulestore_for_courseid(dest_course_id)
+        self._course_edited(dest_course_id)
         if source_modulestore == dest_modulestore:
             return source_modulestore.clone_course(source_course_id, dest_course_id, user_id, fields, **kwargs)
 
@@ -603,6 +655,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
             ))
 
     @strip_key
+    @signals_course_edits
     def create_item(self, user_id, course_key, block_type, block_id=None, fields=None, **kwargs):
         """
         Creates and saves a new item in a course.
@@ -623,6 +676,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return modulestore.create_item(user_id, course_key, block_type, block_id=block_id, fields=fields, **kwargs)
 
     @strip_key
+    @signals_course_edits
     def create_child(self, user_id, parent_usage_key, block_type, block_id=None, fields=None, **kwargs):
         """
         Creates and saves a new xblock that is a child of the specified block
@@ -643,6 +697,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return modulestore.create_child(user_id, parent_usage_key, block_type, block_id=block_id, fields=fields, **kwargs)
 
     @strip_key
+    @signals_course_edits
     def import_xblock(self, user_id, course_key, block_type, block_id, fields=None, runtime=None, **kwargs):
         """
         See :py:meth `ModuleStoreDraftAndPublished.import_xblock`
@@ -653,6 +708,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return store.import_xblock(user_id, course_key, block_type, block_id, fields, runtime)
 
     @strip_key
+    @signals_course_edits
     def update_item(self, xblock, user_id, allow_not_found=False, **kwargs):
         """
         Update the xblock persisted to be the same as the given for all types of fields
@@ -662,6 +718,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return store.update_item(xblock, user_id, allow_not_found, **kwargs)
 
     @strip_key
+    @signals_course_edits
     def delete_item(self, location, user_id, **kwargs):
         """
         Delete the given item from persistence. kwargs allow modulestore specific parameters.
@@ -669,6 +726,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._verify_modulestore_support(location.course_key, 'delete_item')
         return store.delete_item(location, user_id=user_id, **kwargs)
 
+    @signals_course_edits
     def revert_to_published(self, location, user_id):
         """
         Reverts an item to its last published version (recursively traversing all of its descendants).
@@ -755,6 +813,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return store.has_published_version(xblock)
 
     @strip_key
+    @signals_course_edits
     def publish(self, location, user_id, **kwargs):
         """
         Save a current draft to the underlying modulestore
@@ -764,6 +823,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         return store.publish(location, user_id, **kwargs)
 
     @strip_key
+    @signals_course_edits
     def unpublish(self, location, user_id, **kwargs):
         """
         Save a current draft to the underlying modulestore
@@ -772,6 +832,7 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._verify_modulestore_support(location.course_key, 'unpublish')
         return store.unpublish(location, user_id, **kwargs)
 
+    @signals_course_edits
     def convert_to_draft(self, location, user_id):
         """
         Create a copy of the source and mark its revision as draft.
@@ -800,10 +861,66 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         """
         store = self._get_modulestore_for_courseid(course_key)
         if hasattr(store, method):
+            if method in COURSE_EDIT_METHODS:
+                self._course_edited(course_key)
             return store
         else:
             raise NotImplementedError(u"Cannot call {} on store {}".format(method, store))
 
+    @staticmethod
+    def _course_edits_key(course_key):
+        """
+        Return the version and branch agnostic key under which edits to the course are counted.
+        """
+        if hasattr(course_key, 'version_agnostic'):
+            course_key = course_key.version_agnostic()
+        if hasattr(course_key, 'for_branch'):
+            course_key = course_key.for_branch(None)
+        return course_key
+
+    def _course_edited(self, course_key):
+        """
+        Count an edit to the course in the request cache (see :meth:`get_course_edit_count`), and
+        note that the course_published signal needs to be sent for it.
+        """
+        key = self._course_edits_key(course_key)
+        if self.request_cache is not None:
+            edits = self.request_cache.data.setdefault('course_edits', {})
+            edits[key] = edits.get(key, 0) + 1
+        if self.signal_handler is not None:
+            self._thread_local_set('unsignaled_course_edits').add(key)
+
+    def _thread_local_set(self, name):
+        """
+        Return the set of course keys which this thread has stored in its thread cache under `name`.
+        """
+        value = getattr(self.thread_cache, name, None)
+        if value is None:
+            value = set()
+            setattr(self.thread_cache, name, value)
+        return value
+
+    def _send_course_published(self):
+        """
+        Send the course_published signal for each course edited by this thread which isn't in a bulk operation.
+        """
+        unsignaled = self._thread_local_set('unsignaled_course_edits')
+        in_bulk_operations = self._thread_local_set('courses_in_bulk_operations')
+        for course_key in list(unsignaled - in_bulk_operations):
+            unsignaled.discard(course_key)
+            self.signal_handler.send(sender=self.__class__, course_key=course_key)
+
+    def get_course_edit_count(self, course_key):
+        """
+        Return the number of times the course has been edited through this modulestore during
+        the current request (or 0 if there's no request cache).
+
+        Anything cached from the course for the request should be discarded once this changes.
+        """
+        if self.request_cache is None:
+            return 0
+        return self.request_cache.data.get('course_edits', {}).get(self._course_edits_key(course_key), 0)
+
     @property
     def default_modulestore(self):
         """
@@ -851,8 +968,18 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         If course_id is None, the default store is used.
         """
         store = self._get_modulestore_for_courseid(course_id)
-        with store.bulk_operations(course_id):
-            yield
+        in_bulk_operations = self._thread_local_set('courses_in_bulk_operations')
+        key = self._course_edits_key(course_id)
+        outermost = key not in in_bulk_operations
+        in_bulk_operations.add(key)
+        try:
+            with store.bulk_operations(course_id):
+                yield
+        finally:
+            if outermost:
+                in_bulk_operations.discard(key)
+                if self.signal_handler is not None:
+                    self._send_course_published()
 
     def ensure_indexes(self):
         """
@@ -15,7 +15,6 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
 import re
 from uuid import uuid4
 
@@ -49,7 +48,9 @@ from xmodule.modulestore import ModuleStoreWriteBase, ModuleStoreEnum, BulkOpera
 from xmodule.modulestore.draft_and_published import ModuleStoreDraftAndPublished, DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError
-from xmodule.modulestore.inheritance import InheritanceMixin, inherit_metadata, InheritanceKeyValueStore
+from xmodule.modulestore.inheritance import (
+    InheritanceMixin, inherit_metadata, InheritanceKeyValueStore, InheritedMetadataTree
+)
 
 log = logging.getLogger(__name__)
 
@@ -503,6 +504,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         self.fs_service = fs_service
 
         self._course_run_cache = {}
+        # the resources filesystem of each data dir, which is the same for every item in the dir
+        self._resources_fs_cache = {}
 
     def close_connections(self):
         """
@@ -613,32 +616,11 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
-
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+        containers = {
+            url: (result.get('definition', {}).get('children', []), result.get('metadata', {}))
+            for url, result in results_by_url.iteritems()
+        }
+        return InheritedMetadataTree.compute(root, containers)
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
@@ -751,23 +733,23 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return data
 
-    def _load_item(self, course_key, item, data_cache, apply_cached_metadata=True):
+    def _get_resources_fs(self, data_dir):
         """
-        Load an XModuleDescriptor from item, using the children stored in data_cache
+        Return the resources filesystem for the items in data_dir, creating the directory
+        if it doesn't exist. The filesystem is only created once per data dir, rather
+        than for every item loaded.
         """
-        course_key = self.fill_in_run(course_key)
-        location = Location._from_deprecated_son(item['location'], course_key.run)
-        data_dir = getattr(item, 'data_dir', location.course)
-        root = self.fs_root / data_dir
-
-        root.makedirs_p()  # create directory if it doesn't exist
-
-        resource_fs = OSFS(root)
-
-        cached_metadata = {}
-        if apply_cached_metadata:
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_key)
+        resources_fs = self._resources_fs_cache.get(data_dir)
+        if resources_fs is None:
+            root = self.fs_root / data_dir
+            root.makedirs_p()  # create directory if it doesn't exist
+            resources_fs = self._resources_fs_cache[data_dir] = OSFS(root)
+        return resources_fs
 
+    def _get_services(self):
+        """
+        Return the services for the runtimes of this modulestore's xblocks
+        """
         services = {}
         if self.i18n_service:
             services["i18n"] = self.i18n_service
@@ -775,36 +757,69 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         if self.fs_service:
             services["fs"] = self.fs_service
 
-        system = CachingDescriptorSystem(
+        return services
+
+    def _create_descriptor_system(self, course_key, data_cache, resources_fs, apply_cached_metadata=True):
+        """
+        Create a CachingDescriptorSystem for loading the items of the course from data_cache
+        """
+        cached_metadata = {}
+        if apply_cached_metadata:
+            cached_metadata = self._get_cached_metadata_inheritance_tree(course_key)
+
+        return CachingDescriptorSystem(
             modulestore=self,
             course_key=course_key,
             module_data=data_cache,
             default_class=self.default_class,
-            resources_fs=resource_fs,
+            resources_fs=resources_fs,
             error_tracker=self.error_tracker,
             render_template=self.render_template,
             cached_metadata=cached_metadata,
             mixins=self.xblock_mixins,
             select=self.xblock_select,
-            services=services,
+            services=self._get_services(),
         )
-        return system.load_item(location)
+
+    def _load_item(self, course_key, item, data_cache, apply_cached_metadata=True, using_descriptor_system=None):
+        """
+        Load an XModuleDescriptor from item, using the children stored in data_cache
+
+        If using_descriptor_system is given, the item is loaded by that runtime (whose
+        module_data should be data_cache) rather than by a new one.
+        """
+        course_key = self.fill_in_run(course_key)
+        location = Location._from_deprecated_son(item['location'], course_key.run)
+
+        if using_descriptor_system is None:
+            data_dir = getattr(item, 'data_dir', location.course)
+            using_descriptor_system = self._create_descriptor_system(
+                course_key, data_cache, self._get_resources_fs(data_dir), apply_cached_metadata
+            )
+        return using_descriptor_system.load_item(location)
 
     def _load_items(self, course_key, items, depth=0):
         """
         Load a list of xmodules from the data in items, with children cached up
         to specified depth
+
+        All the items and their descendants are loaded by one runtime.
         """
         course_key = self.fill_in_run(course_key)
         data_cache = self._cache_children(course_key, items, depth)
+        if not items:
+            return []
 
         # if we are loading a course object, if we're not prefetching children (depth != 0) then don't
         # bother with the metadata inheritance
+        apply_cached_metadata = depth != 0 or any(item['location']['category'] != 'course' for item in items)
+        # the items' data dir is the course's, so they can share the runtime's resources filesystem
+        data_dir = getattr(items[0], 'data_dir', course_key.course)
+        system = self._create_descriptor_system(
+            course_key, data_cache, self._get_resources_fs(data_dir), apply_cached_metadata
+        )
         return [
-            self._load_item(
-                course_key, item, data_cache,
-                apply_cached_metadata=(item['location']['category'] != 'course' or depth != 0)
-            )
+            self._load_item(course_key, item, data_cache, using_descriptor_system=system)
             for item in items
         ]
 
@@ -832,6 +847,21 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         return [course for course in base_list if not isinstance(course, ErrorDescriptor)]
 
+    @autoretry_read()
+    def get_course_keys(self, **kwargs):
+        '''
+        Returns a list of the keys of the courses in this modulestore, without loading the courses.
+        '''
+        return [
+            SlashSeparatedCourseKey(course['_id']['org'], course['_id']['course'], course['_id']['name'])
+            for course
+            in self.collection.find({'_id.category': 'course'}, fields=['_id'])
+            if not (  # TODO kill this
+                course['_id']['org'] == 'edx' and
+                course['_id']['course'] == 'templates'
+            )
+        ]
+
     def _find_one(self, location):
         '''Look for a given location in the collection. If the item is not present, raise
         ItemNotFoundError.
@@ -1068,13 +1098,6 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 block_id = u'{}_{}'.format(block_type, uuid4().hex[:5])
 
         if runtime is None:
-            services = {}
-            if self.i18n_service:
-                services["i18n"] = self.i18n_service
-
-            if self.fs_service:
-                services["fs"] = self.fs_service
-
             runtime = CachingDescriptorSystem(
                 modulestore=self,
                 module_data={},
@@ -1086,7 +1109,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 cached_metadata={},
                 mixins=self.xblock_mixins,
                 select=self.xblock_select,
-                services=services,
+                services=self._get_services(),
             )
         xblock_class = runtime.load_block_type(block_type)
         location = course_key.make_usage_key(block_type, block_id)
@@ -66,6 +66,10 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # the (subtree_edited_on, subtree_edited_by) of the blocks, by BlockKey. These aren't stored
+        # in the blocks' edit_info because the blocks belong to structures shared with other requests
+        # (and saved as part of new versions of the structure).
+        self._subtree_edited_info = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -257,12 +261,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         See :class: cms.lib.xblock.runtime.EditInfoRuntimeMixin
         """
         if not hasattr(xblock, '_subtree_edited_by'):
-            json_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if '_subtree_edited_by' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(
-                    xblock.location.block_id, json_data, xblock.location.course_key
-                )
-            setattr(xblock, '_subtree_edited_by', json_data['edit_info']['_subtree_edited_by'])
+            block_key = BlockKey.from_usage_key(xblock.location)
+            __, subtree_edited_by = self._compute_subtree_edited_internal(block_key, xblock.location.course_key)
+            setattr(xblock, '_subtree_edited_by', subtree_edited_by)
 
         return getattr(xblock, '_subtree_edited_by')
 
@@ -271,12 +272,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         See :class: cms.lib.xblock.runtime.EditInfoRuntimeMixin
         """
         if not hasattr(xblock, '_subtree_edited_on'):
-            json_data = self.module_data[BlockKey.from_usage_key(xblock.location)]
-            if '_subtree_edited_on' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(
-                    xblock.location.block_id, json_data, xblock.location.course_key
-                )
-            setattr(xblock, '_subtree_edited_on', json_data['edit_info']['_subtree_edited_on'])
+            block_key = BlockKey.from_usage_key(xblock.location)
+            subtree_edited_on, __ = self._compute_subtree_edited_internal(block_key, xblock.location.course_key)
+            setattr(xblock, '_subtree_edited_on', subtree_edited_on)
 
         return getattr(xblock, '_subtree_edited_on')
 
@@ -298,20 +296,23 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
 
         return getattr(xblock, '_published_on', None)
 
-    def _compute_subtree_edited_internal(self, block_id, json_data, course_key):
+    def _compute_subtree_edited_internal(self, block_key, course_key):
         """
         Recurse the subtree finding the max edited_on date and its concomitant edited_by. Cache it
+        on this runtime and return (subtree_edited_on, subtree_edited_by).
         """
+        if block_key in self._subtree_edited_info:
+            return self._subtree_edited_info[block_key]
+
+        json_data = self.get_module_data(block_key, course_key)
         max_date = json_data['edit_info']['edited_on']
         max_by = json_data['edit_info']['edited_by']
 
         for child in json_data.get('fields', {}).get('children', []):
-            child_data = self.get_module_data(BlockKey(*child), course_key)
-            if '_subtree_edited_on' not in json_data.setdefault('edit_info', {}):
-                self._compute_subtree_edited_internal(child, child_data, course_key)
-            if child_data['edit_info']['_subtree_edited_on'] > max_date:
-                max_date = child_data['edit_info']['_subtree_edited_on']
-                max_by = child_data['edit_info']['_subtree_edited_by']
-
-        json_data['edit_info']['_subtree_edited_on'] = max_date
-        json_data['edit_info']['_subtree_edited_by'] = max_by
+            child_edited_on, child_edited_by = self._compute_subtree_edited_internal(BlockKey(*child), course_key)
+            if child_edited_on > max_date:
+                max_date = child_edited_on
+                max_by = child_edited_by
+
+        self._subtree_edited_info[block_key] = (max_date, max_by)
+        return max_date, max_by
@@ -1,10 +1,12 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import random
 import re
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 import time
+from bson import BSON
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
@@ -14,57 +16,98 @@ from functools import wraps
 from pymongo.errors import AutoReconnect
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache
 import datetime
 import pytz
 
 
-def structure_from_mongo(structure):
+class StructureValidation(object):
+    """
+    How thoroughly to check the format of structures as they're converted to and from mongo.
+    FULL checks every block, SAMPLED checks a random handful of blocks per structure, and NONE
+    skips the checks altogether.
+    """
+    FULL = 'full'
+    SAMPLED = 'sampled'
+    NONE = 'none'
+
+
+# The number of blocks per structure whose format is checked in SAMPLED mode
+VALIDATION_SAMPLE_SIZE = 10
+
+
+def _block_checker(num_blocks, validation):
+    """
+    Return a function of a block's position in a structure of `num_blocks` blocks, which says
+    whether to check the block's format in this validation mode
+    """
+    if validation == StructureValidation.SAMPLED and num_blocks > VALIDATION_SAMPLE_SIZE:
+        return set(random.sample(xrange(num_blocks), VALIDATION_SAMPLE_SIZE)).__contains__
+    elif validation in (StructureValidation.FULL, StructureValidation.SAMPLED):
+        return lambda index: True
+    return lambda index: False
+
+
+def structure_from_mongo(structure, validation=StructureValidation.FULL):
     """
     Converts the 'blocks' key from a list [block_data] to a map
         {BlockKey: block_data}.
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
+
+    :param validation: a StructureValidation mode controlling which blocks' formats are checked
     """
-    check('seq[2]', structure['root'])
-    check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
+    if validation != StructureValidation.NONE:
+        check('seq[2]', structure['root'])
+        check('list', structure['blocks'])
 
     structure['root'] = BlockKey(*structure['root'])
+    should_check = _block_checker(len(structure['blocks']), validation)
     new_blocks = {}
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
+    for index, block in enumerate(structure['blocks']):
+        checked = should_check(index)
+        if checked:
+            check('dict', block)
+        fields = block['fields']
+        if 'children' in fields:
+            if checked:
+                check('list(list[2])', fields['children'])
+            fields['children'] = [BlockKey(*child) for child in fields['children']]
         new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = block
     structure['blocks'] = new_blocks
 
     return structure
 
 
-def structure_to_mongo(structure):
+def structure_to_mongo(structure, validation=StructureValidation.FULL):
     """
     Converts the 'blocks' key from a map {BlockKey: block_data} to
         a list [block_data], inserting BlockKey.type as 'block_type'
         and BlockKey.id as 'block_id'.
     Doesn't convert 'root', since namedtuple's can be inserted
         directly into mongo.
+
+    :param validation: a StructureValidation mode controlling which blocks' formats are checked
     """
-    check('BlockKey', structure['root'])
-    check('dict(BlockKey: dict)', structure['blocks'])
-    for block in structure['blocks'].itervalues():
-        if 'children' in block['fields']:
-            check('list(BlockKey)', block['fields']['children'])
+    if validation != StructureValidation.NONE:
+        check('BlockKey', structure['root'])
+        check('dict', structure['blocks'])
 
     new_structure = dict(structure)
-    new_structure['blocks'] = []
-
-    for block_key, block in structure['blocks'].iteritems():
+    new_blocks = new_structure['blocks'] = []
+
+    should_check = _block_checker(len(structure['blocks']), validation)
+    for index, (block_key, block) in enumerate(structure['blocks'].iteritems()):
+        if should_check(index):
+            check('BlockKey', block_key)
+            check('dict', block)
+            if 'children' in block['fields']:
+                check('list(BlockKey)', block['fields']['children'])
         new_block = dict(block)
         new_block.setdefault('block_type', block_key.type)
         new_block['block_id'] = block_key.id
-        new_structure['blocks'].append(new_block)
+        new_blocks.append(new_block)
 
     return new_structure
 
@@ -75,10 +118,15 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None,
+        structure_validation=StructureValidation.FULL, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        :param structure_cache: a :class:`.StructureCache` in which to keep decoded structures. If
+            not given, a cache with the default size and no shared tier is used.
+        :param structure_validation: the StructureValidation mode to use when converting structures
         """
         self.database = MongoProxy(
             pymongo.database.Database(
@@ -108,6 +156,9 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        self.structure_cache = structure_cache if structure_cache is not None else StructureCache()
+        self.structure_validation = structure_validation
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -119,9 +170,20 @@ class MongoConnection(object):
 
     def get_structure(self, key):
         """
-        Get the structure from the persistence mechanism whose id is the given key
+        Get the structure from the persistence mechanism whose id is the given key.
+
+        Structures are immutable once written, so the decoded structure is kept in
+        :attr:`structure_cache` and shared by subsequent lookups of the same key.
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            structure = self.structures.find_one({'_id': key})
+            if structure is None:
+                return None
+            size = len(BSON.encode(structure))
+            structure = structure_from_mongo(structure, self.structure_validation)
+            self.structure_cache.set(key, structure, size)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -131,7 +193,10 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        return [
+            structure_from_mongo(structure, self.structure_validation)
+            for structure in self.structures.find({'_id': {'$in': ids}})
+        ]
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -141,7 +206,10 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'previous_version': {'$in': ids}})]
+        return [
+            structure_from_mongo(structure, self.structure_validation)
+            for structure in self.structures.find({'previous_version': {'$in': ids}})
+        ]
 
     @autoretry_read()
     def find_ancestor_structures(self, original_version, block_key):
@@ -153,7 +221,7 @@ class MongoConnection(object):
             block_key (BlockKey): The id of the block in question
         """
         return [
-            structure_from_mongo(structure)
+            structure_from_mongo(structure, self.structure_validation)
             for structure in self.structures.find({
                 'original_version': original_version,
                 'blocks': {
@@ -172,7 +240,10 @@ class MongoConnection(object):
         """
         Insert a new structure into the database.
         """
-        self.structures.insert(structure_to_mongo(structure))
+        mongo_structure = structure_to_mongo(structure, self.structure_validation)
+        self.structures.insert(mongo_structure)
+        # Now that it's written, the structure can't change anymore; so, later readers can share it.
+        self.structure_cache.set(structure['_id'], structure, len(BSON.encode(mongo_structure)))
 
     def get_course_index(self, key, ignore_case=False):
         """
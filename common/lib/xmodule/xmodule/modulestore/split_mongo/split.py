@@ -75,7 +75,13 @@ from xmodule.modulestore import (
 
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    MongoConnection, DuplicateKeyError, StructureValidation
+)
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache, DEFAULT_MAX_SIZE
+from xmodule.modulestore.split_mongo.structure_indexes import (
+    build_parent_index, build_block_type_index, build_settings_index, INDEXED_SETTINGS_FIELDS
+)
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -574,14 +580,24 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None,
-                 services=None, **kwargs):
+                 services=None, structure_cache_size=DEFAULT_MAX_SIZE,
+                 structure_cache_subsystem=None, structure_validation=StructureValidation.FULL, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_size: the approximate number of bytes of decoded structures to keep in this process
+        :param structure_cache_subsystem: an optional cache (e.g., memcached) shared between processes
+            in which to keep structures
+        :param structure_validation: how thoroughly to check the format of structures as they're read
+            and written (one of the StructureValidation modes)
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(
+            structure_cache=StructureCache(structure_cache_size, structure_cache_subsystem),
+            structure_validation=structure_validation,
+            **doc_store_config
+        )
         self.db = self.db_connection.database
 
         # Code review question: How should I expire entries?
@@ -663,8 +679,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 definitions = {definition['_id']: definition
                                for definition in descendent_definitions}
 
-                for block in new_module_data.itervalues():
+                for block_key, block in new_module_data.items():
                     if block['definition'] in definitions:
+                        # the block belongs to a structure which may be shared with other requests;
+                        # so, don't merge the definition's fields into it in place
+                        block = new_module_data[block_key] = dict(block, fields=dict(block['fields']))
                         converted_fields = self.convert_references_to_keys(
                             course_key, system.load_block_type(block['block_type']),
                             definitions[block['definition']].get('fields'),
@@ -849,6 +868,19 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # get the blocks for each course index (s/b the root)
         return self._get_structures_for_branch_and_locator(branch, self._create_course_locator, **kwargs)
 
+    @autoretry_read()
+    def get_course_keys(self, branch, **kwargs):
+        """
+        Returns a list of the keys of the courses which have the given branch, read from the
+        course index without loading the courses' structures.
+
+        :param branch: the branch for which to return course keys.
+        """
+        return [
+            self._create_course_locator(course_info, branch=None)
+            for course_info in self.db_connection.find_matching_course_indexes(branch)
+        ]
+
     def get_libraries(self, branch="library", **kwargs):
         """
         Returns a list of "library" root blocks matching any given qualifiers.
@@ -1013,8 +1045,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+        blocks = course.structure['blocks']
+        for block_id in self._get_block_keys_to_search(course.structure, qualifiers, settings):
+            if _block_matches_all(blocks[block_id]):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -1022,6 +1055,56 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _get_block_keys_to_search(self, structure, qualifiers, settings):
+        """
+        Return the keys of the blocks in structure which could match the get_items ``qualifiers``
+        and ``settings``. If the structure is indexed and the query is on ``block_type`` or one of
+        the INDEXED_SETTINGS_FIELDS, this is just the blocks with the requested values; otherwise,
+        it's all of the blocks.
+        """
+        def _indexable_values(criteria):
+            """
+            Return the list of values to look up in an index to satisfy criteria, or None if the
+            criteria can't be answered from an index (e.g., regexes and functions).
+            """
+            if isinstance(criteria, dict) and criteria.keys() == ['$in']:
+                values = criteria['$in']
+            else:
+                values = [criteria]
+            if all(isinstance(value, (basestring, bool, int, long)) for value in values):
+                return values
+            return None
+
+        def _lookup(index, values):
+            """
+            Return the union of the block keys for values in index (in index order)
+            """
+            if len(values) == 1:
+                return index.get(values[0], [])
+            block_keys = []
+            seen = set()
+            for value in values:
+                for key in index.get(value, []):
+                    if key not in seen:
+                        seen.add(key)
+                        block_keys.append(key)
+            return block_keys
+
+        block_type_values = _indexable_values(qualifiers['block_type']) if 'block_type' in qualifiers else None
+        if block_type_values is not None:
+            block_types = self._get_structure_index(structure, 'block_types', build_block_type_index)
+            if block_types is not None:
+                return _lookup(block_types, block_type_values)
+
+        for field in INDEXED_SETTINGS_FIELDS:
+            values = _indexable_values(settings[field]) if field in settings else None
+            if values is not None:
+                settings_index = self._get_structure_index(structure, 'settings', build_settings_index)
+                if settings_index is not None:
+                    return _lookup(settings_index[field], values)
+
+        return structure['blocks'].keys()
+
     def get_parent_location(self, locator, **kwargs):
         '''
         Return the location (Locators w/ block_ids) for the parent of this location in this
@@ -1054,16 +1137,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
-        blocks = course.structure['blocks']
-        for block_id, block_data in blocks.iteritems():
-            items.difference_update(BlockKey(*child) for child in block_data.get('fields', {}).get('children', []))
-            if block_data['block_type'] in detached_categories:
-                items.discard(block_id)
+        structure = course.structure
+        parents = self._get_structure_index(structure, 'parents', build_parent_index)
+        if parents is None:
+            parents = build_parent_index(structure)
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
-            for block_id in items
+            for block_id, block_data in structure['blocks'].iteritems()
+            if block_id not in parents and block_id != structure['root'] and
+            block_data['block_type'] not in detached_categories
         ]
 
     def get_course_index_info(self, course_key):
@@ -2366,6 +2448,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :param course_locator: the course to clean
         """
         original_structure = self._lookup_course(course_locator).structure
+        # this edits the structure in place; so, don't let any other reader see it (or its indexes)
+        self.db_connection.structure_cache.invalidate(original_structure['_id'])
         for block in original_structure['blocks'].itervalues():
             if 'fields' in block and 'children' in block['fields']:
                 block['fields']["children"] = [
@@ -2566,11 +2650,24 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         Given a structure, find block_key's parent in that structure. Note returns
         the encoded format for parent
         """
+        parents = self._get_structure_index(structure, 'parents', build_parent_index)
+        if parents is not None:
+            return parents.get(block_key)
+
+        # the structure may still be changing, so it can't be indexed
         for parent_block_key, value in structure['blocks'].iteritems():
             if block_key in value['fields'].get('children', []):
                 return parent_block_key
         return None
 
+    def _get_structure_index(self, structure, name, builder):
+        """
+        Return the index ``name`` over structure's blocks (built by ``builder``) which is
+        kept with the cached structure, or None if structure isn't cached (because it
+        may still be edited, e.g., during a bulk operation).
+        """
+        return self.db_connection.structure_cache.get_derived(structure, name, builder)
+
     def _sync_children(self, source_parent, destination_parent, new_child):
         """
         Reorder destination's children to the same as source's and remove any no longer in source.
@@ -74,11 +74,23 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         """
         Returns all the courses on the Draft or Published branch depending on the branch setting.
         """
+        return super(DraftVersioningModuleStore, self).get_courses(self._get_branch_for_setting(), **kwargs)
+
+    def get_course_keys(self, **kwargs):
+        """
+        Returns the keys of all the courses on the Draft or Published branch depending on the branch setting.
+        """
+        return super(DraftVersioningModuleStore, self).get_course_keys(self._get_branch_for_setting(), **kwargs)
+
+    def _get_branch_for_setting(self):
+        """
+        Returns the name of the branch which the current branch setting reads courses from.
+        """
         branch_setting = self.get_branch_setting()
         if branch_setting == ModuleStoreEnum.Branch.draft_preferred:
-            return super(DraftVersioningModuleStore, self).get_courses(ModuleStoreEnum.BranchName.draft, **kwargs)
+            return ModuleStoreEnum.BranchName.draft
         elif branch_setting == ModuleStoreEnum.Branch.published_only:
-            return super(DraftVersioningModuleStore, self).get_courses(ModuleStoreEnum.BranchName.published, **kwargs)
+            return ModuleStoreEnum.BranchName.published
         else:
             raise InsufficientSpecificationError()
 
@@ -260,31 +272,81 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         def get_course(branch_name):
             return self._lookup_course(xblock.location.course_key.for_branch(branch_name)).structure
 
-        def get_block(course_structure, block_key):
-            return self._get_block_from_structure(course_structure, block_key)
-
         draft_course = get_course(ModuleStoreEnum.BranchName.draft)
         published_course = get_course(ModuleStoreEnum.BranchName.published)
+        block_key = BlockKey.from_usage_key(xblock.location)
+
+        changed_blocks = self._get_changed_blocks(draft_course, published_course)
+        if changed_blocks is not None:
+            return block_key in changed_blocks
+
+        # the structures may still be changing, so check just this block's subtree
+        return self._has_changes_subtree(draft_course, published_course, block_key, {})
+
+    def _get_changed_blocks(self, draft_structure, published_structure):
+        """
+        Return the set of the keys of the blocks in the draft structure which differ from the
+        published structure (including those with changed descendants), computed once for each
+        pair of draft and published structure versions.
+
+        Returns None if either structure isn't cached (because it may still be edited, e.g.,
+        during a bulk operation).
+        """
+        if not self.db_connection.structure_cache.is_cached(published_structure):
+            return None
+        return self._get_structure_index(
+            draft_structure,
+            ('changed_blocks', published_structure['_id']),
+            lambda structure: frozenset(
+                block_key for block_key, changed in self._compute_changes(structure, published_structure).iteritems()
+                if changed
+            )
+        )
+
+    def _compute_changes(self, draft_structure, published_structure):
+        """
+        Return a dict of each block key in the draft structure to whether it has unpublished
+        changes, computed bottom up in a single pass over the structure.
+        """
+        changes = {}
+        for block_key in draft_structure['blocks']:
+            self._has_changes_subtree(draft_structure, published_structure, block_key, changes)
+        return changes
 
-        def has_changes_subtree(block_key):
-            draft_block = get_block(draft_course, block_key)
-            published_block = get_block(published_course, block_key)
-            if not published_block:
-                return True
+    def _has_changes_subtree(self, draft_structure, published_structure, block_key, changes):
+        """
+        Return whether the block or any of its descendants differs between the draft and
+        published structures, recording the result for each block visited in ``changes``
+        (so that it's only computed once for each block).
+        """
+        # iterative depth first traversal, deciding each block after its children
+        stack = [(block_key, False)]
+        visiting = set()
+        while stack:
+            current_key, children_visited = stack.pop()
+            if current_key in changes or (current_key in visiting and not children_visited):
+                continue
+            draft_block = self._get_block_from_structure(draft_structure, current_key)
+            published_block = self._get_block_from_structure(published_structure, current_key)
+            if draft_block is None or published_block is None:
+                # a block which was deleted from the draft only counts as changed if it was never published
+                changes[current_key] = published_block is None
+                continue
 
             # check if the draft has changed since the published was created
             if self._get_version(draft_block) != self._get_version(published_block):
-                return True
+                changes[current_key] = True
+                continue
 
             # check the children in the draft
-            if 'children' in draft_block.setdefault('fields', {}):
-                return any(
-                    [has_changes_subtree(child_block_id) for child_block_id in draft_block['fields']['children']]
-                )
-
-            return False
-
-        return has_changes_subtree(BlockKey.from_usage_key(xblock.location))
+            children = draft_block.get('fields', {}).get('children', [])
+            if children_visited:
+                changes[current_key] = any(changes.get(child_key, False) for child_key in children)
+            else:
+                visiting.add(current_key)
+                stack.append((current_key, True))
+                stack.extend((child_key, False) for child_key in children if child_key not in changes)
+        return changes[block_key]
 
     def publish(self, location, user_id, blacklist=None, **kwargs):
         """
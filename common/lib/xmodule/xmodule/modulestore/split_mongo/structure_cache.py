@@ -0,0 +1,265 @@
+"""
+A bounded, process-wide cache of decoded split-mongo course structures.
+
+Structures are content-addressed by their ``_id`` and are never modified once they
+have been written to the database, so a decoded structure can be shared by every
+request in the process until it is evicted. Entries are evicted in least-recently-used
+order once the (approximate) size of the cached structures exceeds ``max_size`` bytes.
+
+An optional shared cache (e.g., a django memcached backend) can be supplied as a second
+tier, so that a structure decoded by one worker doesn't have to be re-fetched from mongo
+by the others.
+"""
+import cPickle as pickle
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    dog_stats_api = None
+
+
+log = logging.getLogger(__name__)
+
+# The default budget for decoded structures held by a single process
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Structures never change, so they can stay in the shared cache until they are evicted
+SHARED_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _metric(name):
+    """
+    Return the full name of a structure cache metric.
+    """
+    return u'split_mongo.structure_cache.{}'.format(name)
+
+
+class StructureCacheEntry(object):
+    """
+    A cached structure, its approximate size, and any derived data which has been computed
+    from it (such as indexes over its blocks).
+    """
+    __slots__ = ('structure', 'size', 'derived')
+
+    def __init__(self, structure, size):
+        self.structure = structure
+        self.size = size
+        self.derived = {}
+
+
+class StructureCache(object):
+    """
+    A thread-safe, size-bounded LRU cache of decoded structures keyed by structure ``_id``.
+
+    Callers must treat the returned structures as immutable; anything which needs to edit a
+    structure must copy it first (as :meth:`SplitBulkWriteMixin.version_structure` does).
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, shared_cache=None):
+        """
+        Arguments:
+            max_size (int): the approximate number of bytes of structures to keep in memory.
+                A value of 0 disables the in-process tier.
+            shared_cache: an optional object with django cache ``get`` and ``set`` semantics
+                which is consulted when a structure isn't cached in this process.
+        """
+        self.max_size = max_size
+        self.shared_cache = shared_cache
+        self._entries = OrderedDict()
+        self._current_size = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def current_size(self):
+        """
+        The approximate number of bytes of structures currently held in this process.
+        """
+        return self._current_size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """
+        Return a dict of the counters for this cache.
+        """
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'size': self._current_size,
+            'max_size': self.max_size,
+        }
+
+    def get(self, key):
+        """
+        Return the structure cached for ``key``, or None if it isn't cached in either tier.
+        """
+        entry = self.get_entry(key)
+        return entry.structure if entry is not None else None
+
+    def get_entry(self, key):
+        """
+        Return the :class:`StructureCacheEntry` for ``key``, or None if it isn't cached in either tier.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # re-insert to mark it as the most recently used
+                self._entries[key] = entry
+                self.hits += 1
+                self._increment('hits')
+                return entry
+
+        structure, size = self._get_shared(key)
+        if structure is None:
+            with self._lock:
+                self.misses += 1
+            self._increment('misses')
+            return None
+
+        with self._lock:
+            self.shared_hits += 1
+        self._increment('shared_hits')
+        return self._put(key, structure, size)
+
+    def set(self, key, structure, size, shared=True):
+        """
+        Cache ``structure`` under ``key``, replacing any previous entry (and its derived data).
+
+        Arguments:
+            key: the structure's ``_id``
+            structure (dict): the decoded structure
+            size (int): the approximate size of the structure in bytes (e.g., its bson size)
+            shared (bool): whether to also write the structure to the shared cache
+        """
+        if shared:
+            self._set_shared(key, structure, size)
+        return self._put(key, structure, size)
+
+    def get_derived(self, structure, name, builder):
+        """
+        Return the data named ``name`` derived from ``structure`` by ``builder(structure)``,
+        computing it only once per cached structure.
+
+        Derived data is only kept for the exact structure object held by this cache (which
+        can no longer change). For any other structure (e.g., one being edited in a bulk
+        operation) this returns None, and the caller must compute what it needs directly.
+        """
+        entry = self._entries.get(structure.get('_id'))
+        if entry is None or entry.structure is not structure:
+            return None
+        derived = entry.derived.get(name)
+        if derived is None:
+            derived = entry.derived[name] = builder(structure)
+        return derived
+
+    def is_cached(self, structure):
+        """
+        Return whether ``structure`` is the exact (and so immutable) structure object held by this cache.
+        """
+        entry = self._entries.get(structure.get('_id'))
+        return entry is not None and entry.structure is structure
+
+    def invalidate(self, key):
+        """
+        Remove ``key`` from this process's cache.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._current_size -= entry.size
+
+    def clear(self):
+        """
+        Remove all entries from this process's cache. The shared cache is left untouched.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current_size = 0
+
+    def _put(self, key, structure, size):
+        """
+        Store the entry in the in-process tier and evict the least recently used entries
+        until the cache fits in its budget.
+        """
+        entry = StructureCacheEntry(structure, size)
+        if size > self.max_size:
+            # Too big to ever fit; hand it back without caching it
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_size -= previous.size
+            self._entries[key] = entry
+            self._current_size += size
+
+            evicted = 0
+            while self._current_size > self.max_size:
+                __, old_entry = self._entries.popitem(last=False)
+                self._current_size -= old_entry.size
+                evicted += 1
+            self.evictions += evicted
+
+        if evicted:
+            self._increment('evictions', evicted)
+        return entry
+
+    def _get_shared(self, key):
+        """
+        Read and decode a structure from the shared cache. Returns (structure, size),
+        which are both None if the structure isn't cached there.
+        """
+        if self.shared_cache is None:
+            return None, None
+        try:
+            compressed = self.shared_cache.get(self._shared_key(key))
+        except Exception:  # pylint: disable=broad-except
+            log.warning("Unable to read structure %s from the shared cache", key, exc_info=True)
+            return None, None
+        if compressed is None:
+            return None, None
+        return pickle.loads(zlib.decompress(compressed)), len(compressed)
+
+    def _set_shared(self, key, structure, size):
+        """
+        Pickle, compress, and write the structure to the shared cache.
+        """
+        if self.shared_cache is None:
+            return
+        # 1 = fastest compression (slightly larger results)
+        compressed = zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1)
+        if dog_stats_api:
+            dog_stats_api.histogram(_metric('compressed_size'), len(compressed))
+        try:
+            self.shared_cache.set(self._shared_key(key), compressed, SHARED_CACHE_TIMEOUT)
+        except Exception:  # pylint: disable=broad-except
+            log.warning("Unable to write structure %s (%d bytes) to the shared cache", key, size, exc_info=True)
+
+    @staticmethod
+    def _shared_key(key):
+        """
+        Return the key to use for ``key`` in the shared cache.
+        """
+        return u'split_structure.{}'.format(key)
+
+    @staticmethod
+    def _increment(name, value=1):
+        """
+        Report a counter to datadog, if it's available.
+        """
+        if dog_stats_api:
+            dog_stats_api.increment(_metric(name), value)
@@ -0,0 +1,60 @@
+"""
+Indexes over the blocks of a split-mongo structure.
+
+Each builder takes a (decoded) structure and returns a lookup table over its blocks. Since
+the tables are only valid for as long as the structure is unchanged, they are normally
+obtained via :meth:`.StructureCache.get_derived`, which memoizes them for structures which
+can no longer change.
+"""
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+def build_parent_index(structure):
+    """
+    Return a dict mapping each BlockKey in ``structure`` which has a parent to that parent's BlockKey.
+
+    If a block is listed as the child of more than one block, the first parent found wins (which
+    matches the behavior of scanning the blocks for the parent).
+    """
+    parents = {}
+    for parent_key, block in structure['blocks'].iteritems():
+        for child in block['fields'].get('children', []):
+            parents.setdefault(BlockKey(*child), parent_key)
+    return parents
+
+
+def build_block_type_index(structure):
+    """
+    Return a dict mapping each block_type in ``structure`` to the list of the BlockKeys of that type.
+    """
+    block_types = {}
+    for block_key, block in structure['blocks'].iteritems():
+        block_types.setdefault(block['block_type'], []).append(block_key)
+    return block_types
+
+
+# The settings fields which are commonly used to query for blocks (e.g., to find the graded sections)
+INDEXED_SETTINGS_FIELDS = ('graded', 'format')
+
+
+def build_settings_index(structure):
+    """
+    Return a dict mapping each of the INDEXED_SETTINGS_FIELDS to a dict of
+    {explicitly set value: [BlockKey, ...]}. List values are indexed by each of their elements.
+    Unhashable values are not indexed.
+    """
+    index = {field: {} for field in INDEXED_SETTINGS_FIELDS}
+    for block_key, block in structure['blocks'].iteritems():
+        fields = block['fields']
+        for field in INDEXED_SETTINGS_FIELDS:
+            if field not in fields:
+                continue
+            values = fields[field]
+            if not isinstance(values, list):
+                values = [values]
+            for value in values:
+                try:
+                    index[field].setdefault(value, []).append(block_key)
+                except TypeError:
+                    pass
+    return index
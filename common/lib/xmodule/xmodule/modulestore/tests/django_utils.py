@@ -11,6 +11,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.test import TestCase
 from request_cache.middleware import RequestCache
+from static_replace import clear_static_url_caches
 
 from xmodule.contentstore.django import _CONTENTSTORE
 from xmodule.modulestore import ModuleStoreEnum
@@ -296,6 +297,7 @@ class ModuleStoreTestCase(TestCase):
         # which will cause them to be re-created
         # the next time they are accessed.
         clear_existing_modulestores()
+        clear_static_url_caches()
         TestCase.setUpClass()
 
     def _pre_setup(self):
@@ -321,6 +323,8 @@ class ModuleStoreTestCase(TestCase):
         clear_existing_modulestores()
         # clear RequestCache to emulate its clearance after each http request.
         RequestCache().clear_request_cache()
+        # the same course ids are reused by tests with different modulestores
+        clear_static_url_caches()
 
         # Call superclass implementation
         super(ModuleStoreTestCase, self)._post_teardown()
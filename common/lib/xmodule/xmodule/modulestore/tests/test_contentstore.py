@@ -1,11 +1,17 @@
 """
  Test contentstore.mongo functionality
 """
+import datetime
+import hashlib
 import logging
 from uuid import uuid4
 import unittest
 import mimetypes
 from tempfile import mkdtemp
+from mock import patch
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from gridfs.errors import FileExists, CorruptGridFile
 import path
 import shutil
 
@@ -209,3 +215,236 @@ class TestContentstore(unittest.TestCase):
         # ensure it didn't remove any from other course
         __, count = self.contentstore.get_all_content_for_course(self.course2_key)
         self.assertEqual(count, len(self.course2_files))
+
+    def _blob_id(self, asset_key):
+        """
+        Return the id of the blob the asset's entry references.
+        """
+        return self.contentstore.get_attr(asset_key, 'blob_id')
+
+    @ddt.data(True, False)
+    def test_identical_data_stored_once(self, deprecated):
+        """
+        Assets with the same data, in the same or different courses, share one blob
+        """
+        self.set_up_assets(deprecated)
+        self.assertEqual(
+            self.contentstore.blob_files.count(), len(set(self.course1_files).union(self.course2_files))
+        )
+        self.assertEqual(
+            self._blob_id(self.course1_key.make_asset_key('asset', 'picture1.jpg')),
+            self._blob_id(self.course2_key.make_asset_key('asset', 'picture1.jpg')),
+        )
+
+        # saving the same data again doesn't store another blob
+        asset_key = self.course1_key.make_asset_key('asset', 'picture_copy.jpg')
+        self.save_asset('picture1.jpg', asset_key, 'picture_copy.jpg', False)
+        self.assertEqual(
+            self._blob_id(asset_key), self._blob_id(self.course2_key.make_asset_key('asset', 'picture1.jpg'))
+        )
+        self.assertEqual(self.contentstore.find(asset_key).name, 'picture_copy.jpg')
+        self.assertEqual(self.contentstore.blob_files.count(), 5)
+
+    @ddt.data(True, False)
+    def test_copy_assets_shares_blobs(self, deprecated):
+        """
+        copy_all_course_assets only copies the entries of the assets
+        """
+        self.set_up_assets(deprecated)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        with patch.object(self.contentstore.blobs, 'put') as put_blob:
+            self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertFalse(put_blob.called)
+        for filename in self.course1_files:
+            self.assertEqual(
+                self._blob_id(self.course1_key.make_asset_key('asset', filename)),
+                self._blob_id(dest_course.make_asset_key('asset', filename))
+            )
+
+    @ddt.data(True, False)
+    @patch('xmodule.contentstore.mongo.BLOB_GRACE_PERIOD', datetime.timedelta(0))
+    def test_unreferenced_blobs_deleted(self, deprecated):
+        """
+        A blob is deleted once no asset references it (for longer than the grace period)
+        """
+        self.set_up_assets(deprecated)
+        shared_blob = self._blob_id(self.course1_key.make_asset_key('asset', 'picture1.jpg'))
+        own_blob = self._blob_id(self.course1_key.make_asset_key('asset', 'picture2.jpg'))
+
+        self.contentstore.delete(self.course1_key.make_asset_key('asset', 'picture2.jpg'))
+        self.assertFalse(self.contentstore.blobs.exists(own_blob))
+
+        self.contentstore.delete_all_course_assets(self.course1_key)
+        self.assertTrue(self.contentstore.blobs.exists(shared_blob))
+        self.assertEqual(self.contentstore.blob_files.count(), len(self.course2_files))
+
+        self.contentstore.delete(self.course2_key.make_asset_key('asset', 'picture1.jpg'))
+        self.assertFalse(self.contentstore.blobs.exists(shared_blob))
+
+        # replacing an asset's data releases its previous blob
+        asset_key = self.course2_key.make_asset_key('asset', 'picture3.jpg')
+        previous_blob = self._blob_id(asset_key)
+        self.save_asset('door_2.ogg', asset_key, 'picture3.jpg', False)
+        self.assertFalse(self.contentstore.blobs.exists(previous_blob))
+        self.assertEqual(self.contentstore.blob_files.count(), 1)
+
+    @ddt.data(True, False)
+    def test_unreferenced_blobs_kept_for_grace_period(self, deprecated):
+        """
+        An unreferenced blob is kept until the grace period has passed, unless its data is saved again
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'picture2.jpg')
+        blob_id = self._blob_id(asset_key)
+        self.contentstore.delete(asset_key)
+        self.assertIsNotNone(self.contentstore.blob_files.find_one({'_id': blob_id})['unreferenced_at'])
+
+        # saving the data again clears the mark, so the blob isn't deleted later
+        self.save_asset('picture2.jpg', asset_key, 'picture2.jpg', False)
+        self.assertNotIn('unreferenced_at', self.contentstore.blob_files.find_one({'_id': blob_id}))
+        self.contentstore._sweep_unreferenced_blobs(datetime.datetime.utcnow())  # pylint: disable=protected-access
+        self.assertTrue(self.contentstore.blobs.exists(blob_id))
+
+        self.contentstore.delete(asset_key)
+        self.contentstore._sweep_unreferenced_blobs(  # pylint: disable=protected-access
+            datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        )
+        self.assertTrue(self.contentstore.blobs.exists(blob_id))
+        self.contentstore._sweep_unreferenced_blobs(datetime.datetime.utcnow())  # pylint: disable=protected-access
+        self.assertFalse(self.contentstore.blobs.exists(blob_id))
+
+    @ddt.data(
+        # the data is saved again after the release found that no asset references the blob
+        ('fs_files', 'find_one', False),
+        # the data is saved again after the sweep found that no asset references the blob
+        ('blob_files', 'remove', True),
+    )
+    @ddt.unpack
+    @patch('xmodule.contentstore.mongo.BLOB_GRACE_PERIOD', datetime.timedelta(0))
+    def test_release_interleaved_with_save(self, collection_name, method_name, save_before_call):
+        """
+        Saving the data of a blob while the blob is released doesn't leave the saved asset without its data
+        """
+        self.set_up_assets(False)
+        asset_key = self.course1_key.make_asset_key('asset', 'picture2.jpg')
+        blob_id = self._blob_id(asset_key)
+        other_asset_key = self.course2_key.make_asset_key('asset', 'picture2_again.jpg')
+
+        collection = getattr(self.contentstore, collection_name)
+        original_method = getattr(collection, method_name)
+        saved = []
+
+        def call_and_save(query, *args, **kwargs):
+            """ Save the released data as another asset when the blob is first queried """
+            interleave = not saved and blob_id in (query.get('blob_id'), query.get('_id'))
+            if interleave and save_before_call:
+                saved.append(True)
+                self.save_asset('picture2.jpg', other_asset_key, 'picture2_again.jpg', False)
+            result = original_method(query, *args, **kwargs)
+            if interleave and not save_before_call:
+                saved.append(True)
+                self.save_asset('picture2.jpg', other_asset_key, 'picture2_again.jpg', False)
+            return result
+
+        with patch.object(collection, method_name, side_effect=call_and_save):
+            self.contentstore.delete(asset_key)
+
+        self.assertTrue(saved)
+        self.assertEqual(self._blob_id(other_asset_key), blob_id)
+        with open("{}/static/picture2.jpg".format(DATA_DIR), "rb") as f:
+            self.assertEqual(self.contentstore.find(other_asset_key).data, f.read())
+
+        # the blob is deleted once the other asset is deleted too
+        self.contentstore.delete(other_asset_key)
+        self.assertFalse(self.contentstore.blobs.exists(blob_id))
+
+    @ddt.data(
+        # data stored in one chunk
+        ('asset data', False),
+        ('asset data', True),
+        # data stored in several chunks
+        ('asset data' * 30 * 1024, False),
+        ('asset data' * 30 * 1024, True),
+    )
+    @ddt.unpack
+    def test_orphaned_chunks_replaced(self, data, with_files_doc):
+        """
+        Chunks left for a blob by an interrupted upload, with or without a files document, are replaced
+        rather than mistaken for the saved data
+        """
+        self.set_up_assets(False)
+        blob_id = hashlib.sha1(data).hexdigest()
+        self.contentstore.blob_chunks.insert({'files_id': blob_id, 'n': 0, 'data': Binary('stale data')})
+        if with_files_doc:
+            self.contentstore.blob_files.insert({'_id': blob_id, 'length': 0, 'chunkSize': 255 * 1024, 'md5': 'stale'})
+
+        asset_key = self.course1_key.make_asset_key('asset', 'data.txt')
+        self.contentstore.save(StaticContent(asset_key, 'data.txt', 'text/plain', data))
+        self.assertEqual(self._blob_id(asset_key), blob_id)
+        self.assertEqual(self.contentstore.find(asset_key).data, data)
+        blob = self.contentstore.blob_files.find_one({'_id': blob_id})
+        self.assertEqual((blob['length'], blob['md5']), (len(data), hashlib.md5(data).hexdigest()))
+
+    def test_blob_not_stored(self):
+        """
+        Saving fails, rather than referencing a missing or corrupt blob, if the blob can't be stored
+        """
+        self.set_up_assets(False)
+        asset_key = self.course1_key.make_asset_key('asset', 'data.txt')
+        with patch.object(self.contentstore.blobs, 'put', side_effect=FileExists):
+            with self.assertRaises(CorruptGridFile):
+                self.contentstore.save(StaticContent(asset_key, 'data.txt', 'text/plain', 'asset data'))
+        with self.assertRaises(NotFoundError):
+            self.contentstore.find(asset_key)
+
+    def test_sweep_deletes_orphaned_chunks(self):
+        """
+        The sweep deletes chunks which have no files document once they're older than the cutoff
+        """
+        self.set_up_assets(False)
+        chunk_count = self.contentstore.blob_chunks.count()
+        now = datetime.datetime.utcnow()
+        self.contentstore.blob_chunks.insert({
+            '_id': ObjectId.from_datetime(now - datetime.timedelta(hours=2)),
+            'files_id': 'orphaned', 'n': 0, 'data': Binary('stale data'),
+        })
+        self.contentstore.blob_chunks.insert({'files_id': 'uploading', 'n': 0, 'data': Binary('new data')})
+
+        cutoff = now - datetime.timedelta(hours=1)
+        self.contentstore._sweep_unreferenced_blobs(cutoff)  # pylint: disable=protected-access
+        self.assertEqual(self.contentstore.blob_chunks.find({'files_id': 'orphaned'}).count(), 0)
+        self.assertEqual(self.contentstore.blob_chunks.find({'files_id': 'uploading'}).count(), 1)
+        self.assertEqual(self.contentstore.blob_chunks.count(), chunk_count + 1)
+
+    @ddt.data(True, False)
+    def test_gridfs_file_assets(self, deprecated):
+        """
+        Assets saved as GridFS files, before assets were stored in blobs, can still be read, copied and replaced
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'legacy.jpg')
+        content_id, content_son = self.contentstore.asset_db_key(asset_key)
+        with open("{}/static/picture1.jpg".format(DATA_DIR), "rb") as f:
+            data = f.read()
+        self.contentstore.fs.put(
+            data, _id=content_id, filename=unicode(asset_key), content_type='image/jpeg',
+            displayname='legacy.jpg', content_son=content_son, thumbnail_location=None, import_path=None, locked=True
+        )
+
+        content = self.contentstore.find(asset_key)
+        self.assertEqual((content.data, content.name, content.locked), (data, 'legacy.jpg', True))
+
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(self.contentstore.find(dest_course.make_asset_key('asset', 'legacy.jpg')).data, data)
+        self.assertEqual(
+            self._blob_id(dest_course.make_asset_key('asset', 'legacy.jpg')),
+            self._blob_id(self.course1_key.make_asset_key('asset', 'picture1.jpg'))
+        )
+
+        # saving over the asset replaces its GridFS file by an entry referencing a blob
+        self.save_asset('picture2.jpg', asset_key, 'legacy.jpg', False)
+        self.assertEqual(self.contentstore.fs_files.database['fs.chunks'].find({'files_id': content_id}).count(), 0)
+        self.assertEqual(
+            self._blob_id(asset_key), self._blob_id(self.course1_key.make_asset_key('asset', 'picture2.jpg'))
+        )
@@ -0,0 +1,163 @@
+"""
+Tests of the inherited metadata trees the (old) mongo modulestore computes and caches per course.
+"""
+import copy
+import cPickle as pickle
+import logging
+import sys
+import timeit
+import unittest
+
+from nose.plugins.attrib import attr
+
+from xmodule.modulestore.inheritance import InheritedMetadataTree
+
+
+log = logging.getLogger(__name__)
+
+
+def _compute_flattened_metadata(root, containers):
+    """
+    The metadata each block inherits, as a flattened dict per block: how the mongo modulestore
+    computed the inherited metadata before InheritedMetadataTree (less the recursion).
+    """
+    metadata_to_inherit = {}
+    to_process = [(root, containers[root][1])]
+    while to_process:
+        url, my_metadata = to_process.pop()
+        for child in containers[url][0]:
+            if child in containers:
+                new_child_metadata = copy.deepcopy(my_metadata)
+                new_child_metadata.update(containers[child][1])
+                metadata_to_inherit[child] = new_child_metadata
+                to_process.append((child, new_child_metadata))
+            else:
+                metadata_to_inherit[child] = my_metadata
+    return metadata_to_inherit
+
+
+def _large_course(num_units=1000, problems_per_unit=8):
+    """
+    Return the root and containers of a course with 5 units per sequential, 10 sequentials per
+    chapter, and problems, an html block and a discussion in each unit
+    """
+    containers = {}
+    sequentials = []
+    for unit_num in range(num_units):
+        unit = 'vertical_{}'.format(unit_num)
+        children = ['problem_{}_{}'.format(unit_num, num) for num in range(problems_per_unit)]
+        children.extend(['html_{}'.format(unit_num), 'discussion_{}'.format(unit_num)])
+        containers[unit] = (children, {})
+        if unit_num % 5 == 0:
+            sequentials.append([])
+        sequentials[-1].append(unit)
+
+    for num, units in enumerate(sequentials):
+        containers['sequential_{}'.format(num)] = (units, {'graded': num % 2 == 0, 'format': 'Homework'})
+    chapters = []
+    for num in range(0, len(sequentials), 10):
+        chapter = 'chapter_{}'.format(num)
+        containers[chapter] = (['sequential_{}'.format(seq) for seq in range(num, num + 10)], {})
+        chapters.append(chapter)
+    containers['course'] = (chapters, {'start': '2014-01-01T00:00', 'days_early_for_beta': 2.0})
+    return 'course', containers
+
+
+class TestInheritedMetadataTree(unittest.TestCase):
+    """
+    Tests of :class:`.InheritedMetadataTree`
+    """
+    def setUp(self):
+        super(TestInheritedMetadataTree, self).setUp()
+        self.containers = {
+            'course': (['chapter', 'empty_chapter'], {'graded': False, 'due': 'course'}),
+            'chapter': (['sequential', 'html'], {}),
+            'sequential': (['vertical'], {'graded': True}),
+            'vertical': (['problem', 'video'], {'due': 'vertical'}),
+            'empty_chapter': ([], {'visible_to_staff_only': True}),
+        }
+        self.tree = InheritedMetadataTree.compute('course', self.containers)
+
+    def assertTreeMatches(self, tree, root, containers):  # pylint: disable=invalid-name
+        """
+        Assert that tree resolves each block to the same metadata as the flattened computation
+        """
+        expected = _compute_flattened_metadata(root, containers)
+        self.assertEqual(len(tree), len(expected))
+        for url, metadata in expected.iteritems():
+            self.assertEqual(tree.get(url), metadata, url)
+
+    def test_resolution(self):
+        self.assertEqual(self.tree.get('chapter'), {'graded': False, 'due': 'course'})
+        self.assertEqual(self.tree.get('html'), {'graded': False, 'due': 'course'})
+        self.assertEqual(self.tree.get('sequential'), {'graded': True, 'due': 'course'})
+        self.assertEqual(self.tree.get('problem'), {'graded': True, 'due': 'vertical'})
+        self.assertEqual(
+            self.tree.get('empty_chapter'), {'graded': False, 'due': 'course', 'visible_to_staff_only': True}
+        )
+        self.assertTreeMatches(self.tree, 'course', self.containers)
+
+    def test_root_and_unknown_blocks(self):
+        self.assertIsNone(self.tree.get('course'))
+        self.assertEqual(self.tree.get('orphan', {}), {})
+        self.assertEqual(len(InheritedMetadataTree.compute('course', {})), 0)
+
+    def test_blocks_without_overrides_share_parents_metadata(self):
+        self.assertIs(self.tree.get('chapter'), self.tree.get('html'))
+        self.assertIs(self.tree.get('problem'), self.tree.get('video'))
+        self.assertIs(self.tree.get('problem'), self.tree.get('problem'))
+
+    def test_pickle(self):
+        self.tree.get('problem')
+        unpickled = pickle.loads(pickle.dumps(self.tree, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(unpickled._resolved, {})  # pylint: disable=protected-access
+        self.assertTreeMatches(unpickled, 'course', self.containers)
+
+    def test_deep_course(self):
+        depth = sys.getrecursionlimit() * 2
+        containers = {
+            'block_{}'.format(num): (['block_{}'.format(num + 1)], {'weight': num} if num % 3 == 0 else {})
+            for num in range(depth)
+        }
+        tree = InheritedMetadataTree.compute('block_0', containers)
+        self.assertEqual(tree.get('block_{}'.format(depth)), {'weight': (depth - 1) // 3 * 3})
+        self.assertTreeMatches(tree, 'block_0', containers)
+
+
+@attr('benchmark')
+class TestInheritedMetadataTreePerformance(unittest.TestCase):
+    """
+    Compare the time to compute a large course's inherited metadata and the size of its pickle
+    as flattened dicts per block and as an :class:`.InheritedMetadataTree`.
+    """
+    REPEAT = 5
+
+    def test_large_course(self):
+        root, containers = _large_course()
+        flattened = _compute_flattened_metadata(root, containers)
+        tree = InheritedMetadataTree.compute(root, containers)
+        for url, metadata in flattened.iteritems():
+            self.assertEqual(tree.get(url), metadata)
+
+        flattened_pickle = pickle.dumps(flattened, pickle.HIGHEST_PROTOCOL)
+        tree_pickle = pickle.dumps(tree, pickle.HIGHEST_PROTOCOL)
+        self.assertLess(len(tree_pickle), len(flattened_pickle))
+
+        def _load_flattened():
+            """ Compute, pickle and unpickle the flattened metadata, as on a memcached miss and hit """
+            pickle.loads(pickle.dumps(_compute_flattened_metadata(root, containers), pickle.HIGHEST_PROTOCOL))
+
+        def _load_tree():
+            """ Compute, pickle and unpickle the tree, and resolve every block's metadata """
+            tree = InheritedMetadataTree.compute(root, containers)
+            loaded = pickle.loads(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+            for url in flattened:
+                loaded.get(url)
+
+        flattened_time = timeit.timeit(_load_flattened, number=self.REPEAT)
+        tree_time = timeit.timeit(_load_tree, number=self.REPEAT)
+        log.info(
+            "inherited metadata of %d blocks: flattened %.2fms, %d bytes pickled; tree %.2fms, %d bytes pickled",
+            len(flattened), flattened_time / self.REPEAT * 1000, len(flattened_pickle),
+            tree_time / self.REPEAT * 1000, len(tree_pickle)
+        )
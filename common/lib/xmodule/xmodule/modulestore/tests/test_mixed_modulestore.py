@@ -388,10 +388,11 @@ class TestMixedModuleStore(CourseComparisonTest):
             self.store.get_item(self.fake_location, revision=ModuleStoreEnum.RevisionOption.draft_preferred)
 
     # Draft:
-    #    wildcard query, 6! load pertinent items for inheritance calls, course root fetch (why)
+    #    wildcard query, load pertinent items for inheritance (once, as the items share a runtime),
+    #    course root fetch (why)
     # Split:
     #    active_versions (with regex), structure, and spurious active_versions refetch
-    @ddt.data(('draft', 8, 0), ('split', 3, 0))
+    @ddt.data(('draft', 3, 0), ('split', 3, 0))
     @ddt.unpack
     def test_get_items(self, default_ms, max_find, max_send):
         self.initdb(default_ms)
@@ -1490,6 +1491,38 @@ class TestMixedModuleStore(CourseComparisonTest):
         # Verify that others have unchanged edit info
         check_node(sibling.location, None, after_create, self.user_id, None, after_create, self.user_id)
 
+    def test_publish_updates_subtree_edited_info(self):
+        """
+        Tests that the published ancestors of a block which is edited and published report that edit as
+        their subtree's latest, even after their subtree edit info was read from the previous version
+        """
+        self.initdb('split')
+        test_course = self.store.create_course('testx', 'GreekHero', 'test_run', self.user_id)
+        with self.store.bulk_operations(test_course.id):
+            chapter = self.store.create_child(self.user_id, test_course.location, 'chapter')
+            sequential = self.store.create_child(self.user_id, chapter.location, 'sequential')
+            vertical = self.store.create_child(self.user_id, sequential.location, 'vertical')
+            html = self.store.create_child(self.user_id, vertical.location, 'html')
+        self.store.publish(vertical.location, self.user_id)
+        ancestors = [test_course.location, chapter.location, sequential.location, vertical.location]
+
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, test_course.id):
+            for location in ancestors:
+                self.assertEqual(self.store.get_item(location).subtree_edited_by, self.user_id)
+
+        editing_user = self.user_id - 2
+        html = self.store.get_item(html.location)
+        html.display_name = 'Changed Display Name'
+        self.store.update_item(html, editing_user)
+        self.store.publish(vertical.location, editing_user)
+
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, test_course.id):
+            published_html = self.store.get_item(html.location)
+            for location in ancestors:
+                node = self.store.get_item(location)
+                self.assertEqual(node.subtree_edited_by, editing_user)
+                self.assertGreaterEqual(node.subtree_edited_on, published_html.edited_on)
+
     @ddt.data('draft', 'split')
     def test_update_edit_info(self, default_ms):
         """
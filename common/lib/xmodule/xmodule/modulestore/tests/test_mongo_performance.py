@@ -0,0 +1,140 @@
+"""
+Benchmarks of loading a large, synthetic course from the (old) mongo modulestore.
+
+Run them with ``-a benchmark`` to see the timings.
+"""
+import logging
+import shutil
+import timeit
+import unittest
+from tempfile import mkdtemp
+from uuid import uuid4
+
+from mock import patch
+from nose.plugins.attrib import attr
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from xmodule.modulestore.mongo import MongoModuleStore
+from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
+
+
+log = logging.getLogger(__name__)
+
+
+@attr('benchmark')
+class TestMongoLoadPerformance(unittest.TestCase):
+    """
+    Time loading a course of ~10k blocks (chapters, sequentials, verticals, and problems, html
+    and discussions in each vertical) with all its descendants, and check that a whole level of
+    the tree is fetched per query and that all the blocks are loaded by one runtime.
+    """
+    REPEAT = 3
+    NUM_UNITS = 1000
+    PROBLEMS_PER_UNIT = 8
+
+    def setUp(self):
+        super(TestMongoLoadPerformance, self).setUp()
+        self.fs_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.fs_root)
+        self.store = MongoModuleStore(
+            None,
+            {
+                'host': MONGO_HOST,
+                'port': MONGO_PORT_NUM,
+                'db': 'test_mongo_performance_{}'.format(uuid4().hex[:5]),
+                'collection': 'modulestore',
+            },
+            self.fs_root,
+            lambda template_name, dictionary, context=None, namespace='main': '',
+            default_class='xmodule.raw_module.RawDescriptor',
+        )
+        self.addCleanup(self.store._drop_database)  # pylint: disable=protected-access
+        self.course_key = SlashSeparatedCourseKey('org', 'large', 'run')
+        self._insert_course()
+
+    def _insert_course(self):
+        """
+        Insert the course's blocks directly into the collection (much faster than creating them
+        through the modulestore).
+        """
+        documents = []
+
+        def _add(category, name, children=(), **metadata):
+            """ Add a block to the course, returning its usage key """
+            usage_key = self.course_key.make_usage_key(category, name)
+            documents.append({
+                '_id': usage_key.to_deprecated_son(),
+                'definition': {
+                    'data': {},
+                    'children': [child.to_deprecated_string() for child in children],
+                },
+                'metadata': metadata,
+            })
+            return usage_key
+
+        sequentials = []
+        for unit_num in range(self.NUM_UNITS):
+            unit_children = [
+                _add('problem', 'problem_{}_{}'.format(unit_num, problem_num), weight=1)
+                for problem_num in range(self.PROBLEMS_PER_UNIT)
+            ]
+            unit_children.append(_add('html', 'html_{}'.format(unit_num)))
+            unit_children.append(_add('discussion', 'discussion_{}'.format(unit_num)))
+            unit = _add('vertical', 'vertical_{}'.format(unit_num), unit_children)
+            if unit_num % 5 == 0:
+                sequentials.append([])
+            sequentials[-1].append(unit)
+
+        sequential_keys = [
+            _add('sequential', 'sequential_{}'.format(num), units, graded=num % 2 == 0, format='Homework')
+            for num, units in enumerate(sequentials)
+        ]
+        chapter_keys = [
+            _add('chapter', 'chapter_{}'.format(num), sequential_keys[num:num + 10])
+            for num in range(0, len(sequential_keys), 10)
+        ]
+        _add('course', self.course_key.run, chapter_keys, display_name='Large course')
+        self.store.collection.insert(documents)
+        self.num_blocks = len(documents)
+
+    def _walk(self, block):
+        """
+        Return all the blocks of the subtree rooted at block
+        """
+        blocks = [block]
+        for child in block.get_children():
+            blocks.extend(self._walk(child))
+        return blocks
+
+    def test_get_course_with_descendants(self):
+        with patch.object(
+            self.store, '_query_children_for_cache_children', wraps=self.store._query_children_for_cache_children
+        ) as query_children:  # pylint: disable=protected-access
+            course = self.store.get_course(self.course_key, depth=None)
+        # one query per level of descendants: chapters, sequentials, verticals and leaves
+        self.assertEqual(query_children.call_count, 4)
+
+        blocks = self._walk(course)
+        self.assertEqual(len(blocks), self.num_blocks)
+        self.assertTrue(all(block.runtime is course.runtime for block in blocks))
+        self.assertEqual(len(self.store._resources_fs_cache), 1)  # pylint: disable=protected-access
+
+        elapsed = timeit.timeit(
+            lambda: self._walk(self.store.get_course(self.course_key, depth=None)),
+            number=self.REPEAT
+        )
+        log.info(
+            "get_course(depth=None) and walk of %d blocks: %.2fms",
+            self.num_blocks, elapsed / self.REPEAT * 1000
+        )
+
+    def test_get_items(self):
+        problems = self.store.get_items(self.course_key, qualifiers={'category': 'problem'})
+        self.assertEqual(len(problems), self.NUM_UNITS * self.PROBLEMS_PER_UNIT)
+        self.assertEqual(len(set(id(problem.runtime) for problem in problems)), 1)
+
+        elapsed = timeit.timeit(
+            lambda: self.store.get_items(self.course_key, qualifiers={'category': 'problem'}),
+            number=self.REPEAT
+        )
+        log.info("get_items of %d problems: %.2fms", len(problems), elapsed / self.REPEAT * 1000)
@@ -0,0 +1,264 @@
+"""
+Benchmarks of split-mongo operations on large, synthetic course structures.
+
+These don't need a database; they exercise the modulestore's in-memory handling of
+structures. Run them with ``-a benchmark`` to see the timings.
+"""
+import copy
+import logging
+import timeit
+import unittest
+
+from bson import BSON
+from bson.objectid import ObjectId
+from contracts import ContractNotRespected
+from mock import Mock, patch
+from nose.plugins.attrib import attr
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo import mongo_connection
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    structure_from_mongo, structure_to_mongo, StructureValidation, VALIDATION_SAMPLE_SIZE
+)
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.split_draft import DraftVersioningModuleStore
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache
+
+
+log = logging.getLogger(__name__)
+
+
+def make_structure(num_units=2000, problems_per_unit=8):
+    """
+    Return a synthetic structure with ``num_units`` verticals (each containing ``problems_per_unit``
+    problems, an html block, and a discussion) spread over chapters and sequentials.
+    """
+    blocks = {}
+
+    def _add(block_type, block_id, children=(), **fields):
+        """ Add a block to the structure """
+        key = BlockKey(block_type, block_id)
+        fields['children'] = list(children)
+        blocks[key] = {
+            'block_type': block_type,
+            'definition': ObjectId(),
+            'fields': fields,
+            'edit_info': {'update_version': ObjectId()},
+        }
+        return key
+
+    sequentials = []
+    for unit_num in range(num_units):
+        unit_children = [
+            _add('problem', 'problem_{}_{}'.format(unit_num, problem_num), weight=1)
+            for problem_num in range(problems_per_unit)
+        ]
+        unit_children.append(_add('html', 'html_{}'.format(unit_num)))
+        unit_children.append(_add('discussion', 'discussion_{}'.format(unit_num)))
+        unit = _add('vertical', 'vertical_{}'.format(unit_num), unit_children)
+        if unit_num % 5 == 0:
+            sequentials.append([])
+        sequentials[-1].append(unit)
+
+    sequential_keys = [
+        _add('sequential', 'sequential_{}'.format(num), units, graded=num % 2 == 0, format='Homework')
+        for num, units in enumerate(sequentials)
+    ]
+    chapter_keys = [
+        _add('chapter', 'chapter_{}'.format(num), sequential_keys[num:num + 10])
+        for num in range(0, len(sequential_keys), 10)
+    ]
+    root = _add('course', 'course', chapter_keys)
+    return {'_id': ObjectId(), 'root': root, 'blocks': blocks}
+
+
+@attr('benchmark')
+class TestSplitGetItemsPerformance(unittest.TestCase):
+    """
+    Compare get_items on a ~20k block course using the structure's indexes and using a full scan.
+    """
+    REPEAT = 20
+
+    def setUp(self):
+        super(TestSplitGetItemsPerformance, self).setUp()
+        self.course_key = CourseLocator('org', 'course', 'run', branch='draft-branch')
+        self.structure = make_structure()
+        self.store = SplitMongoModuleStore.__new__(SplitMongoModuleStore)
+        self.store.db_connection = Mock(structure_cache=StructureCache())
+        self.store._lookup_course = Mock(  # pylint: disable=protected-access
+            return_value=CourseEnvelope(self.course_key, self.structure)
+        )
+        self.store._load_items = lambda course, block_keys, *args, **kwargs: block_keys  # pylint: disable=protected-access
+
+    def _time_get_items(self, cached, **kwargs):
+        """
+        Return the matching block keys and the average time taken to find them
+        """
+        if cached:
+            self.store.db_connection.structure_cache.set(self.structure['_id'], self.structure, 1)
+        else:
+            self.store.db_connection.structure_cache.clear()
+        result = self.store.get_items(self.course_key, **kwargs)
+        elapsed = timeit.timeit(lambda: self.store.get_items(self.course_key, **kwargs), number=self.REPEAT)
+        return result, elapsed / self.REPEAT
+
+    def _compare(self, **kwargs):
+        """
+        Check that the indexed and scanning queries find the same blocks, and log how long each took.
+        """
+        scanned, scan_time = self._time_get_items(False, **kwargs)
+        indexed, index_time = self._time_get_items(True, **kwargs)
+        self.assertItemsEqual(scanned, indexed)
+        log.info(
+            "get_items(%r) over %d blocks: scan %.2fms, indexed %.2fms",
+            kwargs, len(self.structure['blocks']), scan_time * 1000, index_time * 1000
+        )
+        return indexed
+
+    def test_category(self):
+        self.assertEqual(len(self._compare(qualifiers={'category': 'discussion'})), 2000)
+
+    def test_category_in(self):
+        self.assertEqual(len(self._compare(qualifiers={'category': {'$in': ['chapter', 'sequential']}})), 440)
+
+    def test_graded(self):
+        self.assertEqual(len(self._compare(settings={'graded': True})), 200)
+
+    def test_unindexed_query(self):
+        self.assertEqual(len(self._compare(settings={'weight': 1})), 16000)
+
+
+@attr('benchmark')
+class TestStructureConversionPerformance(unittest.TestCase):
+    """
+    Compare converting a large structure from its mongo format with each validation mode.
+    """
+    REPEAT = 5
+
+    def setUp(self):
+        super(TestStructureConversionPerformance, self).setUp()
+        # round trip through bson so the structure looks exactly as it does when read from mongo
+        self.mongo_structure = BSON.encode(structure_to_mongo(make_structure(), StructureValidation.NONE)).decode()
+
+    def _time_conversion(self, validation):
+        """
+        Return the converted structure and the average time taken to convert it from its mongo format
+        """
+        copies = [copy.deepcopy(self.mongo_structure) for __ in range(self.REPEAT + 1)]
+        result = structure_from_mongo(copies.pop(), validation)
+        elapsed = timeit.timeit(lambda: structure_from_mongo(copies.pop(), validation), number=self.REPEAT)
+        return result, elapsed / self.REPEAT
+
+    def test_validation_modes(self):
+        full, full_time = self._time_conversion(StructureValidation.FULL)
+        for validation in (StructureValidation.SAMPLED, StructureValidation.NONE):
+            converted, elapsed = self._time_conversion(validation)
+            self.assertEqual(full, converted)
+            log.info(
+                "structure_from_mongo over %d blocks: full %.2fms, %s %.2fms",
+                len(full['blocks']), full_time * 1000, validation, elapsed * 1000
+            )
+
+
+class TestStructureValidation(unittest.TestCase):
+    """
+    Check which parts of a structure each validation mode checks, as the benchmarks above rely on.
+    """
+    def setUp(self):
+        super(TestStructureValidation, self).setUp()
+        self.structure = make_structure(num_units=20)
+        self.num_blocks = len(self.structure['blocks'])
+
+    def _checks(self, convert, structure, validation):
+        """
+        Return the number of times the structure's blocks collection was checked, and the number of
+        blocks which were checked, while converting the structure
+        """
+        blocks = structure['blocks']
+        with patch.object(mongo_connection, 'check', wraps=mongo_connection.check) as mock_check:
+            convert(structure, validation)
+        checked = [call[0][1] for call in mock_check.call_args_list]
+        return (
+            len([value for value in checked if value is blocks]),
+            len([value for value in checked if isinstance(value, dict) and value is not blocks]),
+        )
+
+    def test_sampled_checks_only_sampled_blocks(self):
+        mongo_structure = structure_to_mongo(self.structure, StructureValidation.NONE)
+        for convert, structure in ((structure_to_mongo, self.structure), (structure_from_mongo, mongo_structure)):
+            # the blocks collection's type is checked, but not each of its blocks
+            self.assertEqual(
+                self._checks(convert, structure, StructureValidation.SAMPLED), (1, VALIDATION_SAMPLE_SIZE)
+            )
+
+    def test_full_checks_every_block(self):
+        self.assertEqual(
+            self._checks(structure_to_mongo, self.structure, StructureValidation.FULL), (1, self.num_blocks)
+        )
+
+        mongo_structure = structure_to_mongo(self.structure, StructureValidation.NONE)
+        mongo_structure['blocks'][-1]['fields']['children'] = [['vertical']]
+        with self.assertRaises(ContractNotRespected):
+            structure_from_mongo(mongo_structure, StructureValidation.FULL)
+
+    def test_none_checks_nothing(self):
+        self.assertEqual(self._checks(structure_to_mongo, self.structure, StructureValidation.NONE), (0, 0))
+
+
+@attr('benchmark')
+class TestHasChangesPerformance(unittest.TestCase):
+    """
+    Compare checking every block of a ~20k block course for unpublished changes with a
+    recursive walk of each block's subtree, and with the course's precomputed changed blocks.
+    """
+    def setUp(self):
+        super(TestHasChangesPerformance, self).setUp()
+        self.published = make_structure()
+        self.draft = copy.deepcopy(self.published)
+        self.draft['_id'] = ObjectId()
+        # change one problem in every tenth unit
+        for block_key, block in self.draft['blocks'].iteritems():
+            if block_key.type == 'problem' and block_key.id.endswith('0_0'):
+                block['edit_info'] = {'update_version': ObjectId()}
+        self.store = DraftVersioningModuleStore.__new__(DraftVersioningModuleStore)
+        self.store.db_connection = Mock(structure_cache=StructureCache())
+
+    def _time_outline(self, cached):
+        """
+        Return the changed blocks and the time taken to check each block in the outline
+        """
+        cache = self.store.db_connection.structure_cache
+        cache.clear()
+        if cached:
+            cache.set(self.draft['_id'], self.draft, 1)
+            cache.set(self.published['_id'], self.published, 1)
+        outline_blocks = [
+            block_key for block_key in self.draft['blocks']
+            if block_key.type in ('course', 'chapter', 'sequential', 'vertical')
+        ]
+
+        # pylint: disable=protected-access
+        def check_outline():
+            """ Check each block in the outline for changes, as the course outline does """
+            changed_blocks = self.store._get_changed_blocks(self.draft, self.published)
+            if changed_blocks is not None:
+                return [block_key for block_key in outline_blocks if block_key in changed_blocks]
+            return [
+                block_key for block_key in outline_blocks
+                if self.store._has_changes_subtree(self.draft, self.published, block_key, {})
+            ]
+
+        start = timeit.default_timer()
+        result = check_outline()
+        return result, timeit.default_timer() - start
+
+    def test_outline(self):
+        walked, walk_time = self._time_outline(False)
+        precomputed, precomputed_time = self._time_outline(True)
+        self.assertItemsEqual(walked, precomputed)
+        self.assertEqual(len([block_key for block_key in precomputed if block_key.type == 'vertical']), 200)
+        log.info(
+            "has_changes over the outline of %d blocks: walking subtrees %.2fms, precomputed %.2fms",
+            len(self.draft['blocks']), walk_time * 1000, precomputed_time * 1000
+        )
@@ -0,0 +1,269 @@
+"""
+Tests of the in-process and shared caching of split-mongo structures.
+"""
+import unittest
+from bson.objectid import ObjectId
+from mock import MagicMock
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.split_draft import DraftVersioningModuleStore
+from xmodule.modulestore.split_mongo.structure_cache import StructureCache
+from xmodule.modulestore.split_mongo.structure_indexes import build_parent_index
+
+
+class DictCache(dict):
+    """
+    A stand-in for a django cache backend.
+    """
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument, arguments-differ
+        self[key] = value
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of :class:`.StructureCache`
+    """
+    def setUp(self):
+        super(TestStructureCache, self).setUp()
+        self.cache = StructureCache(max_size=100)
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get(ObjectId()))
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_hit_returns_same_object(self):
+        key = ObjectId()
+        structure = {'_id': key, 'blocks': {}}
+        self.cache.set(key, structure, 10)
+        self.assertIs(self.cache.get(key), structure)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_lru_eviction(self):
+        keys = [ObjectId() for __ in range(4)]
+        for key in keys[:3]:
+            self.cache.set(key, {'_id': key}, 40)
+        # the oldest entry was pushed out to make room for the third one
+        self.assertNotIn(keys[0], self.cache)
+        self.assertEqual(self.cache.evictions, 1)
+
+        # touching keys[1] makes keys[2] the least recently used entry
+        self.cache.get(keys[1])
+        self.cache.set(keys[3], {'_id': keys[3]}, 40)
+        self.assertIn(keys[1], self.cache)
+        self.assertNotIn(keys[2], self.cache)
+        self.assertEqual(self.cache.current_size, 80)
+
+    def test_oversized_structure_not_cached(self):
+        key = ObjectId()
+        self.cache.set(key, {'_id': key}, 1000)
+        self.assertNotIn(key, self.cache)
+        self.assertEqual(self.cache.current_size, 0)
+
+    def test_replace_drops_derived_data(self):
+        key = ObjectId()
+        self.cache.set(key, {'_id': key}, 10)
+        self.cache.get_entry(key).derived['index'] = 'stale'
+        self.cache.set(key, {'_id': key}, 10)
+        self.assertEqual(self.cache.get_entry(key).derived, {})
+        self.assertEqual(self.cache.current_size, 10)
+
+    def test_derived_data_computed_once(self):
+        key = ObjectId()
+        structure = {'_id': key}
+        builder = MagicMock(return_value={'derived': 'data'})
+        self.cache.set(key, structure, 10)
+        self.assertEqual(self.cache.get_derived(structure, 'index', builder), {'derived': 'data'})
+        self.assertEqual(self.cache.get_derived(structure, 'index', builder), {'derived': 'data'})
+        builder.assert_called_once_with(structure)
+
+    def test_no_derived_data_for_uncached_structure(self):
+        key = ObjectId()
+        self.cache.set(key, {'_id': key}, 10)
+        builder = MagicMock()
+        # an equal, but distinct (and so possibly changing) structure isn't indexed
+        self.assertIsNone(self.cache.get_derived({'_id': key}, 'index', builder))
+        self.assertIsNone(self.cache.get_derived({'_id': ObjectId()}, 'index', builder))
+        self.assertFalse(builder.called)
+
+    def test_is_cached(self):
+        key = ObjectId()
+        structure = {'_id': key}
+        self.cache.set(key, structure, 10)
+        self.assertTrue(self.cache.is_cached(structure))
+        self.assertFalse(self.cache.is_cached({'_id': key}))
+        self.assertFalse(self.cache.is_cached({'_id': ObjectId()}))
+
+    def test_shared_tier(self):
+        shared = DictCache()
+        key = ObjectId()
+        structure = {'_id': key, 'root': BlockKey('course', 'course')}
+        StructureCache(max_size=100, shared_cache=shared).set(key, structure, 10)
+
+        other_process = StructureCache(max_size=100, shared_cache=shared)
+        self.assertEqual(other_process.get(key), structure)
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+        # the second lookup is served from memory
+        other_process.get(key)
+        self.assertEqual(other_process.stats()['hits'], 1)
+
+
+class TestMongoConnectionStructureCache(unittest.TestCase):
+    """
+    Tests that :class:`.MongoConnection` only decodes a structure once.
+    """
+    def setUp(self):
+        super(TestMongoConnectionStructureCache, self).setUp()
+        self.connection = MongoConnection.__new__(MongoConnection)
+        self.connection.structures = MagicMock(name='structures')
+        self.connection.structure_cache = StructureCache()
+        self.structure_id = ObjectId()
+        self.connection.structures.find_one.side_effect = lambda query: {
+            '_id': self.structure_id,
+            'root': ['course', 'course'],
+            'blocks': [{'block_type': 'course', 'block_id': 'course', 'fields': {'children': []}}],
+        }
+
+    def test_get_structure_is_cached(self):
+        first = self.connection.get_structure(self.structure_id)
+        second = self.connection.get_structure(self.structure_id)
+        self.assertIs(first, second)
+        self.assertEqual(self.connection.structures.find_one.call_count, 1)
+        self.assertIn(BlockKey('course', 'course'), first['blocks'])
+
+    def test_missing_structure(self):
+        self.connection.structures.find_one.side_effect = lambda query: None
+        self.assertIsNone(self.connection.get_structure(self.structure_id))
+        self.assertNotIn(self.structure_id, self.connection.structure_cache)
+
+    def test_insert_structure_populates_cache(self):
+        structure = {
+            '_id': self.structure_id,
+            'root': BlockKey('course', 'course'),
+            'blocks': {BlockKey('course', 'course'): {'block_type': 'course', 'fields': {}}},
+        }
+        self.connection.insert_structure(structure)
+        self.assertIs(self.connection.get_structure(self.structure_id), structure)
+        self.assertFalse(self.connection.structures.find_one.called)
+
+
+class TestStructureIndexes(unittest.TestCase):
+    """
+    Tests of the indexes built over a structure's blocks.
+    """
+    def setUp(self):
+        super(TestStructureIndexes, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.html = BlockKey('html', 'html')
+        self.orphan = BlockKey('html', 'orphan')
+        self.structure = {
+            '_id': ObjectId(),
+            'root': self.course,
+            'blocks': {
+                self.course: {'block_type': 'course', 'fields': {'children': [self.chapter]}},
+                self.chapter: {'block_type': 'chapter', 'fields': {'children': [self.html]}},
+                self.html: {'block_type': 'html', 'fields': {}},
+                self.orphan: {'block_type': 'html', 'fields': {}},
+            },
+        }
+
+    def test_parent_index(self):
+        parents = build_parent_index(self.structure)
+        self.assertEqual(parents, {self.chapter: self.course, self.html: self.chapter})
+        self.assertNotIn(self.orphan, parents)
+
+
+class TestChangedBlocks(unittest.TestCase):
+    """
+    Tests of the set of blocks with unpublished changes computed by :class:`.DraftVersioningModuleStore`.
+    """
+    def setUp(self):
+        super(TestChangedBlocks, self).setUp()
+        self.store = DraftVersioningModuleStore.__new__(DraftVersioningModuleStore)
+        self.store.db_connection = MagicMock(structure_cache=StructureCache())
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.unit = BlockKey('vertical', 'unit')
+        self.problem = BlockKey('problem', 'problem')
+        self.other_unit = BlockKey('vertical', 'other_unit')
+        self.published = self._structure(
+            (self.course, [self.chapter]),
+            (self.chapter, [self.unit, self.other_unit]),
+            (self.unit, [self.problem]),
+            (self.problem, []),
+            (self.other_unit, []),
+        )
+
+    def _structure(self, *blocks, **versions):
+        """
+        Return a structure of the given (block_key, children) whose versions default to 'v1'.
+        """
+        return {
+            '_id': ObjectId(),
+            'root': self.course,
+            'blocks': dict(
+                (block_key, {
+                    'fields': {'children': children},
+                    'edit_info': {'update_version': versions.get(block_key.id, 'v1')},
+                })
+                for block_key, children in blocks
+            ),
+        }
+
+    def _cache(self, *structures):
+        """ Put the structures in the store's structure cache """
+        for structure in structures:
+            self.store.db_connection.structure_cache.set(structure['_id'], structure, 1)
+
+    def test_changes_propagate_to_ancestors(self):
+        draft = self._structure(
+            (self.course, [self.chapter]),
+            (self.chapter, [self.unit, self.other_unit]),
+            (self.unit, [self.problem]),
+            (self.problem, []),
+            (self.other_unit, []),
+            problem='v2',
+        )
+        self._cache(draft, self.published)
+        changed = self.store._get_changed_blocks(draft, self.published)  # pylint: disable=protected-access
+        self.assertEqual(changed, set([self.course, self.chapter, self.unit, self.problem]))
+        # computed once for the pair of versions
+        self.assertIs(
+            changed, self.store._get_changed_blocks(draft, self.published)  # pylint: disable=protected-access
+        )
+
+    def test_unpublished_block(self):
+        new_problem = BlockKey('problem', 'new')
+        draft = self._structure(
+            (self.course, [self.chapter]),
+            (self.chapter, [self.unit, self.other_unit]),
+            (self.unit, [self.problem]),
+            (self.problem, []),
+            (self.other_unit, [new_problem]),
+            (new_problem, []),
+        )
+        self._cache(draft, self.published)
+        changed = self.store._get_changed_blocks(draft, self.published)  # pylint: disable=protected-access
+        self.assertEqual(changed, set([self.course, self.chapter, self.other_unit, new_problem]))
+
+    def test_no_changes(self):
+        self._cache(self.published)
+        self.assertEqual(
+            self.store._get_changed_blocks(self.published, self.published),  # pylint: disable=protected-access
+            frozenset()
+        )
+
+    def test_uncached_structures(self):
+        draft = self._structure((self.course, []), course='v2')
+        # the structures may still be changing, so the changes aren't computed
+        self._cache(draft)
+        self.assertIsNone(self.store._get_changed_blocks(draft, self.published))  # pylint: disable=protected-access
+        self.assertTrue(
+            self.store._has_changes_subtree(draft, self.published, self.course, {})  # pylint: disable=protected-access
+        )
+        self.assertFalse(
+            self.store._has_changes_subtree(  # pylint: disable=protected-access
+                self.published, self.published, self.course, {}
+            )
+        )
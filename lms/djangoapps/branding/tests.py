@@ -9,7 +9,9 @@ from django.test.utils import override_settings
 from django.test.client import RequestFactory
 from pytz import UTC
 
+from branding import get_visible_courses
 from branding.views import index
+from openedx.core.djangoapps.course_overviews.models import CourseOverview
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from edxmako.tests import mako_middleware_process_request
 import student.views
@@ -59,6 +61,11 @@ class AnonymousIndexPageTest(ModuleStoreTestCase):
         response = self.client.get('/')
         self.assertEqual(response.status_code, 200)
 
+    def test_visible_courses_are_overviews(self):
+        courses = get_visible_courses()
+        self.assertEqual([course.id for course in courses], [self.course.id])
+        self.assertIsInstance(courses[0], CourseOverview)
+
     def test_allow_x_frame_options(self):
         """
         Check the x-frame-option response header
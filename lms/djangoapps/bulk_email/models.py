@@ -12,6 +12,10 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+from uuid import uuid4
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -149,6 +153,77 @@ class Optout(models.Model):
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
+# The slots of a course email template which are filled in for each recipient
+RECIPIENT_SLOTS = ('name', 'email')
+
+
+class CompiledEmailTemplate(object):
+    """
+    A course email template and message body rendered with everything but the
+    recipient-specific slots (e.g. name and email), so that it can be rendered
+    for each recipient of the email without reformatting and rewrapping the
+    whole message.
+
+    Rendering it gives exactly the result of `CourseEmailTemplate._render`.
+    """
+    def __init__(self, format_string, message_body, context, slots=RECIPIENT_SLOTS):
+        self.format_string = format_string
+        self.message_body = message_body
+        self.slots = slots
+        self._lines = self._compile(format_string, message_body, context, slots)
+
+    @staticmethod
+    def _compile(format_string, message_body, context, slots):
+        """
+        Return a list of the message's lines (grouped into wrapped chunks where they have
+        no slots) and lists of the literal parts and slots of the lines with slots.
+
+        Returns None if the template uses the slots in a way that can't be left open
+        (e.g. with a format spec), in which case each message is rendered in full.
+        """
+        for __, field_name, format_spec, conversion in Formatter().parse(format_string):
+            if field_name is None or re.split(r'[.\[]', field_name)[0] not in slots:
+                continue
+            if field_name not in slots or format_spec or conversion:
+                return None
+
+        # format the template with a marker (which won't appear in the message) in each slot
+        marker = uuid4().hex
+        slot_context = dict(context)
+        slot_context.update((slot, u'\x00{}{}\x00'.format(marker, slot)) for slot in slots)
+        message = CourseEmailTemplate.fill(format_string, message_body, slot_context)
+        slot_pattern = re.compile(u'\x00{}({})\x00'.format(marker, '|'.join(re.escape(slot) for slot in slots)))
+
+        lines = []
+        literal_lines = []
+        for line in message.split('\n'):
+            parts = slot_pattern.split(line)
+            if len(parts) == 1:
+                literal_lines.append(line)
+                continue
+            if literal_lines:
+                lines.append(wrap_message('\n'.join(literal_lines)))
+                literal_lines = []
+            lines.append(parts)
+        if literal_lines:
+            lines.append(wrap_message('\n'.join(literal_lines)))
+        return lines
+
+    def render(self, context):
+        """
+        Return the message rendered with the slot values in `context`.
+        """
+        if self._lines is None:
+            # pylint: disable=protected-access
+            return CourseEmailTemplate._render(self.format_string, self.message_body, context)
+        values = dict((slot, unicode(context[slot])) for slot in self.slots)
+        return u'\n'.join(
+            # literal parts and slots alternate in the split lines
+            wrap_message(u''.join(values[part] if index % 2 else part for index, part in enumerate(line)))
+            if isinstance(line, list) else line
+            for line in self._lines
+        )
+
 
 class CourseEmailTemplate(models.Model):
     """
@@ -197,6 +272,15 @@ class CourseEmailTemplate(models.Model):
         Such encoding is left to the email code, which will use the value
         of settings.DEFAULT_CHARSET to encode the message.
         """
+        # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
+        return wrap_message(CourseEmailTemplate.fill(format_string, message_body, context))
+
+    @staticmethod
+    def fill(format_string, message_body, context):
+        """
+        Return the template formatted with `context`, with the message body inserted
+        (but not yet wrapped).
+        """
         # If we wanted to support substitution, we'd call:
         # format_string = format_string.replace(COURSE_EMAIL_MESSAGE_BODY_TAG, message_body)
         result = format_string.format(**context)
@@ -204,10 +288,7 @@ class CourseEmailTemplate(models.Model):
         # "formatted", so we need to do the same to the tag being
         # searched for.
         message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
-        result = result.replace(message_body_tag, message_body, 1)
-
-        # finally, return the result, after wrapping long lines and without converting to an encoded byte array.
-        return wrap_message(result)
+        return result.replace(message_body_tag, message_body, 1)
 
     def render_plaintext(self, plaintext, context):
         """
@@ -227,6 +308,20 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Return a `CompiledEmailTemplate` of the plain text message, rendered with the
+        values in `context` which are the same for all of its recipients.
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Return a `CompiledEmailTemplate` of the HTML text message, rendered with the
+        values in `context` which are the same for all of its recipients.
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -256,6 +351,21 @@ class CourseAuthorization(models.Model):
         except cls.DoesNotExist:
             return False
 
+    @classmethod
+    def instructor_email_enabled_courses(cls, course_ids):
+        """
+        Returns the set of the given course ids for which email is enabled, with
+        at most one query for all the courses.
+
+        See `instructor_email_enabled`.
+        """
+        if not settings.FEATURES['REQUIRE_COURSE_EMAIL_AUTH']:
+            return set(course_ids)
+
+        return set(
+            record.course_id for record in cls.objects.filter(course_id__in=course_ids, email_enabled=True)
+        )
+
     def __unicode__(self):
         not_en = "Not "
         if self.email_enabled:
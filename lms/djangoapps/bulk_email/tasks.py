@@ -449,78 +449,75 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         connection = get_connection()
         connection.open()
 
-        # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
-        email_context.update(global_email_context)
+        # Render everything but the recipient-specific values of the messages once
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, global_email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, global_email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
-            # That way, the to_list will always contain the recipients remaining to be emailed.
-            # This is convenient for retries, which will need to send to those who haven't
-            # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
             # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
+            # but if a task has been retried for rate-limiting reasons, then we send
+            # one email at a time, and sleep for a period of time between them.  Choice of
             # the value depends on the number of workers that might be sending email in
             # parallel, and what the SES throttle rate is.
             if subtask_status.retried_nomax > 0:
                 sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
-
-            try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+                batch_size = 1
+            else:
+                batch_size = settings.BULK_EMAIL_SEND_BATCH_SIZE
+
+            # Create emails for the users at the end of the list.  Each user is popped off
+            # of the to_list once they have been processed.  That way, the to_list will always
+            # contain the recipients remaining to be emailed.  This is convenient for retries,
+            # which will need to send to those who haven't yet been emailed, but not send to
+            # those who have already been sent to.
+            batch = [
+                _create_email(recipient, subject, from_addr, plaintext_template, html_template, connection)
+                for recipient in reversed(to_list[-batch_size:])
+            ]
+
+            while batch:
+                log.debug('Emails with id %s to be sent to %s', email_id, [email_msg.to[0] for email_msg in batch])
+                with dog_stats_api.timer('course_email.batch_send.time.overall', tags=[_statsd_tag(course_title)]):
+                    num_sent, exc = _send_batch(connection, batch)
+
+                for email_msg in batch[:num_sent]:
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email_msg.to[0])
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email_msg.to[0])
+                    subtask_status.increment(succeeded=1)
+                    to_list.pop()
+                batch = batch[num_sent:]
+                if exc is None:
+                    continue
+
+                email = batch[0].to[0]
+                if isinstance(exc, SMTPDataError):
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.
+                    # 5xx range indicates hard failure.
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        raise exc
                     # This will fall through and not retry the message.
-                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
-                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                    subtask_status.increment(failed=1)
-
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
+                    log.warning(
+                        'Task %s: email with id %s not delivered to %s due to error %s',
+                        task_id, email_id, email, exc.smtp_error
+                    )
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
+                    # This will fall through and not retry the message.
+                    log.warning(
+                        'Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc
+                    )
+                else:
+                    raise exc
                 dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                 subtask_status.increment(failed=1)
-
-            else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
-                else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
-
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            to_list.pop()
+                # Pop the user that was emailed off the end of the list only once they have
+                # been processed.  (That way, if there were a failure that
+                # needed to be retried, the user is still on the list.)
+                to_list.pop()
+                batch = batch[1:]
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -579,6 +576,54 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         connection.close()
 
 
+class CourseEmailMessage(EmailMultiAlternatives):
+    """
+    The email sent to a single recipient of a course email.
+
+    This records when the connection sending it starts to do so, so that the recipient
+    of a batch of messages whose sending failed can be identified.
+    """
+    started = False
+
+    def message(self):
+        self.started = True
+        return super(CourseEmailMessage, self).message()
+
+
+def _create_email(recipient, subject, from_addr, plaintext_template, html_template, connection):
+    """
+    Return a CourseEmailMessage to `recipient` (a dict of their 'email' and 'profile__name'),
+    rendered from the compiled plain text and HTML templates.
+    """
+    email_context = {'name': recipient['profile__name'], 'email': recipient['email']}
+    email_msg = CourseEmailMessage(
+        subject,
+        plaintext_template.render(email_context),
+        from_addr,
+        [recipient['email']],
+        connection=connection
+    )
+    email_msg.attach_alternative(html_template.render(email_context), 'text/html')
+    return email_msg
+
+
+def _send_batch(connection, messages):
+    """
+    Send the CourseEmailMessages over the connection, stopping at the first error.
+
+    Returns a tuple of the number of messages which were sent, and the exception raised
+    sending the next one (or None if they were all sent).
+    """
+    try:
+        connection.send_messages(messages)
+    except Exception as exc:  # pylint: disable=broad-except
+        # Backends serialize each message just before sending it, so the message which
+        # failed is the last one to have been started.
+        num_started = sum(1 for message in messages if message.started)
+        return max(num_started - 1, 0), exc
+    return len(messages), None
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -116,6 +116,49 @@ class TestEmailErrors(ModuleStoreTestCase):
         self.assertEquals(subtask_status.failed, expected_fails)
         self.assertEquals(subtask_status.succeeded, settings.BULK_EMAIL_EMAILS_PER_TASK - expected_fails)
 
+    @override_settings(BULK_EMAIL_SEND_BATCH_SIZE=7)
+    @patch('bulk_email.tasks.get_connection', autospec=True)
+    @patch('bulk_email.tasks.update_subtask_status')
+    @patch('bulk_email.tasks.send_course_email.retry')
+    def test_data_err_fail_batched(self, retry, result, get_conn):
+        """
+        Test that a permanent SMTPDataError only fails its own message of a batch.
+        """
+        errors = cycle([SMTPDataError(554, "Email address is blacklisted"), None, None, None])
+        sent = []
+
+        def send_messages(messages):
+            """ Send the messages as the smtp backend does, failing every fourth one """
+            for message in messages:
+                message.message()
+                error = next(errors)
+                if error:
+                    raise error
+                sent.append(message.to[0])
+
+        get_conn.return_value.send_messages.side_effect = send_messages
+        students = [UserFactory() for _ in xrange(settings.BULK_EMAIL_EMAILS_PER_TASK)]
+        for student in students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id)
+
+        test_email = {
+            'action': 'Send email',
+            'send_to': 'all',
+            'subject': 'test subject for all',
+            'message': 'test message for all'
+        }
+        response = self.client.post(self.send_mail_url, test_email)
+        self.assertEquals(json.loads(response.content), self.success_content)
+
+        self.assertFalse(retry.called)
+        ((_entry_id, _current_task_id, subtask_status), _kwargs) = result.call_args
+        expected_fails = int((settings.BULK_EMAIL_EMAILS_PER_TASK + 3) / 4.0)
+        self.assertEquals(subtask_status.failed, expected_fails)
+        self.assertEquals(subtask_status.succeeded, settings.BULK_EMAIL_EMAILS_PER_TASK - expected_fails)
+        # every message was attempted exactly once
+        self.assertEquals(len(set(sent)), len(sent))
+        self.assertLess(get_conn.return_value.send_messages.call_count, settings.BULK_EMAIL_EMAILS_PER_TASK)
+
     @patch('bulk_email.tasks.get_connection', autospec=True)
     @patch('bulk_email.tasks.send_course_email.retry')
     def test_disconn_err_retry(self, retry, get_conn):
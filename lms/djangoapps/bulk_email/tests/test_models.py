@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 """
 Unit tests for bulk-email-related models.
 """
@@ -130,6 +131,25 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_templates(self):
+        template = CourseEmailTemplate.get_template()
+        global_context = self._get_sample_html_context()
+        del global_context['email']
+        # long enough that its lines need wrapping
+        message = u"My {name} text is ｲ乇丂ｲ " * 200 + u"\n" + u"ﾶ乇丂丂ﾑg乇" * 200
+        compiled_plaintext = template.compile_plaintext(message, global_context)
+        compiled_htmltext = template.compile_htmltext(message, global_context)
+        for name, email in ((u"Robot", u"robot@example.com"), (u"ｷo尺 ﾑﾚﾚ " * 200, u"long@example.com")):
+            context = dict(global_context, name=name, email=email)
+            self.assertEquals(compiled_plaintext.render(context), template.render_plaintext(message, context))
+            self.assertEquals(compiled_htmltext.render(context), template.render_htmltext(message, context))
+
+    def test_compiled_template_with_format_spec(self):
+        template = CourseEmailTemplate(plain_template=u"{name!r} <{email:>20}>\n{{message_body}}")
+        compiled = template.compile_plaintext(u"My text.", {})
+        context = {'name': u"Robot", 'email': u"robot@example.com"}
+        self.assertEquals(compiled.render(context), template.render_plaintext(u"My text.", context))
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of sending a course email over SMTP, against a fake SMTP server running in
+this process. Run it with ``-a benchmark`` to see the timings.
+"""
+import asyncore
+import logging
+import smtpd
+import threading
+import timeit
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from nose.plugins.attrib import attr
+
+from bulk_email.models import CourseEmail, SEND_TO_ALL
+from bulk_email.tasks import _send_course_email
+from instructor_task.subtasks import SubtaskStatus
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from student.tests.factories import UserFactory
+
+log = logging.getLogger(__name__)
+
+
+class FakeSMTPServer(smtpd.SMTPServer):
+    """
+    An SMTP server on a free local port, which counts the messages it receives.
+    """
+    def __init__(self):
+        smtpd.SMTPServer.__init__(self, ('localhost', 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.received = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _serve(self):
+        """ Handle connections until the server is stopped """
+        while self._running:
+            asyncore.loop(timeout=0.01, count=1)
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        self.received += 1
+
+    def stop(self):
+        """ Stop serving, and close the server's socket """
+        self._running = False
+        self._thread.join()
+        self.close()
+
+
+@attr('benchmark')
+class TestSendCourseEmailPerformance(TestCase):
+    """
+    Compare sending a course email by rendering and sending each message in turn, with
+    sending it from compiled templates in batches.
+    """
+    NUM_RECIPIENTS = 500
+
+    def setUp(self):
+        super(TestSendCourseEmailPerformance, self).setUp()
+        call_command("loaddata", "course_email_template.json")
+        self.server = FakeSMTPServer()
+        self.addCleanup(self.server.stop)
+        self.course_email = CourseEmail.create(
+            SlashSeparatedCourseKey('edX', 'bench', '2014'), UserFactory.create(), SEND_TO_ALL,
+            u"Benchmark", u"<p>A course update for ｷo尺 ﾑﾚﾚ of you.</p>" * 50, u"A course update." * 50
+        )
+        self.global_email_context = {
+            'course_title': u"Benchmark Course",
+            'course_url': u"https://example.com/courses/edX/bench/2014",
+            'course_image_url': u"https://example.com/image.png",
+            'account_settings_url': u"https://example.com/account/settings",
+            'platform_name': u"edX",
+        }
+        self.to_list = [
+            {'pk': num, 'email': u'student{}@example.com'.format(num), 'profile__name': u'Student {}'.format(num)}
+            for num in xrange(self.NUM_RECIPIENTS)
+        ]
+
+    def _send_each(self):
+        """ Render and send each message in turn, as course emails were sent before they were batched """
+        template = self.course_email.get_template()
+        connection = get_connection()
+        connection.open()
+        try:
+            for recipient in self.to_list:
+                context = dict(self.global_email_context, name=recipient['profile__name'], email=recipient['email'])
+                email_msg = EmailMultiAlternatives(
+                    self.course_email.subject,
+                    template.render_plaintext(self.course_email.text_message, context),
+                    u'bench@example.com',
+                    [recipient['email']],
+                    connection=connection
+                )
+                email_msg.attach_alternative(
+                    template.render_htmltext(self.course_email.html_message, context), 'text/html'
+                )
+                connection.send_messages([email_msg])
+        finally:
+            connection.close()
+
+    def _send_batched(self):
+        """ Send the messages as _send_course_email does """
+        subtask_status, exc = _send_course_email(
+            0, self.course_email.id, list(self.to_list), self.global_email_context, SubtaskStatus.create('bench')
+        )
+        self.assertIsNone(exc)
+        self.assertEquals(subtask_status.succeeded, self.NUM_RECIPIENTS)
+
+    def test_send(self):
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='localhost',
+            EMAIL_PORT=self.server.port,
+            EMAIL_USE_TLS=False,
+            BULK_EMAIL_SEND_BATCH_SIZE=20,
+        ):
+            each_time = timeit.timeit(self._send_each, number=1)
+            batched_time = timeit.timeit(self._send_batched, number=1)
+        self.assertEquals(self.server.received, 2 * self.NUM_RECIPIENTS)
+        log.info(
+            "Sending a course email to %d recipients: one at a time %.2fs, batched %.2fs",
+            self.NUM_RECIPIENTS, each_time, batched_time
+        )
@@ -147,17 +147,23 @@ def certificate_status_for_student(student, course_id):
     grade for the course with the key "grade".
     '''
 
-    try:
-        generated_certificate = GeneratedCertificate.objects.get(
-            user=student, course_id=course_id)
-        d = {'status': generated_certificate.status,
-             'mode': generated_certificate.mode}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
-    except GeneratedCertificate.DoesNotExist:
-        pass
-    return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+    return certificate_status(GeneratedCertificate.certificate_for_student(student, course_id))
+
+
+def certificate_status(generated_certificate):
+    '''
+    This returns the dictionary described by certificate_status_for_student for
+    a GeneratedCertificate which has already been loaded, or None if the student
+    doesn't have one.
+    '''
+    if generated_certificate is None:
+        return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+
+    d = {'status': generated_certificate.status,
+         'mode': generated_certificate.mode}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+
+    return d
@@ -25,6 +25,7 @@ from student.roles import (
 )
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
 from opaque_keys.edx.keys import CourseKey, UsageKey
+from openedx.core.djangoapps.course_overviews.models import CourseOverview
 DEBUG_ACCESS = False
 
 log = logging.getLogger(__name__)
@@ -71,7 +72,7 @@ def has_access(user, action, obj, course_key=None):
 
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
-    if isinstance(obj, CourseDescriptor):
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
         return _has_access_course_desc(user, action, obj)
 
     if isinstance(obj, ErrorDescriptor):
@@ -102,7 +103,7 @@ def has_access(user, action, obj, course_key=None):
 # ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
-    Check if user has access to a course descriptor.
+    Check if user has access to a course descriptor (or the CourseOverview of the course).
 
     Valid actions:
 
@@ -293,7 +294,8 @@ def _has_access_descriptor(user, action, descriptor, course_key=None):
             return True
 
         # Check start date
-        if 'detached' not in descriptor._class_tags and descriptor.start is not None:
+        # (course overviews aren't XBlocks, and courses are never detached)
+        if 'detached' not in getattr(descriptor, '_class_tags', ()) and descriptor.start is not None:
             now = datetime.now(UTC())
             effective_start = _adjust_start_date_for_beta_testers(
                 user,
@@ -1,12 +1,15 @@
-from collections import defaultdict
+from collections import defaultdict, Counter
 from fs.errors import ResourceNotFoundError
 import logging
 import inspect
 
+from crum import get_current_request
 from path import path
 from django.http import Http404
 from django.conf import settings
 
+import dogstats_wrapper as dog_stats_api
+
 from edxmako.shortcuts import render_to_string
 from xmodule.modulestore import ModuleStoreEnum
 from opaque_keys.edx.keys import CourseKey
@@ -17,15 +20,21 @@ from static_replace import replace_static_urls
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.x_module import STUDENT_VIEW
 from microsite_configuration import microsite
+from request_cache.middleware import RequestCache
 
 from courseware.access import has_access
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module
 from student.models import CourseEnrollment
+from openedx.core.djangoapps.course_overviews.models import CourseOverview
 import branding
 
 log = logging.getLogger(__name__)
 
+# Counts of the get_course_by_id lookups served from the request cache ('hits', each of
+# which saved a modulestore round-trip) and passed on to the modulestore ('misses')
+COURSE_REQUEST_CACHE_STATS = Counter()
+
 
 def get_request_for_thread():
     """Walk up the stack, return the nearest first argument named "request"."""
@@ -66,14 +75,47 @@ def get_course_by_id(course_key, depth=0):
     If such a course does not exist, raises a 404.
 
     depth: The number of levels of children for the modulestore to cache. None means infinite depth
+
+    Within a request, each course is only looked up once for each depth (until it's edited).
     """
-    with modulestore().bulk_operations(course_key):
-        course = modulestore().get_course(course_key, depth=depth)
-    if course:
-        return course
-    else:
+    store = modulestore()
+    cached_courses = _get_request_course_cache()
+    cache_key = (course_key, depth)
+    edit_count = store.get_course_edit_count(course_key)
+    if cached_courses is not None:
+        cached_course, cached_edit_count = cached_courses.get(cache_key, (None, None))
+        if cached_course is not None and cached_edit_count == edit_count:
+            _record_course_request_cache('hits')
+            return cached_course
+
+    with store.bulk_operations(course_key):
+        course = store.get_course(course_key, depth=depth)
+    if not course:
         raise Http404("Course not found.")
 
+    if cached_courses is not None:
+        _record_course_request_cache('misses')
+        cached_courses[cache_key] = (course, edit_count)
+    return course
+
+
+def _get_request_course_cache():
+    """
+    Return the dict of (course, edit count) cached by get_course_by_id for the current request,
+    or None outside of a request (where there's nothing to clear the request cache).
+    """
+    if get_current_request() is None:
+        return None
+    return RequestCache.get_request_cache().data.setdefault('courseware.courses.course', {})
+
+
+def _record_course_request_cache(result):
+    """
+    Count a hit or miss of the course request cache.
+    """
+    COURSE_REQUEST_CACHE_STATS[result] += 1
+    dog_stats_api.increment('courseware.course_request_cache.{}'.format(result))
+
 
 class UserNotEnrolled(Http404):
     def __init__(self, course_key):
@@ -120,6 +162,9 @@ def get_opt_course_with_access(user, action, course_key):
 def course_image_url(course):
     """Try to look up the image url for the course.  If it's not found,
     log an error and return the dead link"""
+    if isinstance(course, CourseOverview):
+        # computed when the overview was created
+        return course.course_image_url
     if course.static_asset_path or modulestore().get_modulestore_type(course.id) == ModuleStoreEnum.Type.xml:
         # If we are a static course with the course_image attribute
         # set different than the default, return that path so that
@@ -181,6 +226,10 @@ def get_course_about_section(course, section_key):
     # markup. This can change without effecting this interface when we find a
     # good format for defining so many snippets of text/html.
 
+    if section_key == 'short_description' and isinstance(course, CourseOverview):
+        # the overview holds the short description, so that the catalog doesn't load each course's about module
+        return course.short_description
+
     # TODO: Remove number, instructors from this list
     if section_key in ['short_description', 'description', 'key_dates', 'video',
                        'course_staff_short', 'course_staff_extended',
@@ -344,7 +393,7 @@ def get_courses_by_university(user, domain=None):
 
 def get_courses(user, domain=None):
     '''
-    Returns a list of courses available, sorted by course.number
+    Returns a list of the CourseOverviews of the courses available, sorted by course.number
     '''
     courses = branding.get_visible_courses()
 
@@ -1,32 +1,44 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from itertools import islice
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
-from courseware.model_data import FieldDataCache
+from courseware.access import has_access
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from student.models import anonymous_id_for_user
+from util.query import use_read_replica_if_available
 from xmodule import graders
-from xmodule.graders import Score
+from xmodule.graders import Score, weighted_score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.util.duedate import get_extended_due_date
-from .models import StudentModule
+from .models import StudentModule, PersistentSectionGrade, AnswerDistributionCount, AnswerDistributionBackfill
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
+from xblock.fields import Scope
 
 log = logging.getLogger("edx.courseware")
 
+# The number of students whose state iterate_grades_for loads at once
+GRADING_CHUNK_SIZE = 100
+
+# The maximum score of a problem is cached under a key which changes whenever the problem does
+MAX_SCORE_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):
     """
@@ -72,6 +84,11 @@ def answer_distributions(course_key):
     also allows us to use the read-replica database, which reduces risk of bad
     locking behavior. And quite frankly, it makes this a lot less confusing.
 
+    Once the backfill_answer_distributions command has counted a course's
+    submissions, the report is read from the AnswerDistributionCounts which are
+    kept up to date as StudentModules are saved, rather than from every
+    StudentModule in the course.
+
     Also, we're pulling all available records from the database for this course
     rather than crawling through a student's course-tree -- the latter could
     potentially cause us trouble with A/B testing. The distribution report may
@@ -101,9 +118,27 @@ def answer_distributions(course_key):
 
         return state_keys_to_problem_info[usage_key]
 
+    answer_counts = defaultdict(lambda: defaultdict(int))
+    if AnswerDistributionBackfill.is_backfilled(course_key):
+        # The counts of the course's answers are complete, so they can be read
+        # directly rather than parsing the state of every submission
+        module_state_key_field = AnswerDistributionCount._meta.get_field('module_state_key')
+        for module_state_key, problem_part_id, answer, count in AnswerDistributionCount.counts_read_only(course_key):
+            try:
+                usage_key = module_state_key_field.to_python(module_state_key).map_into_course(course_key)
+                url, display_name = url_and_display_name(usage_key)
+            except (ItemNotFoundError, InvalidKeyError):
+                log.warning(
+                    "Answer Distribution: Item %s answered in course %s not found; "
+                    "its answers will be omitted from the answer distribution CSV.",
+                    module_state_key, course_key
+                )
+                continue
+            answer_counts[(url, display_name, problem_part_id)][answer] += count
+        return answer_counts
+
     # Iterate through all problems submitted for this course in no particular
     # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
     for module in StudentModule.all_submitted_problems_read_only(course_key):
         try:
             state_dict = json.loads(module.state) if module.state else {}
@@ -142,16 +177,20 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, student_module_scores=None,
+          persist_scores=True):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(
+            student, request, course, keep_raw_scores, field_data_cache, student_module_scores, persist_scores
+        )
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, field_data_cache=None, student_module_scores=None,
+           persist_scores=True):
     """
     Unwrapped version of "grade"
 
@@ -169,6 +208,14 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - field_data_cache : an optional FieldDataCache of the student's state for all
+      of the descriptors in course.grading_context['all_descriptors']. If it isn't
+      passed, all of that state is loaded at once when the first section needs it.
+    - student_module_scores : an optional dict of the student's StudentModule scores in the
+      course, as returned by get_student_module_scores. Likewise, it's loaded when needed.
+    - persist_scores : whether to persist the scores of the sections which are graded. Pass
+      False when field_data_cache or student_module_scores may be stale (e.g. read from a
+      replica), since persisted scores are only updated when a score changes.
 
     More information on the format is in the docstring for CourseGrader.
     """
@@ -182,6 +229,15 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    # Sections whose scores were persisted when they were last graded (and which are still
+    # valid for the current course content and grading policy)
+    course_version = _grading_version(course)
+    if course_version is not None:
+        with manual_transaction():
+            persisted_scores = PersistentSectionGrade.get_section_scores(student, course.id, course_version)
+    else:
+        persisted_scores = {}
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -207,54 +263,68 @@ def _grade(student, request, course, keep_raw_scores):
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
-            # If we haven't seen a single problem in the section, we don't have
-            # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+            # Only sections whose scores come entirely from StudentModules (which notify us when
+            # they change) and whose children don't vary can be persisted.
+            can_persist_section = (
+                course_version is not None and not should_grade_section and
+                not settings.GENERATE_PROFILE_SCORES and
+                not any(descriptor.has_dynamic_children() for descriptor in section['xmoduledescriptors'])
+            )
+            if can_persist_section:
+                persisted_section_scores = persisted_scores.get(section_descriptor.location)
+            else:
+                persisted_section_scores = None
 
+            if persisted_section_scores is not None:
+                # None of the section's scores have changed since they were persisted
+                scores = [_score_from_persisted(score) for score in persisted_section_scores]
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
             else:
-                graded_total = Score(0.0, 1.0, True, section_name)
+                if field_data_cache is None:
+                    # Load the student's state for every graded descriptor in the course at once,
+                    # rather than separately for each section and problem
+                    with manual_transaction():
+                        field_data_cache = FieldDataCache(grading_context['all_descriptors'], course.id, student)
+                if student_module_scores is None:
+                    with manual_transaction():
+                        student_module_scores = get_student_module_scores(course.id, [student.id])[student.id]
+
+                if not should_grade_section:
+                    should_grade_section = any(
+                        _has_student_state(field_data_cache, student, descriptor)
+                        for descriptor in section['xmoduledescriptors']
+                    )
+
+                # If we haven't seen a single problem in the section, we don't have
+                # to grade it at all! We can assume 0%
+                if should_grade_section:
+                    scores, persistable_scores = _grade_section(
+                        student, request, course, section_descriptor, submissions_scores, field_data_cache,
+                        student_module_scores
+                    )
+                    _, graded_total = graders.aggregate_scores(scores, section_name)
+                    if keep_raw_scores:
+                        raw_scores += scores
+
+                    if can_persist_section and persist_scores:
+                        with manual_transaction():
+                            PersistentSectionGrade.save_section_scores(
+                                student, course.id, section_descriptor.location, course_version, persistable_scores
+                            )
+                        # If one of the section's scores changed after it was loaded, the scores just
+                        # persisted are stale (and may have overwritten the change's update), so they're
+                        # discarded, to be regraded next time
+                        with manual_transaction():
+                            if not _student_module_scores_unchanged(
+                                    course.id, student, section['xmoduledescriptors'], student_module_scores
+                            ):
+                                PersistentSectionGrade.discard_section_scores(
+                                    student, course.id, section_descriptor.location
+                                )
+                else:
+                    graded_total = Score(0.0, 1.0, True, section_name)
 
             #Add the graded total to totaled_scores
             if graded_total.possible > 0:
@@ -282,6 +352,114 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def _grade_section(student, request, course, section_descriptor, submissions_scores, field_data_cache,
+                   student_module_scores):
+    """
+    Compute the student's scores for each of the problems in the section.
+
+    `field_data_cache` holds the student's state for the course's graded descriptors, and
+    `student_module_scores` the scores from all of the student's StudentModules in the course.
+
+    Returns a tuple of the list of Scores and the equivalent list of score dicts which can be
+    persisted with `PersistentSectionGrade`.
+    """
+    scores = []
+    persistable_scores = []
+    cached_locations = set(descriptor.location for descriptor in field_data_cache.descriptors)
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        if descriptor.location in cached_locations:
+            module_field_data_cache = field_data_cache
+        else:
+            # e.g. a dynamic child, whose state wasn't loaded with the rest of the course
+            with manual_transaction():
+                module_field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, module_field_data_cache, course.id)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+            student_module_scores=student_module_scores
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        persistable_score = {
+            'location': module_descriptor.location.to_deprecated_string(),
+            'earned': correct,
+            'possible': total,
+            'weight': module_descriptor.weight,
+            'graded': module_descriptor.graded,
+            'display_name': module_descriptor.display_name_with_default,
+        }
+        persistable_scores.append(persistable_score)
+        scores.append(_score_from_persisted(persistable_score))
+
+    return scores, persistable_scores
+
+
+def _has_student_state(field_data_cache, student, descriptor):
+    """
+    Return whether the student has a StudentModule for the descriptor in `field_data_cache`.
+    """
+    key = DjangoKeyValueStore.Key(
+        scope=Scope.user_state,
+        user_id=student.id,
+        block_scope_id=descriptor.location,
+        field_name=None
+    )
+    return field_data_cache.find(key) is not None
+
+
+def _student_module_scores_unchanged(course_id, student, descriptors, student_module_scores):
+    """
+    Return whether the scores of the student's StudentModules for the descriptors are still those in
+    `student_module_scores` (i.e., none of them has been scored, rescored or deleted since it was loaded).
+    """
+    usage_keys = [descriptor.location for descriptor in descriptors]
+    current_scores = get_student_module_scores(course_id, [student.id], usage_keys=usage_keys)[student.id]
+    return current_scores == {
+        usage_key: student_module_scores[usage_key] for usage_key in usage_keys if usage_key in student_module_scores
+    }
+
+
+def _score_from_persisted(score):
+    """
+    Return the Score for a problem from its persistable score dict.
+    """
+    graded = score['graded']
+    if not score['possible'] > 0:
+        #We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+        graded = False
+    return Score(score['earned'], score['possible'], graded, score['display_name'])
+
+
+def _grading_version(course):
+    """
+    Return a string which identifies the current version of the course's content and grading
+    policy, or None if the modulestore doesn't record when the course's content changes (in
+    which case grades can't be persisted).
+    """
+    try:
+        subtree_edited_on = course.runtime.get_subtree_edited_on(course)
+    except AttributeError:
+        return None
+    if subtree_edited_on is None:
+        return None
+    version = json.dumps([unicode(subtree_edited_on), course.grading_policy], sort_keys=True)
+    return hashlib.md5(version).hexdigest()
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -348,9 +526,18 @@ def _progress_summary(student, request, course):
         if not course_module:
             # This student must not have access to the course.
             return None
+        student_module_scores = get_student_module_scores(course.id, [student.id])[student.id]
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
 
+    # The scores for the sections which `grade` was able to persist, and which haven't changed since
+    course_version = _grading_version(course)
+    if course_version is not None:
+        with manual_transaction():
+            persisted_scores = PersistentSectionGrade.get_section_scores(student, course.id, course_version)
+    else:
+        persisted_scores = {}
+
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
     for chapter_module in course_module.get_display_items():
@@ -369,17 +556,27 @@ def _progress_summary(student, request, course):
                 graded = section_module.graded
                 scores = []
 
-                module_creator = section_module.xmodule_runtime.get_module
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                persisted_section_scores = persisted_scores.get(section_module.location)
+                if persisted_section_scores is not None and not any(
+                        score['location'] in submissions_scores for score in persisted_section_scores
+                ):
+                    scores = [
+                        Score(score['earned'], score['possible'], graded, score['display_name'])
+                        for score in persisted_section_scores
+                    ]
+                else:
+                    module_creator = section_module.xmodule_runtime.get_module
+
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores,
+                            student_module_scores=student_module_scores
+                        )
+                        if correct is None and total is None:
+                            continue
+
+                        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -406,7 +603,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_scores=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -420,6 +617,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_scores: A dict of usage keys to the (grade, max_grade) of each of the user's
+           StudentModules in the course, as returned by get_student_module_scores. If it's not
+           given, the problem's StudentModule is queried for.
     """
     scores_cache = scores_cache or {}
 
@@ -446,28 +646,28 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_module_scores is not None:
+        student_module_score = student_module_scores.get(problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+            student_module_score = (student_module.grade, student_module.max_grade)
+        except StudentModule.DoesNotExist:
+            student_module_score = None
 
-    if student_module is not None and student_module.max_grade is not None:
-        correct = student_module.grade if student_module.grade is not None else 0
-        total = student_module.max_grade
+    if student_module_score is not None and student_module_score[1] is not None:
+        correct = student_module_score[0] if student_module_score[0] is not None else 0
+        total = student_module_score[1]
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
-        # we need to instantiate the problem.
+        # we need the problem's max score, which may mean instantiating the problem.
         # Otherwise, the max score (cached in student_module) won't be available
-        problem = module_creator(problem_descriptor)
-        if problem is None:
-            return (None, None)
-
         correct = 0.0
-        total = problem.max_score()
+        total = _get_max_score(course_id, user, problem_descriptor, module_creator)
 
         # Problem may be an error module (if something in the problem builder failed)
         # In which case total might be None
@@ -476,14 +676,84 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
 
     # Now we re-weight the problem, if specified
     weight = problem_descriptor.weight
-    if weight is not None:
-        if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
-            return (correct, total)
-        correct = correct * weight / total
-        total = weight
+    if weight is not None and total == 0:
+        log.exception(
+            "Cannot reweight a problem with zero total points. Problem: %s, student: %s",
+            problem_descriptor.location, user.id
+        )
+
+    return weighted_score(correct, total, weight)
+
+
+def get_student_module_scores(course_id, student_ids, use_read_replica=False, usage_keys=None):
+    """
+    Return a dict of each of the students' ids to a dict of the usage keys to the (grade, max_grade)
+    of each of their StudentModules in the course which has been graded, loaded in a single query.
+    If usage_keys is given, only the StudentModules for those usage keys are loaded.
+
+    The result for each student can be passed to get_score as its student_module_scores.
+    use_read_replica should only be set where it doesn't matter if the scores are slightly stale
+    (e.g., for reports).
+    """
+    scores = dict((student_id, {}) for student_id in student_ids)
+    if not scores:
+        return scores
+
+    query = StudentModule.objects.filter(
+        course_id=course_id, student__in=scores.keys()
+    ).exclude(max_grade=None)
+    if usage_keys is not None:
+        query = query.filter(module_state_key__in=usage_keys)
+    if use_read_replica:
+        query = use_read_replica_if_available(query)
+
+    module_state_key_field = StudentModule._meta.get_field('module_state_key')  # pylint: disable=protected-access
+    for student_id, module_state_key, grade, max_grade in query.values_list(
+            'student_id', 'module_state_key', 'grade', 'max_grade'
+    ):
+        usage_key = module_state_key_field.to_python(module_state_key).map_into_course(course_id)
+        scores[student_id][usage_key] = (grade, max_grade)
+    return scores
+
+
+def _max_score_cache_key(problem_descriptor):
+    """
+    Return the key under which the maximum score of the problem is cached, or None if it
+    can't be cached because it may differ between students (e.g., because the problem's
+    scripts depend on how it's randomized for each of them, or on who they are).
+
+    The key includes the problem's content, so editing the problem changes the key.
+    """
+    if getattr(problem_descriptor, 'max_score_depends_on_student', True):
+        return None
+    key_hash = hashlib.md5(problem_descriptor.location.to_deprecated_string().encode('utf-8'))
+    key_hash.update(problem_descriptor.data.encode('utf-8'))
+    return u'courseware.max_score.{}'.format(key_hash.hexdigest())
 
-    return (correct, total)
+
+def _get_max_score(course_id, user, problem_descriptor, module_creator):
+    """
+    Return the maximum score of the problem for the user, or None if the user can't load
+    the problem or it doesn't have a score.
+
+    The problem is only instantiated (to ask it) if its maximum score hasn't been cached.
+    """
+    cache_key = _max_score_cache_key(problem_descriptor)
+    if cache_key is not None:
+        total = cache.get(cache_key)
+        if total is not None:
+            # module_creator returns None for problems the user can't load
+            if getattr(user, 'known', True) and not has_access(user, 'load', problem_descriptor, course_id):
+                return None
+            return total
+
+    problem = module_creator(problem_descriptor)
+    if problem is None:
+        return None
+    total = problem.max_score()
+    if total is not None and cache_key is not None:
+        cache.set(cache_key, total, MAX_SCORE_CACHE_TIMEOUT)
+    return total
 
 
 @contextmanager
@@ -499,11 +769,14 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_id, students):
+def iterate_grades_for(course_id, students, chunk_size=GRADING_CHUNK_SIZE):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
 
+    The state of `chunk_size` students at a time is loaded together before they
+    are graded. Pass a chunk_size of None to load each student's state separately.
+
     If an error occurred, gradeset will be an empty dict and err_msg will be an
     exception message. If there was no error, err_msg is an empty string.
 
@@ -524,7 +797,7 @@ def iterate_grades_for(course_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
+    for student, field_data_cache, student_module_scores in _students_with_field_data(course, students, chunk_size):
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course_id)]):
             try:
                 request.user = student
@@ -533,7 +806,13 @@ def iterate_grades_for(course_id, students):
                 # It's not pretty, but untangling that is currently beyond the
                 # scope of this feature.
                 request.session = {}
-                gradeset = grade(student, request, course)
+                # scores loaded with the chunk come from the read replica, which may lag; so, the
+                # sections graded from them aren't persisted
+                gradeset = grade(
+                    student, request, course,
+                    field_data_cache=field_data_cache, student_module_scores=student_module_scores,
+                    persist_scores=student_module_scores is None
+                )
                 yield student, gradeset, ""
             except Exception as exc:  # pylint: disable=broad-except
                 # Keep marching on even if this student couldn't be graded for
@@ -546,3 +825,34 @@ def iterate_grades_for(course_id, students):
                     exc.message
                 )
                 yield student, {}, exc.message
+
+
+def _students_with_field_data(course, students, chunk_size):
+    """
+    Yield a tuple of (student, field_data_cache, student_module_scores) for each of `students`,
+    where the FieldDataCaches and StudentModule scores for each chunk of `chunk_size` students
+    are loaded together. If chunk_size is None, they are None (so that grade() loads them).
+    """
+    if chunk_size is None:
+        for student in students:
+            yield student, None, None
+        return
+
+    students = iter(students)
+    descriptors = course.grading_context['all_descriptors']
+    while True:
+        chunk = list(islice(students, chunk_size))
+        if not chunk:
+            return
+        try:
+            field_data_caches = FieldDataCache.cache_for_users(descriptors, course.id, chunk)
+            student_module_scores = get_student_module_scores(
+                course.id, [student.id for student in chunk], use_read_replica=True
+            )
+        except Exception:  # pylint: disable=broad-except
+            # Fall back to loading each student's state as they are graded
+            log.exception('Unable to load the state of %d students in course %s', len(chunk), course.id)
+            field_data_caches = {}
+            student_module_scores = {}
+        for student in chunk:
+            yield student, field_data_caches.get(student.id), student_module_scores.get(student.id)
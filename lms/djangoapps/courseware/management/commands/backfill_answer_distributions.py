@@ -0,0 +1,150 @@
+"""
+A Django command that counts the answers submitted to every problem of a course, so that its
+answer distribution report can be read from the precomputed AnswerDistributionCounts.
+
+Once a course has been backfilled, its counts are kept up to date as students submit answers.
+The course's StudentModules are counted in ranges of primary keys, by several processes at once.
+Answers submitted while the command runs may be miscounted, so it's best run when the course is
+quiet (and can simply be run again).
+"""
+import logging
+import multiprocessing
+from collections import Counter
+from optparse import make_option
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max, Min
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from courseware.models import StudentModule, AnswerDistributionCount, AnswerDistributionBackfill
+from util.query import use_read_replica_if_available
+
+log = logging.getLogger(__name__)
+
+
+def submitted_problems(course_key):
+    """
+    Return a queryset of the course's StudentModules which count towards its answer distributions.
+    """
+    return StudentModule.objects.filter(course_id=course_key, module_type='problem', grade__isnull=False)
+
+
+def count_answers(course_id, first_id, last_id):
+    """
+    Return a Counter of the (module_state_key, part_id, answer) submitted by the course's StudentModules
+    whose ids are between first_id and last_id (inclusive).
+
+    The course id and module state keys are serialized so that this can run in a worker process.
+    """
+    course_key = CourseKey.from_string(course_id)
+    modules = use_read_replica_if_available(
+        submitted_problems(course_key).filter(id__gte=first_id, id__lte=last_id)
+    )
+    counts = Counter()
+    for module in modules:
+        module_state_key = unicode(module.module_state_key)
+        for part_id, answer in module.submitted_answers().items():
+            counts[(module_state_key, part_id, answer)] += 1
+    return counts
+
+
+def _count_answers(args):
+    """
+    Unpack the arguments of count_answers for multiprocessing.Pool.imap_unordered.
+    """
+    return count_answers(*args)
+
+
+class Command(BaseCommand):
+    """
+    Count the answers submitted to the problems of the given courses.
+    """
+    args = "<course_id course_id ...>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--workers',
+                    type='int',
+                    default=4,
+                    help='Number of processes to count the answers with'),
+        make_option('--chunk-size',
+                    dest='chunk_size',
+                    type='int',
+                    default=10000,
+                    help='Number of StudentModule ids each worker counts at once'),
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError("course_id not specified")
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--workers and --chunk-size must be positive")
+
+        for course_id in args:
+            try:
+                course_key = CourseKey.from_string(course_id)
+            except InvalidKeyError:
+                course_key = SlashSeparatedCourseKey.from_deprecated_string(course_id)
+            counts = self.count_course(course_key, options['workers'], options['chunk_size'])
+            self.save_counts(course_key, counts)
+            self.stdout.write(
+                u"Counted {} distinct answers in {}\n".format(len(counts), course_key.to_deprecated_string())
+            )
+
+    def count_course(self, course_key, workers, chunk_size):
+        """
+        Return a Counter of all of the answers submitted in the course.
+        """
+        id_range = use_read_replica_if_available(submitted_problems(course_key)).aggregate(Min('id'), Max('id'))
+        if id_range['id__min'] is None:
+            return Counter()
+
+        course_id = unicode(course_key)
+        chunks = [
+            (course_id, first_id, first_id + chunk_size - 1)
+            for first_id in xrange(id_range['id__min'], id_range['id__max'] + 1, chunk_size)
+        ]
+        counts = Counter()
+        if workers == 1 or len(chunks) == 1:
+            for chunk in chunks:
+                counts.update(_count_answers(chunk))
+            return counts
+
+        # The workers mustn't share this process's database connections (including the read replica's,
+        # opened above), so they're closed before the workers are forked
+        for conn in connections.all():
+            conn.close()
+        pool = multiprocessing.Pool(workers)
+        try:
+            for chunk_counts in pool.imap_unordered(_count_answers, chunks):
+                counts.update(chunk_counts)
+        finally:
+            pool.close()
+            pool.join()
+        return counts
+
+    @transaction.commit_on_success
+    def save_counts(self, course_key, counts):
+        """
+        Replace the course's answer distribution counts with `counts`, and mark it as backfilled.
+        """
+        AnswerDistributionCount.objects.filter(course_id=course_key).delete()
+        AnswerDistributionCount.objects.bulk_create([
+            AnswerDistributionCount(
+                course_id=course_key,
+                module_state_key=UsageKey.from_string(module_state_key),
+                part_id=part_id,
+                answer_hash=AnswerDistributionCount.hash_answer(answer),
+                answer=answer,
+                count=count,
+            )
+            for (module_state_key, part_id, answer), count in counts.iteritems()
+        ])
+        backfill, created = AnswerDistributionBackfill.objects.get_or_create(course_id=course_key)
+        if not created:
+            # record when it was last backfilled
+            backfill.save()
+        log.info("Backfilled the answer distributions of %s", course_key)
@@ -2,6 +2,7 @@
 Classes to provide the LMS runtime data storage to XBlocks
 """
 
+import copy
 import json
 from collections import defaultdict
 from itertools import chain
@@ -60,6 +61,9 @@ class FieldDataCache(object):
         select_for_update: True if rows should be locked until end of transaction
         '''
         self.cache = {}
+        # Maps the id of each StudentModule whose state has been parsed to a tuple of
+        # (the StudentModule, the serialized state which was parsed, the parsed state)
+        self._user_states = {}
         self.descriptors = descriptors
         self.select_for_update = select_for_update
 
@@ -115,6 +119,41 @@ class FieldDataCache(object):
 
         return FieldDataCache(descriptors, course_id, user, select_for_update)
 
+    @classmethod
+    def cache_for_users(cls, descriptors, course_id, users, select_for_update=False):
+        """
+        Return a dict mapping the id of each of `users` to a FieldDataCache for that user and
+        `descriptors`. The data for all of the users is loaded together, with the same number of
+        (chunked) queries as a FieldDataCache for a single user would make.
+
+        course_id: the course in the context of which we want StudentModules.
+        users: the django users for whom to load data. Callers should limit the number of users
+            passed at once (e.g. to a few hundred), as all of their data is held in memory.
+        descriptors: A list of XModuleDescriptors.
+        select_for_update: Flag indicating whether the rows should be locked until end of transaction
+        """
+        caches = dict((user.id, cls([], course_id, user, select_for_update)) for user in users)
+        authenticated = [cache for cache in caches.values() if cache.user.is_authenticated()]
+        for cache in caches.values():
+            cache.descriptors = descriptors
+
+        if not authenticated:
+            return caches
+
+        loader = authenticated[0]
+        user_ids = [cache.user.pk for cache in authenticated]
+        for scope, fields in loader._fields_to_cache().items():
+            for field_object in loader._retrieve_fields(scope, fields, user_ids):
+                if scope == Scope.user_state_summary:
+                    # Summary fields are shared by every user
+                    field_caches = authenticated
+                else:
+                    field_caches = [caches[field_object.student_id]]
+                for cache in field_caches:
+                    cache.cache[cache._cache_key_from_field_object(scope, field_object)] = field_object
+
+        return caches
+
     def _query(self, model_class, **kwargs):
         """
         Queries model_class with **kwargs, optionally adding select_for_update if
@@ -140,17 +179,25 @@ class FieldDataCache(object):
         )
         return res
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, fields, user_ids=None):
         """
         Queries the database for all of the fields in the specified scope
+
+        user_ids: the ids of the users to retrieve user specific fields for. Defaults to
+            the user this cache was constructed for.
         """
+        if user_ids is None:
+            students = {'student': self.user.pk}
+        else:
+            students = {'student__in': user_ids}
+
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
                 (descriptor.scope_ids.usage_id for descriptor in self.descriptors),
                 course_id=self.course_id,
-                student=self.user.pk,
+                **students
             )
         elif scope == Scope.user_state_summary:
             return self._chunked_query(
@@ -164,14 +211,14 @@ class FieldDataCache(object):
                 XModuleStudentPrefsField,
                 'module_type__in',
                 set(descriptor.scope_ids.block_type for descriptor in self.descriptors),
-                student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
+                **students
             )
         elif scope == Scope.user_info:
             return self._query(
                 XModuleStudentInfoField,
-                student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
+                **students
             )
         else:
             return []
@@ -213,6 +260,30 @@ class FieldDataCache(object):
         elif scope == Scope.user_info:
             return (scope, field_object.field_name)
 
+    def get_user_state(self, student_module):
+        """
+        Return the state of `student_module` (a StudentModule in this cache) as a dict.
+
+        The state is only parsed again if the StudentModule's serialized state has been changed
+        since it was last parsed, so callers must not modify the returned dict (other than by
+        passing it to `set_user_state`).
+        """
+        parsed = self._user_states.get(id(student_module))
+        if parsed is not None and parsed[0] is student_module and parsed[1] is student_module.state:
+            return parsed[2]
+
+        state = json.loads(student_module.state)
+        self._user_states[id(student_module)] = (student_module, student_module.state, state)
+        return state
+
+    def set_user_state(self, student_module, state):
+        """
+        Serialize the dict `state` into `student_module` (without saving it), and remember it
+        as the parsed state of `student_module`.
+        """
+        student_module.state = json.dumps(state)
+        self._user_states[id(student_module)] = (student_module, student_module.state, state)
+
     def find(self, key):
         '''
         Look for a model data object using an DjangoKeyValueStore.Key object
@@ -310,7 +381,8 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            return json.loads(field_object.state)[key.field_name]
+            # Copy the value, so that changes to it aren't seen by the next reader unless they are saved
+            return copy.deepcopy(self._field_data_cache.get_user_state(field_object)[key.field_name])
         else:
             return json.loads(field_object.value)
 
@@ -331,6 +403,8 @@ class DjangoKeyValueStore(KeyValueStore):
         saved_fields = []
         # field_objects maps a field_object to a list of associated fields
         field_objects = dict()
+        # user_states maps each StudentModule which is being changed to its updated state
+        user_states = dict()
         for field in kv_dict:
             # Check field for validity
             if field.scope not in self._allowed_scopes:
@@ -345,14 +419,18 @@ class DjangoKeyValueStore(KeyValueStore):
 
             # Special case when scope is for the user state, because this scope saves fields in a single row
             if field.scope == Scope.user_state:
-                state = json.loads(field_object.state)
-                state[field.field_name] = kv_dict[field]
-                field_object.state = json.dumps(state)
+                if field_object not in user_states:
+                    user_states[field_object] = dict(self._field_data_cache.get_user_state(field_object))
+                user_states[field_object][field.field_name] = copy.deepcopy(kv_dict[field])
             else:
             # The remaining scopes save fields on different rows, so
             # we don't have to worry about conflicts
                 field_object.value = json.dumps(kv_dict[field])
 
+        # Serialize each changed state once, rather than once for each of its fields
+        for field_object, state in user_states.items():
+            self._field_data_cache.set_user_state(field_object, state)
+
         for field_object in field_objects:
             try:
                 # Save the field object that we made above
@@ -373,9 +451,9 @@ class DjangoKeyValueStore(KeyValueStore):
             raise KeyError(key.field_name)
 
         if key.scope == Scope.user_state:
-            state = json.loads(field_object.state)
+            state = dict(self._field_data_cache.get_user_state(field_object))
             del state[key.field_name]
-            field_object.state = json.dumps(state)
+            self._field_data_cache.set_user_state(field_object, state)
             field_object.save()
         else:
             field_object.delete()
@@ -389,6 +467,6 @@ class DjangoKeyValueStore(KeyValueStore):
             return False
 
         if key.scope == Scope.user_state:
-            return key.field_name in json.loads(field_object.state)
+            return key.field_name in self._field_data_cache.get_user_state(field_object)
         else:
             return True
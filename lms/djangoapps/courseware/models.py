@@ -12,12 +12,17 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import hashlib
+import json
+
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 
+from xmodule.graders import weighted_score
 from xmodule_django.models import CourseKeyField, LocationKeyField
 
 
@@ -81,6 +86,24 @@ class StudentModule(models.Model):
         else:
             return queryset
 
+    def submitted_answers(self):
+        """
+        Return a dict of the problem part ids to the unicode answers this counts towards
+        the answer distributions of its problem: those of problems which have been submitted
+        (module_type='problem' and a non-null grade).
+        """
+        if self.module_type != 'problem' or self.grade is None or not self.state:
+            return {}
+        try:
+            raw_answers = json.loads(self.state).get("student_answers", {})
+        except (ValueError, AttributeError):
+            return {}
+        # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+        # to be unicode values. Note that if we get a string, it's always
+        # unicode and not str -- state comes from the json decoder, and that
+        # always returns unicode for strings.
+        return dict((problem_part_id, unicode(raw_answer)) for problem_part_id, raw_answer in raw_answers.items())
+
     def __repr__(self):
         return 'StudentModule<%r>' % ({
             'course_id': self.course_id,
@@ -260,3 +283,293 @@ class OfflineComputedGradeLog(models.Model):
 
     def __unicode__(self):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
+
+
+class PersistentSectionGrade(models.Model):
+    """
+    The scores a student earned on each of the problems in a graded section (subsection)
+    of a course, as computed by `courseware.grades`.
+
+    A row is only valid for the version of the course content and grading policy it was
+    computed from (`course_version`); rows for any other version are recomputed and
+    overwritten. Individual problem scores are updated in place whenever the score of
+    the student's StudentModule for a problem changes (or it's deleted).
+    """
+    class Meta:
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # The section these scores are for
+    usage_key = LocationKeyField(max_length=255)
+
+    # Identifies the course content and grading policy the scores were computed from
+    course_version = models.CharField(max_length=255)
+
+    # JSON list of {"location", "earned", "possible", "weight", "graded", "display_name"} dicts,
+    # one for each scored descendant of the section (with weights already applied)
+    scores = models.TextField(default='[]')
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def get_section_scores(cls, user, course_id, course_version):
+        """
+        Return a dict mapping section usage keys to the list of persisted score dicts
+        for each of the user's sections in the course which are valid for course_version.
+        """
+        return {
+            section_grade.usage_key.map_into_course(course_id): json.loads(section_grade.scores)
+            for section_grade in cls.objects.filter(user=user, course_id=course_id, course_version=course_version)
+        }
+
+    @classmethod
+    def save_section_scores(cls, user, course_id, usage_key, course_version, scores):
+        """
+        Persist the list of score dicts for the user's section, replacing any previous scores.
+        """
+        section_grade, created = cls.objects.get_or_create(
+            user=user,
+            course_id=course_id,
+            usage_key=usage_key,
+            defaults={'course_version': course_version, 'scores': json.dumps(scores)},
+        )
+        if not created:
+            section_grade.course_version = course_version
+            section_grade.scores = json.dumps(scores)
+            section_grade.save()
+
+    @classmethod
+    def discard_section_scores(cls, user, course_id, usage_key):
+        """
+        Delete the persisted scores of the user's section, so that it's regraded.
+        """
+        cls.objects.filter(user=user, course_id=course_id, usage_key=usage_key).delete()
+
+    @classmethod
+    def update_problem_score(cls, user_id, course_id, problem_key, grade, max_grade):
+        """
+        Update the score for the problem in every persisted section of the user's which includes it.
+
+        Arguments:
+            grade (float): the (unweighted) grade of the user's StudentModule for the problem
+            max_grade (float): its max_grade, or None if the user has no score on the problem any more
+                (in which case they've earned none of the points which were possible)
+        """
+        location = problem_key.to_deprecated_string()
+        # the LIKE query narrows down the rows to look at; the exact match is done on the decoded scores
+        for section_grade in cls.objects.filter(user_id=user_id, course_id=course_id, scores__contains=location):
+            scores = json.loads(section_grade.scores)
+            changed = False
+            for score in scores:
+                if score['location'] == location:
+                    if max_grade is None:
+                        score['earned'] = 0.0
+                    else:
+                        score['earned'], score['possible'] = weighted_score(grade or 0.0, max_grade, score['weight'])
+                    changed = True
+            if changed:
+                section_grade.scores = json.dumps(scores)
+                section_grade.save()
+
+    def __repr__(self):
+        return 'PersistentSectionGrade<%r>' % ({
+            'user_id': self.user_id,
+            'course_id': self.course_id,
+            'usage_key': self.usage_key,
+            'course_version': self.course_version,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+
+class AnswerDistributionCount(models.Model):
+    """
+    The number of submitted StudentModules whose answer to a part of a problem is `answer`.
+
+    These are kept up to date as StudentModules are saved and deleted, so that the answer
+    distributions of a course can be reported without reading all of its StudentModules.
+    """
+    class Meta:
+        unique_together = (('course_id', 'module_state_key', 'part_id', 'answer_hash'),)
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = LocationKeyField(max_length=255, db_column='module_id')
+    part_id = models.CharField(max_length=255)
+
+    # answers can be long, so they're identified by their sha1 hex digest
+    answer_hash = models.CharField(max_length=40)
+    answer = models.TextField()
+    count = models.IntegerField(default=0)
+
+    @staticmethod
+    def hash_answer(answer):
+        """
+        Return the hash identifying the (unicode) answer.
+        """
+        return hashlib.sha1(answer.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def add_answers(cls, course_id, module_state_key, answers, delta):
+        """
+        Add `delta` to the counts of each of the (part id, answer) pairs in `answers`.
+        """
+        for part_id, answer in answers:
+            filters = {
+                'course_id': course_id,
+                'module_state_key': module_state_key,
+                'part_id': part_id,
+                'answer_hash': cls.hash_answer(answer),
+            }
+            if cls.objects.filter(**filters).update(count=F('count') + delta):
+                continue
+            try:
+                cls.objects.create(answer=answer, count=delta, **filters)
+            except IntegrityError:
+                # someone else created the row first
+                cls.objects.filter(**filters).update(count=F('count') + delta)
+
+    @classmethod
+    def counts_read_only(cls, course_id):
+        """
+        Return a queryset of the (module_state_key, part_id, answer, count) of each answer
+        which has been submitted in the course. Use a read replica if one exists for this
+        environment.
+        """
+        queryset = cls.objects.filter(course_id=course_id, count__gt=0)
+        if "read_replica" in settings.DATABASES:
+            queryset = queryset.using("read_replica")
+        return queryset.values_list('module_state_key', 'part_id', 'answer', 'count')
+
+
+class AnswerDistributionBackfill(models.Model):
+    """
+    Records that the AnswerDistributionCounts of a course have been computed from all of its
+    StudentModules (by the backfill_answer_distributions command), and so can be used to
+    report its answer distributions.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+    backfilled = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def is_backfilled(cls, course_id):
+        """
+        Return whether the answer distribution counts of the course are complete.
+        """
+        return cls.objects.filter(course_id=course_id).exists()
+
+
+def _counted_answers(course_id, module_state_key, answers):
+    """
+    Return the key identifying the counts of the answers, and the set of counted (part id, answer) pairs.
+    """
+    return (course_id, module_state_key), set(answers.items())
+
+
+@receiver(post_init, sender=StudentModule)
+def record_counted_answers(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the state which a StudentModule loaded from the database counts towards the
+    answer distributions (without parsing it until it's saved or deleted).
+    """
+    if instance.pk is None:
+        instance._counted_answers_fields = None  # pylint: disable=protected-access
+    else:
+        instance._counted_answers_fields = (  # pylint: disable=protected-access
+            instance.course_id, instance.module_state_key, instance.module_type, instance.grade, instance.state
+        )
+
+
+def _previously_counted_answers(instance):
+    """
+    Return the (key, answers) which the StudentModule counted towards the answer distributions
+    when it was loaded or last saved.
+    """
+    fields = getattr(instance, '_counted_answers_fields', None)
+    if fields is None:
+        return None, set()
+    course_id, module_state_key, module_type, grade, state = fields
+    original = StudentModule(module_type=module_type, grade=grade, state=state)
+    return _counted_answers(course_id, module_state_key, original.submitted_answers())
+
+
+@receiver(post_save, sender=StudentModule)
+def update_answer_distribution_counts(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Update the answer distribution counts with any changes to the StudentModule's submitted answers.
+    """
+    fields = getattr(instance, '_counted_answers_fields', None)
+    new_fields = (instance.course_id, instance.module_state_key, instance.module_type, instance.grade, instance.state)
+    if fields == new_fields or (fields is None and instance.module_type != 'problem'):
+        return
+
+    old_key, old_answers = _previously_counted_answers(instance)
+    new_key, new_answers = _counted_answers(
+        instance.course_id, instance.module_state_key, instance.submitted_answers()
+    )
+    if old_key != new_key:
+        removed, added = old_answers, new_answers
+    else:
+        removed, added = old_answers - new_answers, new_answers - old_answers
+    if removed:
+        AnswerDistributionCount.add_answers(old_key[0], old_key[1], removed, -1)
+    if added:
+        AnswerDistributionCount.add_answers(new_key[0], new_key[1], added, 1)
+    instance._counted_answers_fields = new_fields  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def remove_answer_distribution_counts(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remove a deleted StudentModule's submitted answers from the answer distribution counts.
+    """
+    key, answers = _previously_counted_answers(instance)
+    if answers:
+        AnswerDistributionCount.add_answers(key[0], key[1], answers, -1)
+
+
+@receiver(post_init, sender=StudentModule)
+def record_persisted_score(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the score of a StudentModule loaded from the database (a new one has no score yet).
+    """
+    if instance.pk is None:
+        instance._persisted_score = (None, None)  # pylint: disable=protected-access
+    else:
+        instance._persisted_score = (instance.grade, instance.max_grade)  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def update_persisted_problem_score(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    When the score of a student's StudentModule changes, whether from a grade event or otherwise
+    (e.g., a rescore or a state reset), update it in the student's persisted sections.
+    """
+    score = (instance.grade, instance.max_grade)
+    if score != getattr(instance, '_persisted_score', (None, None)):
+        PersistentSectionGrade.update_problem_score(
+            instance.student_id,
+            instance.course_id,
+            instance.module_state_key.map_into_course(instance.course_id),
+            *score
+        )
+    instance._persisted_score = score  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def reset_persisted_problem_score(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    When a student's state for a problem is deleted (e.g., by an instructor resetting it),
+    the student no longer has any points for it.
+    """
+    if instance.grade is not None:
+        PersistentSectionGrade.update_problem_score(
+            instance.student_id,
+            instance.course_id,
+            instance.module_state_key.map_into_course(instance.course_id),
+            None,
+            None
+        )
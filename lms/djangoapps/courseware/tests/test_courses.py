@@ -9,7 +9,8 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from courseware.courses import (
     get_course_by_id, get_cms_course_link, course_image_url,
-    get_course_info_section, get_course_about_section, get_cms_block_link
+    get_course_info_section, get_course_about_section, get_cms_block_link,
+    get_course_with_access, get_courses, COURSE_REQUEST_CACHE_STATS
 )
 from courseware.tests.helpers import get_request_for_user
 from student.tests.factories import UserFactory
@@ -48,6 +49,60 @@ class CoursesTest(ModuleStoreTestCase):
         cms_url = u"//{}/course/i4x://org/num/course/name".format(CMS_BASE_TEST)
         self.assertEqual(cms_url, get_cms_block_link(self.course, 'course'))
 
+    @override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+    @mock.patch.dict('django.conf.settings.FEATURES', {'ACCESS_REQUIRE_STAFF_FOR_COURSE': True})
+    def test_get_courses_requires_staff_for_private_courses(self):
+        """
+        Tests that, when the catalog requires staff access to courses, only the public courses
+        are listed to students, and all of them to staff.
+        """
+        public_course = CourseFactory.create(org='org', number='public', display_name='name', ispublic=True)
+        private_course = CourseFactory.create(org='org', number='private', display_name='name')
+
+        course_ids = [course.id for course in get_courses(UserFactory.create())]
+        self.assertIn(public_course.id, course_ids)
+        self.assertNotIn(private_course.id, course_ids)
+
+        course_ids = [course.id for course in get_courses(UserFactory.create(is_staff=True))]
+        self.assertIn(public_course.id, course_ids)
+        self.assertIn(private_course.id, course_ids)
+
+
+@mock.patch('courseware.courses.get_current_request', mock.Mock())
+class CourseRequestCacheTest(ModuleStoreTestCase):
+    """Test that courses are only looked up once per request."""
+
+    def setUp(self):
+        super(CourseRequestCacheTest, self).setUp()
+        self.course = CourseFactory.create(org='org', number='num', display_name='name')
+
+    def test_cached_within_request(self):
+        hits = COURSE_REQUEST_CACHE_STATS['hits']
+        with mock.patch.object(self.store, 'get_course', wraps=self.store.get_course) as get_course:
+            course = get_course_by_id(self.course.id)
+            self.assertIs(get_course_by_id(self.course.id), course)
+            self.assertIs(get_course_with_access(self.user, 'load', self.course.id), course)
+            self.assertEqual(get_course.call_count, 1)
+            # each depth is looked up separately
+            get_course_by_id(self.course.id, depth=None)
+            self.assertEqual(get_course.call_count, 2)
+        self.assertEqual(COURSE_REQUEST_CACHE_STATS['hits'], hits + 2)
+
+    def test_not_cached_outside_request(self):
+        with mock.patch('courseware.courses.get_current_request', mock.Mock(return_value=None)):
+            with mock.patch.object(self.store, 'get_course', wraps=self.store.get_course) as get_course:
+                get_course_by_id(self.course.id)
+                get_course_by_id(self.course.id)
+                self.assertEqual(get_course.call_count, 2)
+
+    def test_edit_invalidates(self):
+        course = get_course_by_id(self.course.id)
+        course.display_name = 'new name'
+        self.store.update_item(course, self.user.id)
+        with mock.patch.object(self.store, 'get_course', wraps=self.store.get_course) as get_course:
+            self.assertEqual(get_course_by_id(self.course.id).display_name, 'new name')
+            self.assertEqual(get_course.call_count, 1)
+
 
 class ModuleStoreBranchSettingTest(ModuleStoreTestCase):
     """Test methods related to the modulestore branch setting."""
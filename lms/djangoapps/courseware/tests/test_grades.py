@@ -1,19 +1,30 @@
 """
 Test grade calculation.
 """
+from django.core.cache import cache
 from django.http import Http404
+from django.test import TestCase
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
-from mock import patch
+from mock import patch, Mock
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from courseware import grades
+from courseware.grades import grade, iterate_grades_for, get_score, get_student_module_scores, progress_summary
+from courseware.model_data import FieldDataCache
+from courseware.models import PersistentSectionGrade, StudentModule
+from courseware.module_render import get_module
+from courseware.tests.factories import StudentModuleFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, field_data_cache=None,
+                       student_module_scores=None, persist_scores=True):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -24,7 +35,11 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(
+        student, request, course, keep_raw_scores=keep_raw_scores,
+        field_data_cache=field_data_cache, student_module_scores=student_module_scores,
+        persist_scores=persist_scores
+    )
 
 
 @override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
@@ -120,3 +135,319 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+class TestPersistentSectionGrade(TestCase):
+    """
+    Test the storage and incremental updates of persisted section scores.
+    """
+    def setUp(self):
+        super(TestPersistentSectionGrade, self).setUp()
+        self.user = UserFactory.create()
+        self.course_id = SlashSeparatedCourseKey('edX', 'grading', '2014')
+        self.section_key = self.course_id.make_usage_key('sequential', 'homework')
+        self.problem_key = self.course_id.make_usage_key('problem', 'p1')
+        self.other_problem_key = self.course_id.make_usage_key('problem', 'p10')
+        self.scores = [
+            {
+                'location': key.to_deprecated_string(),
+                'earned': 0.0,
+                'possible': 2.0,
+                'weight': None,
+                'graded': True,
+                'display_name': key.name,
+            }
+            for key in (self.problem_key, self.other_problem_key)
+        ]
+        PersistentSectionGrade.save_section_scores(self.user, self.course_id, self.section_key, 'v1', self.scores)
+
+    def _persisted_scores(self, version='v1'):
+        """ The persisted scores for the section, keyed by problem location """
+        sections = PersistentSectionGrade.get_section_scores(self.user, self.course_id, version)
+        return {score['location']: score for score in sections.get(self.section_key, [])}
+
+    def test_round_trip(self):
+        persisted = self._persisted_scores()
+        self.assertEqual(len(persisted), 2)
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['possible'], 2.0)
+
+    def test_other_versions_are_invalid(self):
+        self.assertEqual(self._persisted_scores('v2'), {})
+        PersistentSectionGrade.save_section_scores(self.user, self.course_id, self.section_key, 'v2', self.scores)
+        self.assertEqual(self._persisted_scores('v1'), {})
+        self.assertEqual(len(self._persisted_scores('v2')), 2)
+
+    def test_update_problem_score(self):
+        PersistentSectionGrade.update_problem_score(self.user.id, self.course_id, self.problem_key, 1.5, 3.0)
+        persisted = self._persisted_scores()
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['earned'], 1.5)
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['possible'], 3.0)
+        # a problem whose location starts with the same string isn't touched
+        self.assertEqual(persisted[self.other_problem_key.to_deprecated_string()]['earned'], 0.0)
+
+    def test_update_weighted_problem_score(self):
+        self.scores[0]['weight'] = 10.0
+        PersistentSectionGrade.save_section_scores(self.user, self.course_id, self.section_key, 'v1', self.scores)
+        PersistentSectionGrade.update_problem_score(self.user.id, self.course_id, self.problem_key, 1.5, 3.0)
+        persisted = self._persisted_scores()
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['earned'], 5.0)
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['possible'], 10.0)
+
+    def test_saving_state_updates_score(self):
+        student_module = StudentModuleFactory.create(
+            student=self.user, course_id=self.course_id, module_state_key=self.problem_key, grade=1, max_grade=4
+        )
+        self.assertEqual(self._persisted_scores()[self.problem_key.to_deprecated_string()]['earned'], 1.0)
+
+        # e.g. a rescore which doesn't go through a grade event
+        student_module.grade = 3
+        student_module.save()
+        persisted = self._persisted_scores()
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['earned'], 3.0)
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['possible'], 4.0)
+
+    def test_deleting_state_resets_score(self):
+        student_module = StudentModuleFactory.create(
+            student=self.user, course_id=self.course_id, module_state_key=self.problem_key, grade=2, max_grade=4
+        )
+        student_module.delete()
+        persisted = self._persisted_scores()
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['earned'], 0.0)
+        self.assertEqual(persisted[self.problem_key.to_deprecated_string()]['possible'], 4.0)
+
+    def test_discard_section_scores(self):
+        PersistentSectionGrade.discard_section_scores(self.user, self.course_id, self.section_key)
+        self.assertEqual(self._persisted_scores(), {})
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+@patch('courseware.grades.has_access', Mock(return_value=True))
+@patch('courseware.module_render.has_access', Mock(return_value=True))
+class TestPersistedSectionGrading(ModuleStoreTestCase):
+    """
+    Test that grading persists the scores of a student's sections, and reuses them while they're valid.
+    """
+    def setUp(self):
+        super(TestPersistedSectionGrading, self).setUp()
+        course = CourseFactory.create(grading_policy={
+            'GRADER': [{'type': 'Homework', 'min_count': 1, 'drop_count': 0, 'short_label': 'HW', 'weight': 1.0}],
+            'GRADE_CUTOFFS': {'Pass': 0.5},
+        })
+        chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+        self.section = ItemFactory.create(
+            parent_location=chapter.location, category='sequential', metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.problem = ItemFactory.create(parent_location=self.section.location, category='problem')
+        self.course = modulestore().get_course(course.id, depth=None)
+
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+        self.student_module = StudentModuleFactory.create(
+            student=self.student, course_id=self.course.id, module_state_key=self.problem.location,
+            grade=1, max_grade=2
+        )
+
+    def _persisted_sections(self):
+        """ The student's persisted sections in the course """
+        return PersistentSectionGrade.objects.filter(user=self.student, course_id=self.course.id)
+
+    def test_grade_persists_sections(self):
+        self.assertEqual(grade(self.student, self.request, self.course)['percent'], 0.5)
+        self.assertEqual([section.usage_key for section in self._persisted_sections()], [self.section.location])
+
+    def test_report_grading_doesnt_persist_sections(self):
+        # report grading loads the state of chunks of students from the read replica
+        gradesets = list(iterate_grades_for(self.course.id, [self.student]))
+        self.assertEqual(gradesets[0][1]['percent'], 0.5)
+        self.assertFalse(self._persisted_sections().exists())
+
+        # grading students one by one loads their state from the primary
+        list(iterate_grades_for(self.course.id, [self.student], chunk_size=None))
+        self.assertTrue(self._persisted_sections().exists())
+
+    def _grade_regrading_sections(self):
+        """
+        Grade the student, and return the percent and the number of sections which were regraded
+        rather than read from their persisted scores
+        """
+        with patch.object(
+                grades, '_grade_section', wraps=grades._grade_section  # pylint: disable=protected-access
+        ) as grade_section:
+            percent = grade(self.student, self.request, self.course)['percent']
+        return percent, grade_section.call_count
+
+    def _publish_grade(self, value, max_value):
+        """
+        Publish a grade event for the student's problem, as the problem does when it's scored
+        """
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.student, self.course, depth=None
+        )
+        problem = get_module(
+            self.student, self.request, self.problem.location, field_data_cache
+        )._xmodule  # pylint: disable=protected-access
+        problem.system.publish(problem, 'grade', {'value': value, 'max_value': max_value})
+
+    def test_score_change_updates_persisted_section(self):
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 1))
+        self._publish_grade(2, 2)
+        # the section isn't regraded: its persisted scores were updated by the grade event
+        self.assertEqual(self._grade_regrading_sections(), (1.0, 0))
+
+    def test_state_change_updates_persisted_section(self):
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 1))
+        # e.g. an instructor rescoring the problem, without a grade event
+        self.student_module.grade = 2
+        self.student_module.save()
+        self.assertEqual(self._grade_regrading_sections(), (1.0, 0))
+
+    def test_score_change_while_grading_not_persisted(self):
+        grade_section = grades._grade_section  # pylint: disable=protected-access
+
+        def grade_section_and_change_score(*args, **kwargs):
+            """ Change the student's score after it was loaded, before the section is persisted """
+            result = grade_section(*args, **kwargs)
+            StudentModule.objects.filter(pk=self.student_module.pk).update(grade=2)
+            return result
+
+        with patch.object(grades, '_grade_section', side_effect=grade_section_and_change_score):
+            self.assertEqual(grade(self.student, self.request, self.course)['percent'], 0.5)
+        # the stale scores were discarded, so the section is regraded
+        self.assertFalse(self._persisted_sections().exists())
+        self.assertEqual(self._grade_regrading_sections(), (1.0, 1))
+        self.assertEqual(self._grade_regrading_sections(), (1.0, 0))
+
+    def test_deleting_state_updates_persisted_section(self):
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 1))
+        self.student_module.delete()
+        self.assertEqual(self._grade_regrading_sections(), (0.0, 0))
+
+    def test_progress_summary_reads_persisted_sections(self):
+        grade(self.student, self.request, self.course)
+        # a score which only the persisted section has
+        PersistentSectionGrade.update_problem_score(self.student.id, self.course.id, self.problem.location, 1.5, 2)
+
+        chapters = progress_summary(self.student, self.request, self.course)
+        scores = chapters[0]['sections'][0]['scores']
+        self.assertEqual([(score.earned, score.possible) for score in scores], [(1.5, 2.0)])
+
+    def test_publish_invalidates_persisted_sections(self):
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 1))
+        old_version = self._persisted_sections().get().course_version
+
+        store = modulestore()
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, self.course.id):
+            problem = store.get_item(self.problem.location)
+            problem.display_name = u'Edited problem'
+            store.update_item(problem, ModuleStoreEnum.UserID.test)
+            store.publish(problem.location, ModuleStoreEnum.UserID.test)
+        self.course = store.get_course(self.course.id, depth=None)
+
+        # the section persisted for the previous version of the course is ignored, and regraded
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 1))
+        self.assertNotEqual(self._persisted_sections().get().course_version, old_version)
+        self.assertEqual(self._grade_regrading_sections(), (0.5, 0))
+
+
+@override_settings(MODULESTORE=TEST_DATA_MOCK_MODULESTORE)
+@patch('courseware.grades.has_access', Mock(return_value=True))
+class TestMaxScoreCache(ModuleStoreTestCase):
+    """
+    Test that a problem's maximum score is shared between students who haven't attempted it.
+    """
+    SCRIPT_PROBLEM = (
+        '<problem><script type="loncapa/python">x = random.randint(1, 5)</script>'
+        '<stringresponse answer="$x"><textline/></stringresponse></problem>'
+    )
+
+    def setUp(self):
+        super(TestMaxScoreCache, self).setUp()
+        cache.clear()
+        self.course = CourseFactory.create()
+        self.users = [UserFactory.create(), UserFactory.create()]
+
+    def _scores(self, problem):
+        """
+        Return the students' scores on the problem, and how many times the problem was instantiated.
+        """
+        module_creator = Mock(return_value=Mock(max_score=Mock(return_value=3)))
+        scores = [get_score(self.course.id, user, problem, module_creator) for user in self.users]
+        return scores, module_creator.call_count
+
+    def test_max_score_cached(self):
+        problem = ItemFactory.create(parent_location=self.course.location, category='problem')
+        self.assertEqual(self._scores(problem), ([(0, 3), (0, 3)], 1))
+        # a new version of the problem is instantiated again
+        problem.data = '<problem><stringresponse answer="a"><textline/></stringresponse></problem>'
+        self.assertEqual(self._scores(problem), ([(0, 3), (0, 3)], 1))
+
+    def test_unrandomized_script(self):
+        # the script may still depend on the student, e.g. through their anonymous_student_id
+        problem = ItemFactory.create(parent_location=self.course.location, category='problem', data=self.SCRIPT_PROBLEM)
+        self.assertEqual(self._scores(problem), ([(0, 3), (0, 3)], 2))
+
+    def test_randomized_problem_without_script(self):
+        problem = ItemFactory.create(
+            parent_location=self.course.location, category='problem', metadata={'rerandomize': 'per_student'}
+        )
+        self.assertEqual(self._scores(problem), ([(0, 3), (0, 3)], 1))
+
+    def test_randomized_problem(self):
+        problem = ItemFactory.create(
+            parent_location=self.course.location, category='problem', data=self.SCRIPT_PROBLEM,
+            metadata={'rerandomize': 'per_student'}
+        )
+        self.assertEqual(self._scores(problem), ([(0, 3), (0, 3)], 2))
+
+    def test_cached_max_score_checks_access(self):
+        problem = ItemFactory.create(parent_location=self.course.location, category='problem')
+        self._scores(problem)
+        with patch('courseware.grades.has_access', Mock(return_value=False)):
+            self.assertEqual(get_score(self.course.id, self.users[0], problem, Mock()), (None, None))
+
+
+class TestStudentModuleScores(TestCase):
+    """
+    Test loading the scores of students' StudentModules in bulk.
+    """
+    def setUp(self):
+        self.users = [UserFactory.create() for __ in range(3)]
+        self.course_id = SlashSeparatedCourseKey('edX', 'grading', '2014')
+        self.problem_key = self.course_id.make_usage_key('problem', 'p1')
+        StudentModuleFactory.create(
+            student=self.users[0], course_id=self.course_id, module_state_key=self.problem_key, grade=1, max_grade=2
+        )
+        StudentModuleFactory.create(
+            student=self.users[1], course_id=self.course_id, module_state_key=self.problem_key, grade=None, max_grade=3
+        )
+        # state which doesn't have a score
+        StudentModuleFactory.create(
+            student=self.users[1], course_id=self.course_id,
+            module_state_key=self.course_id.make_usage_key('sequential', 's1'), max_grade=None
+        )
+        # another course
+        StudentModuleFactory.create(
+            student=self.users[2], course_id=SlashSeparatedCourseKey('edX', 'other', '2014'),
+            module_state_key=self.problem_key, grade=1, max_grade=1
+        )
+
+    def test_scores_for_students(self):
+        with self.assertNumQueries(1):
+            scores = get_student_module_scores(self.course_id, [user.id for user in self.users])
+        self.assertEqual(scores, {
+            self.users[0].id: {self.problem_key: (1, 2)},
+            self.users[1].id: {self.problem_key: (None, 3)},
+            self.users[2].id: {},
+        })
+
+    def test_get_score_from_scores(self):
+        scores = get_student_module_scores(self.course_id, [user.id for user in self.users])
+        descriptor = Mock(location=self.problem_key, always_recalculate_grades=False, has_score=True, weight=None)
+        with self.assertNumQueries(0):
+            for user, expected_score in zip(self.users, [(1, 2), (0, 3)]):
+                self.assertEqual(
+                    get_score(self.course_id, user, descriptor, Mock(), student_module_scores=scores[user.id]),
+                    expected_score
+                )
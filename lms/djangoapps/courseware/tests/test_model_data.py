@@ -175,6 +175,47 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_state_parsed_once(self):
+        "Test that reading several fields only parses the StudentModule's state once"
+        with patch('courseware.model_data.json', Mock(wraps=json)) as mock_json:
+            self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
+            self.assertEquals('b_value', self.kvs.get(user_state_key('b_field')))
+            self.assertTrue(self.kvs.has(user_state_key('a_field')))
+        self.assertEquals(mock_json.loads.call_count, 1)
+
+    def test_set_many_serializes_once(self):
+        "Test that setting several fields only serializes the StudentModule's state once"
+        kv_dict = self.construct_kv_dict()
+        with patch('courseware.model_data.json', Mock(wraps=json)) as mock_json:
+            self.kvs.set_many(kv_dict)
+            for key in kv_dict:
+                self.assertEquals(self.kvs.get(key), kv_dict[key])
+        self.assertEquals(mock_json.loads.call_count, 1)
+        self.assertEquals(mock_json.dumps.call_count, 1)
+
+    def test_changed_state_is_parsed_again(self):
+        "Test that changes made directly to the StudentModule's state are seen"
+        self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
+        student_module = StudentModule.objects.all()[0]
+        student_module.state = json.dumps({'a_field': 'changed'})
+        student_module.save()
+        field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user
+        )
+        cached_module = field_data_cache.find(user_state_key('a_field'))
+        kvs = DjangoKeyValueStore(field_data_cache)
+        self.assertEquals('changed', kvs.get(user_state_key('a_field')))
+        cached_module.state = json.dumps({'a_field': 'changed again'})
+        self.assertEquals('changed again', kvs.get(user_state_key('a_field')))
+
+    def test_mutable_values_are_copied(self):
+        "Test that changing a value which was read doesn't change the stored state"
+        self.kvs.set(user_state_key('a_list'), [1, 2])
+        self.kvs.get(user_state_key('a_list')).append(3)
+        self.kvs.set(user_state_key('a_field'), 'new_value')
+        self.assertEquals([1, 2], self.kvs.get(user_state_key('a_list')))
+        self.assertEquals([1, 2], json.loads(StudentModule.objects.all()[0].state)['a_list'])
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -212,6 +253,33 @@ class TestMissingStudentModule(TestCase):
         self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
 
+class TestFieldDataCacheForUsers(TestCase):
+    """Tests for loading the FieldDataCaches of several users at once"""
+    def setUp(self):
+        self.users = [UserFactory.create() for __ in range(3)]
+        for user in self.users[:2]:
+            StudentModuleFactory(student=user, state=json.dumps({'a_field': user.username}))
+        self.descriptors = [mock_descriptor([mock_field(Scope.user_state, 'a_field')])]
+
+    def test_cache_for_users(self):
+        with self.assertNumQueries(1):
+            caches = FieldDataCache.cache_for_users(self.descriptors, course_id, self.users)
+
+        self.assertEquals(set(caches), set(user.id for user in self.users))
+        with self.assertNumQueries(0):
+            for user in self.users[:2]:
+                kvs = DjangoKeyValueStore(caches[user.id])
+                key = DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field')
+                self.assertEquals(user.username, kvs.get(key))
+
+        missing_key = DjangoKeyValueStore.Key(Scope.user_state, self.users[2].id, location('usage_id'), 'a_field')
+        self.assertFalse(DjangoKeyValueStore(caches[self.users[2].id]).has(missing_key))
+
+    def test_no_users(self):
+        with self.assertNumQueries(0):
+            self.assertEquals({}, FieldDataCache.cache_for_users(self.descriptors, course_id, []))
+
+
 class StorageTestBase(object):
     """
     A base class for that gets subclassed when testing each of the scopes.
@@ -0,0 +1,104 @@
+"""
+Benchmarks of reading and writing the state of a problem with many inputs through the
+DjangoKeyValueStore.
+
+Run them with ``-a benchmark`` to see the timings.
+"""
+import json
+import logging
+import timeit
+
+from django.test import TestCase
+from mock import Mock
+from nose.plugins.attrib import attr
+from xblock.fields import Scope, ScopeIds
+
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.tests.factories import StudentModuleFactory, location, course_id
+from student.tests.factories import UserFactory
+
+
+log = logging.getLogger(__name__)
+
+# The user_state fields of a capa problem
+PROBLEM_FIELDS = (
+    'attempts', 'correct_map', 'input_state', 'student_answers', 'done', 'seed', 'last_submission_time'
+)
+
+
+def many_input_problem_state(num_inputs=100):
+    """
+    Return the state of a capa problem with `num_inputs` inputs which has been submitted.
+    """
+    input_ids = ['i4x-edX-bench-problem-many_inputs_{}_1'.format(num) for num in range(num_inputs)]
+    return {
+        'attempts': 1,
+        'correct_map': {
+            input_id: {'correctness': 'correct', 'npoints': None, 'msg': '', 'hint': '', 'hintmode': None,
+                       'queuestate': None}
+            for input_id in input_ids
+        },
+        'input_state': {input_id: {} for input_id in input_ids},
+        'student_answers': {input_id: 'answer {}'.format(input_id) for input_id in input_ids},
+        'done': True,
+        'seed': 1,
+        'last_submission_time': '2014-10-01T12:00:00Z',
+    }
+
+
+@attr('benchmark')
+class TestUserStatePerformance(TestCase):
+    """
+    Time rendering and submitting a problem with many inputs, which reads each of its fields
+    and then writes most of them back.
+    """
+    REPEAT = 50
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.state = many_input_problem_state()
+        StudentModuleFactory.create(
+            student=self.user, course_id=course_id, module_state_key=location('usage_id'), state=json.dumps(self.state)
+        )
+        descriptor = Mock()
+        descriptor.scope_ids = ScopeIds(self.user.id, 'problem', location('def_id'), location('usage_id'))
+        fields = []
+        for name in PROBLEM_FIELDS:
+            field = Mock(scope=Scope.user_state)
+            field.name = name
+            fields.append(field)
+        descriptor.fields.values.return_value = fields
+        self.kvs = DjangoKeyValueStore(FieldDataCache([descriptor], course_id, self.user))
+
+    def _key(self, name):
+        """ The key of the field `name` of the problem """
+        return DjangoKeyValueStore.Key(Scope.user_state, self.user.id, location('usage_id'), name)
+
+    def _render(self):
+        """ Read each of the problem's fields, as rendering it does """
+        return {name: self.kvs.get(self._key(name)) for name in PROBLEM_FIELDS if self.kvs.has(self._key(name))}
+
+    def _submit(self):
+        """ Read the problem's fields, and write back the ones which a submission changes """
+        state = self._render()
+        state['attempts'] += 1
+        self.kvs.set_many({
+            self._key(name): state[name]
+            for name in ('attempts', 'correct_map', 'input_state', 'student_answers', 'done', 'last_submission_time')
+        })
+
+    def test_render_and_submit(self):
+        self.assertEqual(self._render(), self.state)
+
+        render_time = timeit.timeit(self._render, number=self.REPEAT) / self.REPEAT
+        # Parsing the whole state for each field read is what reading a field used to cost
+        parse_time = timeit.timeit(
+            lambda: [json.loads(json.dumps(self.state)) for __ in range(2 * len(PROBLEM_FIELDS))], number=self.REPEAT
+        ) / self.REPEAT
+        submit_time = timeit.timeit(self._submit, number=self.REPEAT) / self.REPEAT
+
+        self.assertEqual(self._render()['attempts'], self.state['attempts'] + self.REPEAT)
+        log.info(
+            "Problem with %d inputs: render %.2fms (vs %.2fms parsing per field), submit %.2fms",
+            len(self.state['student_answers']), render_time * 1000, parse_time * 1000, submit_time * 1000
+        )
@@ -2,23 +2,26 @@
 """
 Integration tests for submitting problem responses and getting grades.
 """
+import itertools
 import json
 import os
 from textwrap import dedent
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
+from django.db import connection, connections
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
-from mock import patch
+from mock import Mock, patch
 
 from capa.tests.response_xml_factory import (
     OptionResponseXMLFactory, CustomResponseXMLFactory, SchematicResponseXMLFactory,
     CodeResponseXMLFactory,
 )
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import StudentModule, AnswerDistributionCount
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from lms.lib.xblock.runtime import quote_slashes
@@ -1049,6 +1052,66 @@ class TestAnswerDistributions(TestSubmittingProblems):
             )
 
 
+class TestPrecomputedAnswerDistributions(TestAnswerDistributions):
+    """
+    Check that the answer distributions read from the precomputed counts of a backfilled
+    course match those computed from its StudentModules.
+    """
+    def setUp(self):
+        super(TestPrecomputedAnswerDistributions, self).setUp()
+        # every later submission is counted as it's saved
+        call_command('backfill_answer_distributions', self.course.id.to_deprecated_string(), workers=1)
+
+    def test_backfill(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        user2 = UserFactory.create()
+        for problem in StudentModule.objects.filter(course_id=self.course.id, student=self.student_user):
+            problem.student_id = user2.id
+            problem.save()
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        expected = grades.answer_distributions(self.course.id)
+
+        # lose the counts, and count each StudentModule in its own chunk
+        AnswerDistributionCount.objects.all().delete()
+        call_command(
+            'backfill_answer_distributions', self.course.id.to_deprecated_string(), workers=1, chunk_size=1
+        )
+        self.assertEqual(AnswerDistributionCount.objects.get(answer=u'Correct').count, 2)
+        self.assertEqual(grades.answer_distributions(self.course.id), expected)
+
+    def test_backfill_with_workers(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        expected = grades.answer_distributions(self.course.id)
+        AnswerDistributionCount.objects.all().delete()
+
+        with patch.object(type(connection), 'close', autospec=True) as close_connection:
+            def make_pool(workers):  # pylint: disable=unused-argument
+                """ Check that no connection is shared with the workers, and count the chunks in this process """
+                closed = [args[0] for args, __ in close_connection.call_args_list]
+                self.assertTrue(all(conn in closed for conn in connections.all()))
+                pool = Mock()
+                pool.imap_unordered.side_effect = itertools.imap
+                return pool
+
+            with patch(
+                'courseware.management.commands.backfill_answer_distributions.multiprocessing.Pool',
+                side_effect=make_pool
+            ) as pool_class:
+                call_command(
+                    'backfill_answer_distributions', self.course.id.to_deprecated_string(), workers=2, chunk_size=1
+                )
+
+        pool_class.assert_called_once_with(2)
+        self.assertEqual(grades.answer_distributions(self.course.id), expected)
+
+    def test_delete(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        StudentModule.objects.get(course_id=self.course.id, student=self.student_user).delete()
+        self.assertFalse(grades.answer_distributions(self.course.id))
+
+
 class TestConditionalContent(TestSubmittingProblems):
     """
     Check that conditional content works correctly with grading.
@@ -26,6 +26,7 @@ from xmodule.modulestore.tests.django_utils import (
 )
 from course_modes.models import CourseMode
 import shoppingcart
+from reverification.tests.factories import MidcourseReverificationWindowFactory
 from student.models import CourseEnrollment
 from student.tests.factories import AdminFactory, UserFactory
 from xmodule.modulestore.django import modulestore
@@ -127,6 +128,17 @@ class ViewsTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(in_cart_span, response.content)
 
+    def test_fetch_reverify_banner_info(self):
+        request = self.request_factory.get('/')
+        request.user = self.user
+        self.assertEqual(views.fetch_reverify_banner_info(request, self.course_key), {})
+
+        # a verified enrollment in a course with an open reverification window
+        self.enrollment.update_enrollment(mode='verified')
+        MidcourseReverificationWindowFactory.create(course_id=self.course_key)
+        reverifications = views.fetch_reverify_banner_info(request, self.course_key)
+        self.assertEqual([info.course_id for info in reverifications['must_reverify']], [self.course_key])
+
     def test_user_groups(self):
         # depreciated function
         mock_user = MagicMock()
@@ -31,6 +31,9 @@ AVAILABLE_FEATURES = STUDENT_FEATURES + PROFILE_FEATURES
 COURSE_REGISTRATION_FEATURES = ('code', 'course_id', 'created_by', 'created_at')
 COUPON_FEATURES = ('course_id', 'percentage_discount', 'description')
 
+# The number of students whose features are loaded at once for a report
+STUDENT_FEATURES_CHUNK_SIZE = 1000
+
 
 def sale_order_record_features(course_id, features):
     """
@@ -172,40 +175,69 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
-    include_cohort_column = 'cohort' in features
+    return [
+        _extract_student_features(student, course_key, features)
+        for student in _enrolled_students(course_key, features)
+    ]
 
+
+def iterate_enrolled_students_features(course_key, features, chunk_size=STUDENT_FEATURES_CHUNK_SIZE):
+    """
+    Yield the same dictionaries as `enrolled_students_features`, loading the
+    students `chunk_size` at a time so that only one chunk of them is held in
+    memory at once.
+    """
+    students = _enrolled_students(course_key, features)
+    last_username = None
+    while True:
+        if last_username is not None:
+            chunk = list(students.filter(username__gt=last_username)[:chunk_size])
+        else:
+            chunk = list(students[:chunk_size])
+        for student in chunk:
+            yield _extract_student_features(student, course_key, features)
+        if len(chunk) < chunk_size:
+            return
+        last_username = chunk[-1].username
+
+
+def _enrolled_students(course_key, features):
+    """
+    Return a queryset of the students enrolled in the course, ordered by
+    username, which loads everything needed for `features`.
+    """
     students = User.objects.filter(
         courseenrollment__course_id=course_key,
         courseenrollment__is_active=1,
     ).order_by('username').select_related('profile')
 
-    if include_cohort_column:
+    if 'cohort' in features:
         students = students.prefetch_related('course_groups')
-
-    def extract_student(student, features):
-        """ convert student to dictionary """
-        student_features = [x for x in STUDENT_FEATURES if x in features]
-        profile_features = [x for x in PROFILE_FEATURES if x in features]
-
-        student_dict = dict((feature, getattr(student, feature))
-                            for feature in student_features)
-        profile = student.profile
-        if profile is not None:
-            profile_dict = dict((feature, getattr(profile, feature))
-                                for feature in profile_features)
-            student_dict.update(profile_dict)
-
-        if include_cohort_column:
-            # Note that we use student.course_groups.all() here instead of
-            # student.course_groups.filter(). The latter creates a fresh query,
-            # therefore negating the performance gain from prefetch_related().
-            student_dict['cohort'] = next(
-                (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
-                "[unassigned]"
-            )
-        return student_dict
-
-    return [extract_student(student, features) for student in students]
+    return students
+
+
+def _extract_student_features(student, course_key, features):
+    """ convert student to dictionary """
+    student_features = [x for x in STUDENT_FEATURES if x in features]
+    profile_features = [x for x in PROFILE_FEATURES if x in features]
+
+    student_dict = dict((feature, getattr(student, feature))
+                        for feature in student_features)
+    profile = student.profile
+    if profile is not None:
+        profile_dict = dict((feature, getattr(profile, feature))
+                            for feature in profile_features)
+        student_dict.update(profile_dict)
+
+    if 'cohort' in features:
+        # Note that we use student.course_groups.all() here instead of
+        # student.course_groups.filter(). The latter creates a fresh query,
+        # therefore negating the performance gain from prefetch_related().
+        student_dict['cohort'] = next(
+            (cohort.name for cohort in student.course_groups.all() if cohort.course_id == course_key),
+            "[unassigned]"
+        )
+    return student_dict
 
 
 def coupon_codes_features(features, coupons_list):
@@ -14,7 +14,8 @@ from shoppingcart.models import (
 from course_modes.models import CourseMode
 from instructor_analytics.basic import (
     sale_record_features, sale_order_record_features, enrolled_students_features, course_registration_features,
-    coupon_codes_features, AVAILABLE_FEATURES, STUDENT_FEATURES, PROFILE_FEATURES
+    coupon_codes_features, iterate_enrolled_students_features, AVAILABLE_FEATURES, STUDENT_FEATURES,
+    PROFILE_FEATURES
 )
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from courseware.tests.factories import InstructorFactory
@@ -85,6 +86,14 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
             else:
                 self.assertEqual(report['cohort'], '[unassigned]')
 
+    def test_iterate_enrolled_students_features(self):
+        query_features = ('username', 'name', 'email')
+        # one query for each chunk of (at most) 7 of the 30 students
+        with self.assertNumQueries(5):
+            userreports = list(iterate_enrolled_students_features(self.course_key, query_features, chunk_size=7))
+        self.assertEqual(userreports, enrolled_students_features(self.course_key, query_features))
+        self.assertEqual(len(userreports), len(self.users))
+
     def test_available_features(self):
         self.assertEqual(len(AVAILABLE_FEATURES), len(STUDENT_FEATURES + PROFILE_FEATURES))
         self.assertEqual(set(AVAILABLE_FEATURES), set(STUDENT_FEATURES + PROFILE_FEATURES))
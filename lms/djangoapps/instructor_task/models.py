@@ -18,7 +18,9 @@ from uuid import uuid4
 import csv
 import json
 import hashlib
+import os
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,10 +195,16 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows are written to a report file (see `open_report_file()`) as
+    they are produced, so reports don't have to be held in memory while they
+    are stored.
     """
+    # Whether stores compress their reports, unless GRADES_DOWNLOAD['GZIP'] says otherwise
+    GZIP_DEFAULT = False
+
+    def __init__(self, gzip=None):
+        self.gzip = self.GZIP_DEFAULT if gzip is None else gzip
+
     @classmethod
     def from_config(cls):
         """
@@ -209,6 +217,47 @@ class ReportStore(object):
         elif storage_type.lower() == "localfs":
             return LocalFSReportStore.from_config()
 
+    def open_report_file(self, course_id, filename):
+        """
+        Return a write-only file object for the file `filename` of the given
+        `course_id`. Nothing is visible in the store until the file's
+        `commit()` is called, and `discard()` throws away what was written.
+        """
+        raise NotImplementedError
+
+    def store_rows(self, course_id, filename, rows):
+        """
+        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
+        strings), write the rows out as a CSV file, gzip'd if the store is
+        configured to compress its reports. `rows` can be an iterator; each row
+        is written out as it's produced, so only a bounded amount of the report
+        is held in memory. If iterating over `rows` raises an exception, nothing
+        is stored.
+        """
+        report_file = self.open_report_file(course_id, filename)
+        try:
+            if self.gzip:
+                output = GzipFile(filename='', fileobj=report_file, mode="wb")
+            else:
+                output = report_file
+            csv.writer(output).writerows(self._get_utf8_encoded_rows(rows))
+            if self.gzip:
+                # Flushes the rest of the compressed data (but leaves `report_file` open)
+                output.close()
+        except Exception:
+            report_file.discard()
+            raise
+        report_file.commit()
+
+    def _read_file(self, csv_file):
+        """
+        Return an iterator over the rows of a file-like object which was written
+        by `store_rows()`.
+        """
+        if self.gzip:
+            csv_file = GzipFile(fileobj=csv_file, mode="rb")
+        return self._get_unicode_decoded_rows(csv_file)
+
     def _get_utf8_encoded_rows(self, rows):
         """
         Given a list of `rows` containing unicode strings, return a
@@ -218,6 +267,89 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_unicode_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing a utf-8 encoded CSV, yield its rows
+        with their strings decoded to unicode.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+
+class S3ReportFile(object):
+    """
+    A write-only file object which uploads what is written to it to an S3 key.
+
+    Writes are buffered until there's enough data for a part of a multipart
+    upload, so at most about `part_size` bytes are held in memory however large
+    the file gets. Files smaller than a single part are uploaded in one request
+    when they are committed. S3 doesn't show the key until its upload has been
+    completed.
+    """
+    # S3 requires every part of a multipart upload but the last to be at least 5MB
+    PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, key, headers, part_size=None):
+        self.key = key
+        self.headers = headers
+        self.part_size = part_size or self.PART_SIZE
+        self.multipart_upload = None
+        self.parts_uploaded = 0
+        self.buff = StringIO()
+
+    def write(self, data):
+        """
+        Append `data` to the file, uploading the next part of it if enough data has been buffered.
+        """
+        self.buff.write(data)
+        if self.buff.tell() >= self.part_size:
+            self._upload_part()
+
+    def flush(self):
+        """
+        Parts are only uploaded once they are big enough, so there's nothing to do here.
+        """
+        pass
+
+    def commit(self):
+        """
+        Upload whatever hasn't been uploaded yet, and make the key visible.
+        """
+        if self.multipart_upload is None:
+            data = self.buff.getvalue()
+            headers = dict(self.headers)
+            headers["Content-Length"] = len(data)
+            self.key.set_contents_from_string(data, headers=headers)
+        else:
+            try:
+                if self.buff.tell():
+                    self._upload_part()
+                self.multipart_upload.complete_upload()
+            except Exception:
+                # S3 keeps the parts of an upload until it's completed or cancelled
+                self.multipart_upload.cancel_upload()
+                raise
+        self.buff = None
+
+    def discard(self):
+        """
+        Abort the upload, so that S3 drops any parts that have already been uploaded.
+        """
+        if self.multipart_upload is not None:
+            self.multipart_upload.cancel_upload()
+        self.buff = None
+
+    def _upload_part(self):
+        """
+        Upload the buffered data as the next part of the multipart upload (starting it if need be).
+        """
+        if self.multipart_upload is None:
+            self.multipart_upload = self.key.bucket.initiate_multipart_upload(self.key.key, headers=self.headers)
+        self.parts_uploaded += 1
+        self.buff.seek(0)
+        self.multipart_upload.upload_part_from_file(self.buff, self.parts_uploaded)
+        self.buff = StringIO()
+
 
 class S3ReportStore(ReportStore):
     """
@@ -231,7 +363,10 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
-    def __init__(self, bucket_name, root_path):
+    GZIP_DEFAULT = True
+
+    def __init__(self, bucket_name, root_path, gzip=None):
+        super(S3ReportStore, self).__init__(gzip)
         self.root_path = root_path
 
         conn = S3Connection(
@@ -252,13 +387,15 @@ class S3ReportStore(ReportStore):
             ROOT_PATH : The path you want to store all course files under. Do not
                         use a leading or trailing slash. e.g. "staging" or
                         "staging/2013", not "/staging", or "/staging/"
+            GZIP : Optional. Whether to gzip reports (the default is True).
 
         Since S3 access relies on boto, you must also define `AWS_ACCESS_KEY_ID`
         and `AWS_SECRET_ACCESS_KEY` in settings.
         """
         return cls(
             settings.GRADES_DOWNLOAD['BUCKET'],
-            settings.GRADES_DOWNLOAD['ROOT_PATH']
+            settings.GRADES_DOWNLOAD['ROOT_PATH'],
+            settings.GRADES_DOWNLOAD.get('GZIP'),
         )
 
     def key_for(self, course_id, filename):
@@ -305,35 +442,99 @@ class S3ReportStore(ReportStore):
             }
         )
 
-    def store_rows(self, course_id, filename, rows):
+    def open_report_file(self, course_id, filename):
         """
-        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        Return an `S3ReportFile` which uploads to the key for `filename` in a
+        directory determined by hashing `course_id`.
+
+        Even though gzip'd reports are stored in gzip format, browsers will
+        transparently download and decompress them. Filenames should end in
+        `.csv`, not `.gz`.
+        """
+        headers = {"Content-Type": "text/csv"}
+        if self.gzip:
+            headers["Content-Encoding"] = "gzip"
+        return S3ReportFile(self.key_for(course_id, filename), headers)
 
-        Even though we store it in gzip format, browsers will transparently
-        download and decompress it. Filenames should end in `.csv`, not `.gz`.
+    def read_rows(self, course_id, filename):
+        """
+        Return an iterator over the rows of the CSV file `filename` which was
+        stored with `store_rows()`. Raises an IOError if there is no such file.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        key = self.key_for(course_id, filename)
+        if not key.exists():
+            raise IOError("No report named {} for course {}".format(filename, course_id))
+        return self._read_file(StringIO(key.get_contents_as_string()))
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` for the given `course_id`.
+        """
+        self.key_for(course_id, filename).delete()
 
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
-        can be plugged straight into an href
+        can be plugged straight into an href. Files stored in subdirectories of
+        the course's directory (such as partial reports) are not included.
         """
         course_dir = self.key_for(course_id, '')
+        keys = [
+            key for key in self.bucket.list(prefix=course_dir.key)
+            if "/" not in key.key[len(course_dir.key):]
+        ]
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
-            for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            for key in sorted(keys, reverse=True, key=lambda k: k.last_modified)
         ]
 
 
+class LocalFSReportFile(object):
+    """
+    A write-only file object which appends what is written to it to a temporary
+    file, and moves that into place when it is committed. Readers never see a
+    partially written file.
+    """
+    def __init__(self, full_path, temp_dir):
+        self.full_path = full_path
+        for directory in (os.path.dirname(full_path), temp_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+        # The temporary file has to be on the same filesystem for the rename to be atomic
+        fd, self.temp_path = tempfile.mkstemp(dir=temp_dir)
+        self.temp_file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        """
+        Append `data` to the file.
+        """
+        self.temp_file.write(data)
+
+    def flush(self):
+        """
+        Flush the temporary file.
+        """
+        self.temp_file.flush()
+
+    def commit(self):
+        """
+        Move the finished file into place, replacing anything that was there previously.
+        """
+        self.temp_file.close()
+        # mkstemp creates the file readable only by its owner; give it the mode open() would have
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self.temp_path, 0o666 & ~umask)
+        os.rename(self.temp_path, self.full_path)
+
+    def discard(self):
+        """
+        Remove the temporary file.
+        """
+        self.temp_file.close()
+        os.remove(self.temp_path)
+
+
 class LocalFSReportStore(ReportStore):
     """
     LocalFS implementation of a ReportStore. This is meant for debugging
@@ -344,11 +545,12 @@ class LocalFSReportStore(ReportStore):
     This lets us do the cheap thing locally for debugging without having to open
     up a separate URL that would only be used to send files in dev.
     """
-    def __init__(self, root_path):
+    def __init__(self, root_path, gzip=None):
         """
         Initialize with root_path where we're going to store our files. We
         will build a directory structure under this for each course.
         """
+        super(LocalFSReportStore, self).__init__(gzip)
         self.root_path = root_path
         if not os.path.exists(root_path):
             os.makedirs(root_path)
@@ -364,8 +566,9 @@ class LocalFSReportStore(ReportStore):
 
             STORAGE_TYPE : "localfs"
             ROOT_PATH : /tmp/edx/report-downloads/
+            GZIP : Optional. Whether to gzip reports (the default is False).
         """
-        return cls(settings.GRADES_DOWNLOAD['ROOT_PATH'])
+        return cls(settings.GRADES_DOWNLOAD['ROOT_PATH'], settings.GRADES_DOWNLOAD.get('GZIP'))
 
     def path_to(self, course_id, filename):
         """Return the full path to a given file for a given course."""
@@ -381,21 +584,40 @@ class LocalFSReportStore(ReportStore):
         full_path = self.path_to(course_id, filename)
         directory = os.path.dirname(full_path)
         if not os.path.exists(directory):
-            os.mkdir(directory)
+            os.makedirs(directory)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
 
-    def store_rows(self, course_id, filename, rows):
+    def open_report_file(self, course_id, filename):
+        """
+        Return a `LocalFSReportFile` for the given file. Files which are being
+        written are kept in a `.tmp` directory under `root_path`, so they aren't
+        listed for download.
+        """
+        return LocalFSReportFile(self.path_to(course_id, filename), os.path.join(self.root_path, '.tmp'))
+
+    def read_rows(self, course_id, filename):
         """
-        Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        Return an iterator over the rows of the CSV file `filename` which was
+        stored with `store_rows()`. Raises an IOError if there is no such file.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        if not os.path.isfile(full_path):
+            raise IOError("No report named {} for course {}".format(filename, course_id))
+
+        def rows():
+            """ Read the rows, closing the file once they have all been read """
+            with open(full_path, "rb") as csv_file:
+                for row in self._read_file(csv_file):
+                    yield row
+        return rows()
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` for the given `course_id`.
+        """
+        os.remove(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
@@ -403,12 +625,14 @@ class LocalFSReportStore(ReportStore):
         can be plugged straight into an href. Note that `LocalFSReportStore`
         will generate `file://` type URLs, so you'll need to copy the URL and
         open it in a new browser window. Again, this class is only meant for
-        local development.
+        local development. Files stored in subdirectories of the course's
+        directory (such as partial reports) are not included.
         """
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
         files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [(filename, full_path) for filename, full_path in files if os.path.isfile(full_path)]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -9,7 +9,7 @@ import psutil
 from contextlib import contextmanager
 
 from celery.utils.log import get_task_logger
-from celery.states import SUCCESS, READY_STATES, RETRY
+from celery.states import SUCCESS, FAILURE, READY_STATES, RETRY
 import dogstats_wrapper as dog_stats_api
 
 from django.db import transaction, DatabaseError
@@ -451,7 +451,7 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
 
-def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
+def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0, complete_parent=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -462,9 +462,14 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    If `complete_parent` is False, the parent task is left in progress when its last subtask
+    completes, for the caller to finish its work and then call complete_parent_task().
+
+    Returns True if this update completed the last of the parent task's subtasks.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status, complete_parent)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
@@ -472,7 +477,9 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
             dog_stats_api.increment('instructor_task.subtask.retry_after_failed_update')
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(
+                entry_id, current_task_id, new_subtask_status, retry_count, complete_parent
+            )
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -486,7 +493,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
 
 @transaction.commit_manually
-def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
+def _update_subtask_status(entry_id, current_task_id, new_subtask_status, complete_parent=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -506,12 +513,14 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     subtasks.  'Total' is expected to have been set at the time the subtasks were created.
     The other three counters are incremented depending on the value of `status`.  Once the counters
     for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
+    "status" is changed to SUCCESS, unless `complete_parent` is False.
 
     The "subtasks" field also contains a 'status' key, that contains a dict that stores status
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if this update completed the last of the subtasks.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -562,7 +571,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
         # report that here.
-        if num_remaining <= 0:
+        if num_remaining <= 0 and complete_parent:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
         entry.task_output = InstructorTask.create_output_for_success(task_progress)
@@ -579,3 +588,18 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     else:
         TASK_LOG.debug("about to commit....")
         transaction.commit()
+        return num_remaining <= 0
+
+
+def complete_parent_task(entry_id, exception=None, traceback_string=None):
+    """
+    Mark an InstructorTask whose last subtask was updated with `complete_parent=False` as done:
+    as SUCCESS, or as FAILURE with the given `exception` and `traceback_string` as its output.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if exception is None:
+        entry.task_state = SUCCESS
+    else:
+        entry.task_state = FAILURE
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+    entry.save_now()
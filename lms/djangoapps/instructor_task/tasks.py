@@ -31,6 +31,7 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    upload_grades_csv_chunk,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -140,10 +141,34 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, create_subtask_fcn=_create_grades_csv_subtask)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grades_csv_subtask(entry_id, part_number, report_info, student_list, initial_subtask_status):
+    """Creates a subtask to grade a chunk of the students in a grade report."""
+    return calculate_grades_csv_chunk.subtask(
+        (
+            entry_id,
+            part_number,
+            report_info,
+            student_list,
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_chunk(entry_id, part_number, report_info, student_list, subtask_status_dict):
+    """
+    Grade a chunk of the students in a course for a grade report queued by
+    `calculate_grades_csv`, and store their part of the report.
+    """
+    return upload_grades_csv_chunk(entry_id, part_number, report_info, student_list, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -6,12 +6,16 @@ running state of a course.
 import json
 import urllib
 from datetime import datetime
+from functools import partial
+from itertools import chain, count
 from time import time
+import traceback
 import unicodecsv
 
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
@@ -28,9 +32,16 @@ from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iterate_enrolled_students_features
+from instructor_analytics.csvs import iterate_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+    complete_parent_task,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -513,58 +524,79 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            This can also be an iterator, so that the rows don't all have to
+            be held in memory.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
     report_store = ReportStore.from_config()
     report_store.store_rows(
         course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
+        _report_filename(course_id, csv_name, timestamp.strftime(REPORT_TIMESTAMP_FORMAT)),
         rows
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+# The format of the timestamps in report filenames
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d-%H%M"
+
+
+def _report_filename(course_id, csv_name, timestamp_str):
     """
-    For a given `course_id`, generate a grades CSV file for all students that
-    are enrolled, and store using a `ReportStore`. Once created, the files can
-    be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
+    Return the name of the report `csv_name` for the course, generated at `timestamp_str`.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp_str
+    )
 
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+
+def _partial_report_filename(task_id, csv_name, part_number):
     """
-    start_time = time()
-    start_date = datetime.now(UTC)
-    status_interval = 100
-    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    Return the name of the part `part_number` of the report `csv_name` generated by the task
+    `task_id`. Partial reports are stored in a subdirectory, so they aren't listed for download.
+    """
+    return u"partial/{task_id}/{csv_name}_{part_number:05d}.csv".format(
+        task_id=task_id,
+        csv_name=csv_name,
+        part_number=part_number
+    )
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+
+def _grade_report_header(section_labels):
+    """
+    Return the header row of a grade report with a column for each of `section_labels`.
+    """
+    return ["id", "email", "username", "grade"] + list(section_labels)
+
+
+def _grade_report_rows(course_id, students, progress, err_rows, header=None, update_status=None, status_interval=100):
+    """
+    Grade `students`, yielding a row of the grade report for each student who could be
+    graded, and appending a row to `err_rows` for each student who couldn't be.
+
+    Arguments:
+        progress: a `TaskProgress` or `SubtaskStatus` whose counts are updated as each
+            student is graded.
+        header: the section labels to include in each row. If it is None, the labels of
+            the first student who is graded are used, and the report's header row is
+            yielded before that student's row.
+        update_status: an optional function which is called after every
+            `status_interval` students to report progress.
+    """
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+        if update_status is not None and progress.attempted % status_interval == 0:
+            update_status()
+        progress.attempted += 1
 
         if gradeset:
             # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                # Encode the header row in utf-8 encoding in case there are unicode characters
-                header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
+            progress.succeeded += 1
+            if header is None:
+                header = [section['label'] for section in gradeset[u'section_breakdown']]
+                yield _grade_report_header(header)
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -579,19 +611,75 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
+            yield [student.id, student.email, student.username, gradeset['percent']] + row_percents
         else:
             # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
+            progress.failed += 1
             err_rows.append([student.id, student.username, err_msg])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the actual upload
+def _first_grade_report_header(course_id, students):
+    """
+    Return the section labels of the first of `students` who can be graded, or None if
+    none of them can be. This is the header used by every part of a chunked grade report.
+    """
+    for __, gradeset, __ in iterate_grades_for(course_id, students.iterator(), chunk_size=None):
+        if gradeset:
+            return [section['label'] for section in gradeset[u'section_breakdown']]
+    return None
+
+
+def upload_grades_csv(_xmodule_instance_args, entry_id, course_id, _task_input, action_name,
+                      create_subtask_fcn=None):
+    """
+    For a given `course_id`, generate a grades CSV file for all students that
+    are enrolled, and store using a `ReportStore`. Once created, the files can
+    be accessed by instantiating another `ReportStore` (via
+    `ReportStore.from_config()`) and calling `link_for()` on it. Rows are
+    written out as students are graded, but a file doesn't become visible in
+    the ReportStore until it is complete.
+
+    If `create_subtask_fcn` is passed, and there are more than
+    settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK students enrolled, the students
+    are split into chunks which are graded in parallel by subtasks. Each
+    subtask stores its rows of the report in a partial CSV, and the last one to
+    finish merges them (see `upload_grades_csv_chunk`). `create_subtask_fcn` is
+    called with the `entry_id`, the part number of the chunk, a dict of report
+    info, the list of students in the chunk, and the subtask's initial
+    SubtaskStatus, and must return the subtask to run.
+
+    As we start to add more CSV downloads, it will probably be worthwhile to
+    make a more general CSVDoc class instead of building out the rows like we
+    do here.
+    """
+    start_time = time()
+    start_date = datetime.now(UTC)
+    enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
+    num_students = enrolled_students.count()
+
+    if create_subtask_fcn is not None and num_students > settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK:
+        return _queue_grades_csv_subtasks(
+            entry_id, course_id, action_name, create_subtask_fcn, enrolled_students, start_date
+        )
+
+    task_progress = TaskProgress(action_name, num_students, start_time)
+
+    # Stream the rows of the report into the CSV file as our students are graded
+    err_rows = [["id", "username", "error_msg"]]
+    current_step = {'step': 'Calculating Grades'}
+    rows = _grade_report_rows(
+        course_id,
+        enrolled_students,
+        task_progress,
+        err_rows,
+        update_status=partial(task_progress.update_task_state, extra_meta=current_step),
+    )
     upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
 
+    # By this point, we've graded everyone and uploaded their grades.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+
     # If there are any error rows (don't count the header), write them out as well
     if len(err_rows) > 1:
         upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
@@ -600,6 +688,168 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _queue_grades_csv_subtasks(entry_id, course_id, action_name, create_subtask_fcn, enrolled_students, start_date):
+    """
+    Queue the subtasks which each grade a chunk of `enrolled_students` for a grade report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # Check to see if the subtasks have already been defined (when this task has been
+    # requeued after a loss of connection, as for bulk email). If so, don't define them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued subtasks for a grade report: %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    # Every part of the report has to have the same columns, so pick them before fanning out
+    report_info = {
+        'task_id': entry.task_id,
+        'timestamp': start_date.strftime(REPORT_TIMESTAMP_FORMAT),
+        'header': _first_grade_report_header(course_id, enrolled_students),
+    }
+    part_numbers = count()
+
+    def _create_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the next chunk of students."""
+        return create_subtask_fcn(entry_id, next(part_numbers), report_info, student_list, initial_subtask_status)
+
+    TASK_LOG.info(u"Task %s: Preparing to queue subtasks for the grade report of course %s", entry.task_id, course_id)
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_subtask,
+        enrolled_students,
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+    )
+
+
+def upload_grades_csv_chunk(entry_id, part_number, report_info, student_list, subtask_status_dict):
+    """
+    Grade a chunk of the students of a grade report, as a subtask queued by `upload_grades_csv`,
+    and store their rows of the report as a partial CSV. The subtask which completes the
+    report's last chunk merges the partial CSVs into the final report.
+
+    Arguments:
+        entry_id: the id of the InstructorTask of the grade report.
+        part_number: the position of this chunk in the report.
+        report_info: a dict containing the 'task_id' of the InstructorTask, the 'timestamp' to
+            name the report with, and the section labels to use as the report's 'header'.
+        student_list: a list of dicts with the 'pk' of each student in the chunk.
+        subtask_status_dict: the dict representation of the subtask's SubtaskStatus.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+
+    # Make sure this chunk isn't being (or hasn't already been) graded by another worker
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        with dog_stats_api.timer('instructor_tasks.grade_report.chunk.time'):
+            student_ids = [item['pk'] for item in student_list]
+            students_by_id = User.objects.in_bulk(student_ids)
+            students = [students_by_id[student_id] for student_id in student_ids if student_id in students_by_id]
+
+            report_store = ReportStore.from_config()
+            task_id = report_info['task_id']
+            err_rows = []
+            # If the report has no header yet (none of the students could be graded when it was
+            # queued), this part's rows start with a header of its own, which the merge strips.
+            # The rows are graded before anything is stored, and the grade rows are stored last,
+            # so that if storing either part fails, none of these students' grades are merged.
+            rows = list(
+                _grade_report_rows(course_id, students, subtask_status, err_rows, header=report_info['header'])
+            )
+            if err_rows:
+                report_store.store_rows(
+                    course_id, _partial_report_filename(task_id, 'grade_report_err', part_number), err_rows
+                )
+            report_store.store_rows(course_id, _partial_report_filename(task_id, 'grade_report', part_number), rows)
+    except Exception:
+        # Since we don't know how far we got, count all of the students as having failed.
+        TASK_LOG.exception(u"Grade report subtask %s for course %s failed unexpectedly", current_task_id, course_id)
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        subtask_status.increment(failed=len(student_list), state=FAILURE)
+        if update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False):
+            _complete_grade_report(entry_id, course_id, report_info)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    if update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False):
+        _complete_grade_report(entry_id, course_id, report_info)
+    return subtask_status.to_dict()
+
+
+def _complete_grade_report(entry_id, course_id, report_info):
+    """
+    Merge the partial CSVs of a chunked grade report once its last chunk is graded, and only
+    then mark its InstructorTask as done: as FAILURE if the merge fails. A merge failure is
+    recorded on the task rather than raised, so it doesn't mask the last subtask's own error.
+    """
+    try:
+        _merge_grade_report(entry_id, course_id, report_info)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Merging the grade report of instructor task %d for course %s failed", entry_id, course_id)
+        complete_parent_task(entry_id, exc, traceback.format_exc())
+    else:
+        complete_parent_task(entry_id)
+
+
+def _merge_grade_report(entry_id, course_id, report_info):
+    """
+    Merge the partial CSVs of a chunked grade report into the final report (and error report),
+    and delete them.
+    """
+    num_parts = json.loads(InstructorTask.objects.get(pk=entry_id).subtasks)['total']
+    report_store = ReportStore.from_config()
+    partial_filenames = []
+
+    def merged_rows(csv_name, header=None, headed_parts=False):
+        """
+        Yield the header, followed by the rows of each part of the report in turn. If `headed_parts`,
+        each part starts with a header row of its own, and the first part's is used as the header.
+        """
+        if header is not None:
+            yield header
+        for part_number in range(num_parts):
+            filename = _partial_report_filename(report_info['task_id'], csv_name, part_number)
+            try:
+                rows = iter(report_store.read_rows(course_id, filename))
+            except IOError:
+                # This part had no rows of this kind, or its subtask failed
+                continue
+            partial_filenames.append(filename)
+            if headed_parts:
+                part_header = next(rows, None)
+                if header is None and part_header is not None:
+                    header = part_header
+                    yield header
+            for row in rows:
+                yield row
+
+    with dog_stats_api.timer('instructor_tasks.grade_report.merge.time'):
+        if report_info['header'] is not None:
+            grade_rows = merged_rows('grade_report', _grade_report_header(report_info['header']))
+        else:
+            grade_rows = merged_rows('grade_report', headed_parts=True)
+        report_store.store_rows(
+            course_id, _report_filename(course_id, 'grade_report', report_info['timestamp']), grade_rows
+        )
+
+        err_rows = merged_rows('grade_report_err')
+        first_err_row = next(err_rows, None)
+        if first_err_row is not None:
+            report_store.store_rows(
+                course_id,
+                _report_filename(course_id, 'grade_report_err', report_info['timestamp']),
+                chain([["id", "username", "error_msg"], first_err_row], err_rows)
+            )
+
+    for filename in partial_filenames:
+        report_store.delete(course_id, filename)
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -612,22 +862,25 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table and format it, as it's uploaded
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
 
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    def rows():
+        """ Yield the header, then the features of each student """
+        yield query_features
+        student_data = iterate_enrolled_students_features(course_id, query_features)
+        for row in iterate_dictlist(student_data, query_features):
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            yield row
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    upload_csv_to_report_store(rows(), 'student_profile_info', course_id, start_date)
 
+    task_progress.skipped = task_progress.total - task_progress.attempted
     return task_progress.update_task_state(extra_meta=current_step)
 
 
@@ -702,15 +955,14 @@ def cohort_students_and_upload(_xmodule_instance_args, _entry_id, course_id, tas
 
     # Filter the output of `add_users_to_cohorts` in order to upload the result.
     output_header = ['Cohort Name', 'Exists', 'Students Added', 'Students Not Found']
-    output_rows = [
+    output_rows = (
         [
             ','.join(status_dict.get(column_name, '')) if column_name == 'Students Not Found'
             else status_dict[column_name]
             for column_name in output_header
         ]
         for _cohort_name, status_dict in cohorts_status.iteritems()
-    ]
-    output_rows.insert(0, output_header)
-    upload_csv_to_report_store(output_rows, 'cohort_results', course_id, start_date)
+    )
+    upload_csv_to_report_store(chain([output_header], output_rows), 'cohort_results', course_id, start_date)
 
     return task_progress.update_task_state(extra_meta=current_step)
@@ -3,15 +3,36 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+import hashlib
+import logging
 import mock
+import os
+import stat
 import time
+import timeit
 from datetime import datetime
+from gzip import GzipFile
 from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from django.conf import settings
+from nose.plugins.attrib import attr
+
+from instructor_task.models import LocalFSReportStore, S3ReportFile, S3ReportStore
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
+log = logging.getLogger(__name__)
+
+
+def report_rows(num_rows, fail=False):
+    """
+    Yield `num_rows` rows of (poorly compressible) data, and then raise a ValueError if `fail`.
+    """
+    for num in xrange(num_rows):
+        yield [num, hashlib.sha1(str(num)).hexdigest(), hashlib.sha1(str(-num)).hexdigest()]
+    if fail:
+        raise ValueError("Couldn't produce a row")
+
 
 class MockKey(object):
     """
@@ -20,24 +41,80 @@ class MockKey(object):
     def __init__(self, bucket):
         self.last_modified = datetime.now()
         self.bucket = bucket
+        self.key = None
+        self.contents = None
+        self.headers = None
 
-    def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
+    def set_contents_from_string(self, contents, headers):
         """ Expected method on a Key object. """
+        self.contents = contents
+        self.headers = headers
         self.bucket.store_key(self)
 
+    def get_contents_as_string(self):
+        """ Expected method on a Key object. """
+        return self.bucket.get_key(self.key).contents
+
+    def exists(self):
+        """ Expected method on a Key object. """
+        return self.bucket.get_key(self.key) is not None
+
+    def delete(self):
+        """ Expected method on a Key object. """
+        self.bucket.keys = [key for key in self.bucket.keys if key.key != self.key]
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """
+    Mocking a boto S3 MultiPartUpload object. Like S3, the key only appears in the bucket
+    once the upload has been completed.
+    """
+    def __init__(self, bucket, key_name, headers):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.headers = headers
+        self.parts = {}
+        self.cancelled = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts[part_num] = fp.read()
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        key = MockKey(self.bucket)
+        key.key = self.key_name
+        key.set_contents_from_string(''.join(self.parts[num] for num in sorted(self.parts)), self.headers)
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.cancelled = True
+        self.parts = {}
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.multipart_uploads = []
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
-        self.keys.append(key)
+        self.keys = [other for other in self.keys if other.key != key.key] + [key]
+
+    def get_key(self, key_name):
+        """ Expected method on a Bucket object. """
+        return next((key for key in self.keys if key.key == key_name), None)
+
+    def initiate_multipart_upload(self, key_name, headers):
+        """ Expected method on a Bucket object. """
+        upload = MockMultiPartUpload(self, key_name, headers)
+        self.multipart_uploads.append(upload)
+        return upload
 
     def list(self, prefix):  # pylint: disable=unused-argument
         """ Expected method on a Bucket object. """
@@ -84,6 +161,26 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_iterator(self):
+        report_store = self.create_report_store()
+        rows = [[u'id', u'name'], [1, u'ｷo尺 ﾑﾚﾚ'], [2, u'plain']]
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+        self.assertEqual(
+            list(report_store.read_rows(self.course_id, 'report.csv')),
+            [[u'id', u'name'], [u'1', u'ｷo尺 ﾑﾚﾚ'], [u'2', u'plain']]
+        )
+
+    def test_store_rows_failure(self):
+        """
+        Test that nothing is stored if producing the rows fails part way through.
+        """
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', report_rows(10, fail=True))
+        with self.assertRaises(IOError):
+            report_store.read_rows(self.course_id, 'report.csv')
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +190,28 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_store_rows_gzip(self):
+        report_store = LocalFSReportStore(settings.GRADES_DOWNLOAD['ROOT_PATH'], gzip=True)
+        report_store.store_rows(self.course_id, 'report.csv', [[u'id'], [1]])
+        with open(report_store.path_to(self.course_id, 'report.csv'), 'rb') as report_file:
+            self.assertEqual(GzipFile(fileobj=report_file, mode='rb').read(), 'id\r\n1\r\n')
+        self.assertEqual(list(report_store.read_rows(self.course_id, 'report.csv')), [[u'id'], [u'1']])
+
+    def test_no_temporary_files_left(self):
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', [[u'id'], [1]])
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'other.csv', report_rows(10, fail=True))
+        self.assertEqual(os.listdir(os.path.join(report_store.root_path, '.tmp')), [])
+
+    def test_report_file_mode(self):
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', [[u'id'], [1]])
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = os.stat(report_store.path_to(self.course_id, 'report.csv')).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o666 & ~umask)
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +224,77 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+    def test_multipart_upload(self):
+        report_store = self.create_report_store()
+        with mock.patch.object(S3ReportFile, 'PART_SIZE', 64 * 1024):
+            report_store.store_rows(self.course_id, 'report.csv', report_rows(5000))
+
+        upload = report_store.bucket.multipart_uploads[0]
+        self.assertEqual(upload.headers['Content-Encoding'], 'gzip')
+        part_sizes = [len(upload.parts[num]) for num in sorted(upload.parts)]
+        self.assertGreater(len(part_sizes), 1)
+        # every part but the last is at least as big as S3 requires, and not much bigger
+        for part_size in part_sizes[:-1]:
+            self.assertTrue(64 * 1024 <= part_size < 128 * 1024)
+        self.assertEqual(
+            list(report_store.read_rows(self.course_id, 'report.csv')),
+            [[unicode(item) for item in row] for row in report_rows(5000)]
+        )
+
+    def test_multipart_upload_failure(self):
+        report_store = self.create_report_store()
+        with mock.patch.object(S3ReportFile, 'PART_SIZE', 64 * 1024):
+            with self.assertRaises(ValueError):
+                report_store.store_rows(self.course_id, 'report.csv', report_rows(5000, fail=True))
+        self.assertTrue(report_store.bucket.multipart_uploads[0].cancelled)
+        self.assertEqual(report_store.bucket.keys, [])
+
+    def test_multipart_upload_commit_failure(self):
+        """
+        Test that the upload is cancelled if it can't be completed.
+        """
+        report_store = self.create_report_store()
+        with mock.patch.object(S3ReportFile, 'PART_SIZE', 64 * 1024):
+            with mock.patch.object(MockMultiPartUpload, 'complete_upload', side_effect=IOError):
+                with self.assertRaises(IOError):
+                    report_store.store_rows(self.course_id, 'report.csv', report_rows(5000))
+        self.assertTrue(report_store.bucket.multipart_uploads[0].cancelled)
+        self.assertEqual(report_store.bucket.keys, [])
+
+
+@attr('benchmark')
+@mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
+@mock.patch('instructor_task.models.Key', new=MockKey)
+@mock.patch('instructor_task.models.settings.AWS_SECRET_ACCESS_KEY', create=True, new="access_key")
+@mock.patch('instructor_task.models.settings.AWS_ACCESS_KEY_ID', create=True, new="access_id")
+class ReportStorePerformanceTestCase(TestReportMixin, TestCase):
+    """
+    Store a 500k row report with each report store, checking that only a bounded part of it
+    is held in memory at once.
+    """
+    NUM_ROWS = 500000
+
+    def setUp(self):
+        self.course_id = CourseLocator(org="testx", course="coursex", run="runx")
+
+    def _time_store_rows(self, report_store):
+        """ Return the time taken to store the report """
+        return timeit.timeit(
+            lambda: report_store.store_rows(self.course_id, 'report.csv', report_rows(self.NUM_ROWS)), number=1
+        )
+
+    def test_local_fs(self):
+        elapsed = self._time_store_rows(LocalFSReportStore.from_config())
+        log.info("Stored %d rows to the local filesystem in %.2fs", self.NUM_ROWS, elapsed)
+
+    def test_s3(self):
+        report_store = S3ReportStore.from_config()
+        elapsed = self._time_store_rows(report_store)
+        upload = report_store.bucket.multipart_uploads[0]
+        largest_part = max(len(part) for part in upload.parts.values())
+        self.assertLess(largest_part, 2 * S3ReportFile.PART_SIZE)
+        log.info(
+            "Uploaded %d rows to S3 in %d parts (the largest %d bytes) in %.2fs",
+            self.NUM_ROWS, len(upload.parts), largest_part, elapsed
+        )
@@ -5,14 +5,25 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
+from uuid import uuid4
+
+from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from xmodule.modulestore.tests.factories import CourseFactory
 
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
-from instructor_task.models import ReportStore
-from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import _create_grades_csv_subtask
+from instructor_task.subtasks import SubtaskStatus
+from instructor_task.tasks_helper import (
+    cohort_students_and_upload, upload_grades_csv, upload_grades_csv_chunk, upload_students_csv,
+    _partial_report_filename
+)
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin
 
 
@@ -57,6 +68,163 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         report_store = ReportStore.from_config()
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_chunked_report(self):
+        """
+        Test that the report for a course with more students than are graded by a single
+        task is generated by subtasks, and merged into a single report.
+        """
+        students = [self.create_student('student{0}'.format(i)) for i in range(5)]
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+        # Subtasks are run as soon as they are queued in tests
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded', create_subtask_fcn=_create_grades_csv_subtask)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        # Only the merged report is listed, and it contains every student once, in order
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        rows = list(report_store.read_rows(self.course.id, links[0][0]))
+        self.assertEqual(rows[0][:4], ["id", "email", "username", "grade"])
+        self.assertEqual([row[2] for row in rows[1:]], [student.username for student in students])
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._first_grade_report_header', Mock(return_value=None))
+    def test_chunked_report_without_header(self):
+        """
+        Test that when none of the students could be graded as the report was queued, the merged
+        report still has a single header row, taken from the first part.
+        """
+        students = [self.create_student('student{0}'.format(i)) for i in range(5)]
+        entry = self._create_report_entry()
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded', create_subtask_fcn=_create_grades_csv_subtask)
+
+        report_store = ReportStore.from_config()
+        rows = list(report_store.read_rows(self.course.id, report_store.links_for(self.course.id)[0][0]))
+        self.assertEqual(rows[0][:4], ["id", "email", "username", "grade"])
+        self.assertEqual([row[2] for row in rows[1:]], [student.username for student in students])
+
+    @patch('instructor_task.tasks_helper.check_subtask_is_valid', Mock())
+    @patch('instructor_task.tasks_helper.update_subtask_status', Mock(return_value=False))
+    @patch('instructor_task.tasks_helper.iterate_grades_for')
+    def test_chunk_error_rows_store_failure(self, mock_iterate_grades_for):
+        """
+        Test that when a chunk's error rows can't be stored, none of its grade rows are stored
+        either, since all of its students are counted as failed.
+        """
+        graded_student = self.create_student('graded')
+        mock_iterate_grades_for.return_value = [
+            (graded_student, {'percent': 0.5, 'section_breakdown': [{'label': 'HW', 'percent': 0.5}]}, ''),
+            (self.create_student('failed'), {}, 'Cannot grade student'),
+        ]
+        entry = self._create_report_entry()
+        report_info = {'task_id': entry.task_id, 'timestamp': None, 'header': ['HW']}
+        store_rows = ReportStore.store_rows
+
+        def _store_rows(report_store, course_id, filename, rows):
+            """ Fail to store the error rows """
+            if 'grade_report_err' in filename:
+                raise IOError('store failed')
+            return store_rows(report_store, course_id, filename, rows)
+
+        with patch.object(ReportStore, 'store_rows', autospec=True, side_effect=_store_rows):
+            with self.assertRaisesRegexp(IOError, 'store failed'):
+                upload_grades_csv_chunk(
+                    entry.id, 0, report_info, [{'pk': graded_student.pk}], SubtaskStatus.create(str(uuid4())).to_dict()
+                )
+
+        with self.assertRaises(IOError):
+            ReportStore.from_config().read_rows(
+                self.course.id, _partial_report_filename(entry.task_id, 'grade_report', 0)
+            )
+
+    def _create_report_entry(self):
+        """
+        Create the InstructorTask of a grade report.
+        """
+        return InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _create_chunked_report_entry(self):
+        """
+        Create the InstructorTask of a grade report of 3 students, to be generated by 2 subtasks.
+        """
+        for i in range(3):
+            self.create_student('student{0}'.format(i))
+        return self._create_report_entry()
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_chunked_report_merged_before_completion(self):
+        """
+        Test that the task isn't marked as done until its report has been merged.
+        """
+        entry = self._create_chunked_report_entry()
+        task_states = []
+
+        def _merge_grade_report(entry_id, *_args):
+            """ Record the state of the task when its report is merged """
+            task_states.append(InstructorTask.objects.get(pk=entry_id).task_state)
+
+        with patch('instructor_task.tasks_helper._merge_grade_report', side_effect=_merge_grade_report):
+            upload_grades_csv(
+                None, entry.id, self.course.id, None, 'graded', create_subtask_fcn=_create_grades_csv_subtask
+            )
+
+        self.assertEqual(len(task_states), 1)
+        self.assertNotEqual(task_states[0], SUCCESS)
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, SUCCESS)
+
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_chunked_report_merge_failure(self):
+        """
+        Test that a failure to merge the report is recorded as the failure of the task.
+        """
+        entry = self._create_chunked_report_entry()
+        with patch('instructor_task.tasks_helper._merge_grade_report', side_effect=IOError('merge failed')):
+            upload_grades_csv(
+                None, entry.id, self.course.id, None, 'graded', create_subtask_fcn=_create_grades_csv_subtask
+            )
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset(
+            {'exception': 'IOError', 'message': 'merge failed'}, json.loads(entry.task_output)
+        )
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 2)
+
+    @patch('instructor_task.tasks_helper.check_subtask_is_valid', Mock())
+    @patch('instructor_task.tasks_helper.update_subtask_status', Mock(return_value=True))
+    @patch('instructor_task.tasks_helper._grade_report_rows', Mock(side_effect=ValueError('grading failed')))
+    @patch('instructor_task.tasks_helper._merge_grade_report', Mock(side_effect=IOError('merge failed')))
+    @patch('instructor_task.tasks_helper.complete_parent_task')
+    def test_chunk_failure_not_masked_by_merge_failure(self, mock_complete_parent_task):
+        """
+        Test that when the last chunk fails, a failure to merge the report is recorded on the
+        task, and doesn't replace the chunk's own error.
+        """
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()))
+        report_info = {'task_id': entry.task_id, 'timestamp': None, 'header': None}
+        subtask_status = SubtaskStatus.create(str(uuid4()))
+        with self.assertRaisesRegexp(ValueError, 'grading failed'):
+            upload_grades_csv_chunk(entry.id, 0, report_info, [], subtask_status.to_dict())
+
+        self.assertEqual(mock_complete_parent_task.call_count, 1)
+        self.assertIsInstance(mock_complete_parent_task.call_args[0][1], IOError)
+
 
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
@@ -1,7 +1,11 @@
 """
 Serializer for video outline
 """
-from rest_framework.reverse import reverse
+import hashlib
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from opaque_keys.edx.keys import UsageKey
 
 from courseware.access import has_access
 
@@ -9,134 +13,155 @@ from edxval.api import (
     get_video_info_for_course_and_profile, ValInternalError
 )
 
+# The outline of a course's videos is cached under a key which changes whenever the course does
+VIDEO_OUTLINE_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 class BlockOutline(object):
     """
     Serializes course videos, pulling data from VAL and the video modules.
+
+    The parts of the outline which are the same for every user (see `video_outline`) are
+    computed once for each version of the course. Each request only checks which of the
+    videos the user can load, and adds the videos' data from VAL.
     """
-    def __init__(self, course_id, start_block, categories_to_outliner, request):
-        """Create a BlockOutline using `start_block` as a starting point."""
+    def __init__(self, course_id, start_block, request):
+        """Create a BlockOutline of the videos in `start_block` (a course)."""
         self.start_block = start_block
-        self.categories_to_outliner = categories_to_outliner
         self.course_id = course_id
         self.request = request  # needed for making full URLS
-        self.local_cache = {}
         try:
-            self.local_cache['course_videos'] = get_video_info_for_course_and_profile(
-                unicode(course_id), "mobile_low"
-            )
+            self.course_videos = get_video_info_for_course_and_profile(unicode(course_id), "mobile_low")
         except ValInternalError:  # pragma: nocover
-            self.local_cache['course_videos'] = {}
+            self.course_videos = {}
 
     def __iter__(self):
-        child_to_parent = {}
-        stack = [self.start_block]
-
-        # path should be optional
-        def path(block):
-            """path for block"""
-            block_path = []
-            while block in child_to_parent:
-                block = child_to_parent[block]
-                if block is not self.start_block:
-                    block_path.append({
-                        # to be consistent with other edx-platform clients, return the defaulted display name
-                        'name': block.display_name_with_default,
-                        'category': block.category,
-                        'id': unicode(block.location)
-                    })
-            return reversed(block_path)
-
-        def find_urls(block):
-            """section and unit urls for block"""
-            block_path = []
-            while block in child_to_parent:
-                block = child_to_parent[block]
-                block_path.append(block)
-
-            course, chapter, section, unit = list(reversed(block_path))[:4]
-            position = 1
-            unit_name = unit.url_name
-            for block in section.children:
-                if block.name == unit_name:
-                    break
-                position += 1
-
-            kwargs = dict(
-                course_id=course.id.to_deprecated_string(),
-                chapter=chapter.url_name,
-                section=section.url_name
-            )
-            section_url = reverse(
-                "courseware_section",
-                kwargs=kwargs,
-                request=self.request,
-            )
-            kwargs['position'] = position
-            unit_url = reverse(
-                "courseware_position",
-                kwargs=kwargs,
-                request=self.request,
-            )
-            return unit_url, section_url, block_path
-
         user = self.request.user
+        runtime = self.start_block.runtime
 
-        while stack:
-            curr_block = stack.pop()
-
-            if curr_block.hide_from_toc:
-                # For now, if the 'hide_from_toc' setting is set on the block, do not traverse down
-                # the hierarchy.  The reason being is that these blocks may not have human-readable names
-                # to display on the mobile clients.
-                # Eventually, we'll need to figure out how we want these blocks to be displayed on the
-                # mobile clients.  As, they are still accessible in the browser, just not navigatable
-                # from the table-of-contents.
+        for video in video_outline(self.course_id, self.start_block):
+            # The course was loaded with all of its descendants, so this doesn't query the modulestore
+            video_descriptor = runtime.get_block(UsageKey.from_string(video['summary']['id']))
+            if not has_access(user, 'load', video_descriptor, course_key=self.course_id):
                 continue
 
-            if curr_block.category in self.categories_to_outliner:
-                if not has_access(user, 'load', curr_block, course_key=self.course_id):
-                    continue
+            yield {
+                "path": video['path'],
+                "named_path": [b["name"] for b in video['path'][:-1]],
+                "unit_url": self.request.build_absolute_uri(video['unit_url']),
+                "section_url": self.request.build_absolute_uri(video['section_url']),
+                "summary": video_summary(video['summary'], self.request, self.course_videos),
+            }
 
-                summary_fn = self.categories_to_outliner[curr_block.category]
-                block_path = list(path(curr_block))
-                unit_url, section_url, _ = find_urls(curr_block)
 
-                yield {
-                    "path": block_path,
-                    "named_path": [b["name"] for b in block_path[:-1]],
-                    "unit_url": unit_url,
-                    "section_url": section_url,
-                    "summary": summary_fn(self.course_id, curr_block, self.request, self.local_cache)
-                }
+def video_outline(course_id, course):
+    """
+    Return the parts of the outline of the course's videos which are the same for every
+    user, in course order. For each video, this is a dict of its 'path', the relative
+    'unit_url' and 'section_url' of the unit containing it, and its 'summary' from the
+    video module.
 
-            if curr_block.has_children:
-                for block in reversed(curr_block.get_children()):
-                    stack.append(block)
-                    child_to_parent[block] = curr_block
+    The outline is cached for each version of the course's content.
+    """
+    cache_key = _video_outline_cache_key(course_id, course)
+    if cache_key is not None:
+        outline = cache.get(cache_key)
+        if outline is not None:
+            return outline
 
+    outline = list(_iter_video_outline(course_id, course))
+    if cache_key is not None:
+        cache.set(cache_key, outline, VIDEO_OUTLINE_CACHE_TIMEOUT)
+    return outline
 
-def video_summary(course, course_id, video_descriptor, request, local_cache):
+
+def _video_outline_cache_key(course_id, course):
     """
-    returns summary dict for the given video module
+    Return the key under which the outline of the course's videos is cached, or None if it
+    can't be cached because the modulestore doesn't record when the course's content changes.
     """
-    # First try to check VAL for the URLs we want.
-    val_video_info = local_cache['course_videos'].get(video_descriptor.edx_video_id, {})
-    if val_video_info:
-        video_url = val_video_info['url']
-    # Then fall back to VideoDescriptor fields for video URLs
-    elif video_descriptor.html5_sources:
+    try:
+        subtree_edited_on = course.runtime.get_subtree_edited_on(course)
+    except AttributeError:
+        return None
+    if subtree_edited_on is None:
+        return None
+    key_hash = hashlib.md5(unicode(course_id).encode('utf-8'))
+    key_hash.update(unicode(subtree_edited_on))
+    # split courses are also versioned by the id of their (published) structure, which changes with
+    # every publish
+    course_entry = getattr(course.runtime, 'course_entry', None)
+    if course_entry is not None:
+        key_hash.update(unicode(course_entry.structure['_id']))
+    return u'mobile_api.video_outline.{}'.format(key_hash.hexdigest())
+
+
+def _iter_video_outline(course_id, course):
+    """
+    Yield the outline of each of the course's videos, walking the course once.
+    """
+    # Each entry is a block, and a list of (ancestor, position within the ancestor of its child on
+    # the path to the block)
+    stack = [(course, [])]
+
+    while stack:
+        curr_block, ancestors = stack.pop()
+
+        if curr_block.hide_from_toc:
+            # For now, if the 'hide_from_toc' setting is set on the block, do not traverse down
+            # the hierarchy.  The reason being is that these blocks may not have human-readable names
+            # to display on the mobile clients.
+            # Eventually, we'll need to figure out how we want these blocks to be displayed on the
+            # mobile clients.  As, they are still accessible in the browser, just not navigatable
+            # from the table-of-contents.
+            continue
+
+        if curr_block.category == 'video':
+            # the position of the unit in its section
+            (course_block, __), (chapter, __), (section, position) = ancestors[:3]
+            kwargs = dict(
+                course_id=course_block.id.to_deprecated_string(),
+                chapter=chapter.url_name,
+                section=section.url_name
+            )
+            section_url = reverse("courseware_section", kwargs=kwargs)
+            kwargs['position'] = position
+            unit_url = reverse("courseware_position", kwargs=kwargs)
+
+            yield {
+                "path": [
+                    {
+                        # to be consistent with other edx-platform clients, return the defaulted display name
+                        'name': block.display_name_with_default,
+                        'category': block.category,
+                        'id': unicode(block.location)
+                    }
+                    for block, __ in ancestors[1:]
+                ],
+                "unit_url": unit_url,
+                "section_url": section_url,
+                "summary": _video_module_summary(course_id, curr_block),
+            }
+
+        if curr_block.has_children:
+            positions = {}
+            for position, child_location in enumerate(curr_block.children, 1):
+                positions.setdefault(child_location.name, position)
+            for block in reversed(curr_block.get_children()):
+                position = positions.get(block.url_name, len(curr_block.children) + 1)
+                stack.append((block, ancestors + [(curr_block, position)]))
+
+
+def _video_module_summary(course_id, video_descriptor):
+    """
+    Return the parts of the summary of the video which come from the video module, with
+    relative transcript URLs.
+    """
+    if video_descriptor.html5_sources:
         video_url = video_descriptor.html5_sources[0]
     else:
         video_url = video_descriptor.source
 
-    # If we have the video information from VAL, we also have duration and size.
-    duration = val_video_info.get('duration', None)
-    size = val_video_info.get('file_size', 0)
-
-    # Transcripts...
-    transcript_langs = video_descriptor.available_translations(verify_assets=False)
-
     transcripts = {
         lang: reverse(
             'video-transcripts-detail',
@@ -145,19 +170,49 @@ def video_summary(course, course_id, video_descriptor, request, local_cache):
                 'block_id': video_descriptor.scope_ids.usage_id.block_id,
                 'lang': lang
             },
-            request=request,
         )
-        for lang in transcript_langs
+        for lang in video_descriptor.available_translations(verify_assets=False)
     }
 
     return {
+        "edx_video_id": video_descriptor.edx_video_id,
         "video_url": video_url,
-        "video_thumbnail_url": None,
-        "duration": duration,
-        "size": size,
         "name": video_descriptor.display_name,
         "transcripts": transcripts,
         "language": video_descriptor.get_default_transcript_language(),
         "category": video_descriptor.category,
         "id": unicode(video_descriptor.scope_ids.usage_id),
     }
+
+
+def video_summary(module_summary, request, course_videos):
+    """
+    returns summary dict for a video, given the summary from its video module (see
+    `video_outline`) and the course's videos in VAL
+    """
+    # First try to check VAL for the URLs we want.
+    val_video_info = course_videos.get(module_summary['edx_video_id'], {})
+    if val_video_info:
+        video_url = val_video_info['url']
+    # Then fall back to VideoDescriptor fields for video URLs
+    else:
+        video_url = module_summary['video_url']
+
+    # If we have the video information from VAL, we also have duration and size.
+    duration = val_video_info.get('duration', None)
+    size = val_video_info.get('file_size', 0)
+
+    return {
+        "video_url": video_url,
+        "video_thumbnail_url": None,
+        "duration": duration,
+        "size": size,
+        "name": module_summary['name'],
+        "transcripts": {
+            lang: request.build_absolute_uri(transcript_url)
+            for lang, transcript_url in module_summary['transcripts'].iteritems()
+        },
+        "language": module_summary['language'],
+        "category": module_summary['category'],
+        "id": module_summary['id'],
+    }
@@ -3,8 +3,10 @@ Tests for video outline API
 """
 import copy
 import ddt
+from mock import patch
 from uuid import uuid4
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test.utils import override_settings
 from django.conf import settings
@@ -12,6 +14,8 @@ from edxval import api
 from rest_framework.test import APITestCase
 
 from courseware.tests.factories import UserFactory
+from student.roles import CourseStaffRole
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import TEST_DATA_MOCK_MODULESTORE
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.video_module import transcripts_utils
@@ -19,6 +23,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.django import modulestore
 
 from mobile_api.tests import ROLE_CASES
+from mobile_api.video_outlines import serializers
 
 TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
 TEST_DATA_CONTENTSTORE['DOC_STORE_CONFIG']['db'] = 'test_xcontent_%s' % uuid4().hex
@@ -32,6 +37,7 @@ class TestVideoOutline(ModuleStoreTestCase, APITestCase):
     """
     def setUp(self):
         super(TestVideoOutline, self).setUp()
+        cache.clear()
         self.user = UserFactory.create()
         self.course = CourseFactory.create(mobile_available=True)
         self.section = ItemFactory.create(
@@ -269,3 +275,68 @@ class TestVideoOutline(ModuleStoreTestCase, APITestCase):
         url = reverse('video-transcripts-detail', kwargs=kwargs)
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
+
+    def test_course_outline_cached(self):
+        video = self._create_video_with_subs()
+        with patch.object(serializers, '_iter_video_outline', wraps=serializers._iter_video_outline) as walk:
+            first_outline = self._get_video_summary_list()
+            self.assertEqual(self._get_video_summary_list(), first_outline)
+            self.assertEqual(walk.call_count, 1)
+
+            # editing the course changes the cache key
+            video.display_name = u"renamed video omega \u03a9"
+            modulestore().update_item(video, self.user.id)
+            course_outline = self._get_video_summary_list()
+            self.assertEqual(walk.call_count, 2)
+        self.assertEqual(course_outline[0]['summary']['name'], video.display_name)
+        self.assertEqual(course_outline[0]['unit_url'], first_outline[0]['unit_url'])
+        self.assertTrue(course_outline[0]['unit_url'].startswith('http'))
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_publish_invalidates_cached_outline(self, default_ms):
+        store = modulestore()
+        with store.default_store(default_ms):
+            course = CourseFactory.create(mobile_available=True)
+            chapter = ItemFactory.create(parent_location=course.location, category="chapter")
+            sequential = ItemFactory.create(parent_location=chapter.location, category="sequential")
+            unit = ItemFactory.create(parent_location=sequential.location, category="vertical")
+            video = ItemFactory.create(
+                parent_location=unit.location, category="video", display_name=u"test video omega \u03a9"
+            )
+
+        def published_video_names():
+            """ The names of the videos in the outline of the published course """
+            with store.branch_setting(ModuleStoreEnum.Branch.published_only, course.id):
+                outline = serializers.video_outline(course.id, store.get_course(course.id, depth=None))
+            return [item['summary']['name'] for item in outline]
+
+        self.assertEqual(published_video_names(), [u"test video omega \u03a9"])
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, course.id):
+            video = store.get_item(video.location)
+            video.display_name = u"renamed video omega \u03a9"
+            store.update_item(video, self.user.id)
+            # the cached outline is still that of the published course
+            self.assertEqual(published_video_names(), [u"test video omega \u03a9"])
+            store.publish(video.location, self.user.id)
+        self.assertEqual(published_video_names(), [u"renamed video omega \u03a9"])
+
+    def test_cached_outline_filtered_by_access(self):
+        ItemFactory.create(
+            parent_location=self.unit.location,
+            category="video",
+            edx_video_id=self.edx_video_id,
+            display_name=u"test video omega \u03a9",
+        )
+        ItemFactory.create(
+            parent_location=self.other_unit.location,
+            category="video",
+            display_name=u"test staff only video omega \u03a9",
+            visible_to_staff_only=True,
+        )
+        self.assertEqual(len(self._get_video_summary_list()), 1)
+
+        CourseStaffRole(self.course.id).add_users(self.user)
+        course_outline = self._get_video_summary_list()
+        self.assertEqual(len(course_outline), 2)
+        self.assertEqual(course_outline[1]['summary']['name'], u"test staff only video omega \u03a9")
+        self.assertTrue('test_subsection_omega_%CE%A9/2' in course_outline[1]['unit_url'])
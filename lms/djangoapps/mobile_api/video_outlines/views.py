@@ -6,8 +6,6 @@ only displayed at the course level. This is because it makes it a lot easier to
 optimize and reason about, and it avoids having to tackle the bigger problem of
 general XBlock representation in this rather specialized formatting.
 """
-from functools import partial
-
 from django.http import Http404, HttpResponse
 
 from rest_framework import generics, permissions
@@ -22,7 +20,7 @@ from xmodule.modulestore.django import modulestore
 
 from mobile_api.utils import mobile_available_when_enrolled
 
-from .serializers import BlockOutline, video_summary
+from .serializers import BlockOutline
 
 
 class VideoSummaryList(generics.ListAPIView):
@@ -85,14 +83,7 @@ class VideoSummaryList(generics.ListAPIView):
         course_id = CourseKey.from_string(kwargs['course_id'])
         course = get_mobile_course(course_id, request.user)
 
-        video_outline = list(
-            BlockOutline(
-                course_id,
-                course,
-                {"video": partial(video_summary, course)},
-                request,
-            )
-        )
+        video_outline = list(BlockOutline(course_id, course, request))
         return Response(video_outline)
 
 
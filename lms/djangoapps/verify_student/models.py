@@ -8,6 +8,7 @@ of a student over a period of time. Right now, the only models are the abstract
 `SoftwareSecurePhotoVerification`. The hope is to keep as much of the
 photo verification process as generic as possible.
 """
+from collections import defaultdict
 from datetime import datetime, timedelta
 from email.utils import formatdate
 import functools
@@ -545,6 +546,39 @@ class PhotoVerification(StatusModel):
         except IndexError:
             return True
 
+    @classmethod
+    def reverification_statuses(cls, user, windows):
+        """
+        Returns a dict mapping the ids of midcourse reverification windows to a tuple of
+        the user's status for that window (as `user_status` returns it) and the `display`
+        property (as `display_status` returns it), with one query for all the windows.
+        """
+        attempts_by_window = defaultdict(list)
+        for attempt in cls.objects.filter(user=user, window__in=windows).order_by('-updated_at'):
+            attempts_by_window[attempt.window_id].append(attempt)
+
+        earliest_allowed_date = cls._earliest_allowed_date()
+        statuses = {}
+        for window in windows:
+            attempts = attempts_by_window[window.id]
+            valid_statuses = set(
+                attempt.status for attempt in attempts if attempt.created_at >= earliest_allowed_date
+            )
+            if 'approved' in valid_statuses:
+                status = 'approved'
+            elif 'submitted' in valid_statuses:
+                status = 'pending'
+            elif not attempts:
+                status = 'must_reverify'
+            elif attempts[0].created_at < earliest_allowed_date:
+                status = 'expired'
+            elif attempts[0].status == 'denied':
+                status = 'denied'
+            else:
+                status = 'none'
+            statuses[window.id] = (status, attempts[0].display if attempts else True)
+        return statuses
+
 
 class SoftwareSecurePhotoVerification(PhotoVerification):
     """
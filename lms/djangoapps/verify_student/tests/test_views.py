@@ -646,6 +646,10 @@ class TestMidCourseReverifyView(ModuleStoreTestCase):
         response = self.client.get(url)
         # enrolled in a verified course, and the window is open
         self.assertEquals(response.status_code, 200)
+        ((_template, context), _kwargs) = render_mock.call_args
+        self.assertEqual(
+            [info.course_id for info in context['reverifications']['must_reverify']], [self.course_key]
+        )
 
 
 @override_settings(MODULESTORE=MODULESTORE_CONFIG)
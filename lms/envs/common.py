@@ -1355,6 +1355,10 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of messages a bulk email task hands to the email backend at once.
+# When a task is retried for rate-related reasons, it sends them one at a time.
+BULK_EMAIL_SEND_BATCH_SIZE = 20
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1422,6 +1426,7 @@ INSTALLED_APPS = (
     'psychometrics',
     'licenses',
     'openedx.core.djangoapps.course_groups',
+    'openedx.core.djangoapps.course_overviews',
     'bulk_email',
 
     # External auth (OpenID, shib)
@@ -1581,6 +1586,10 @@ CERT_NAME_LONG = "Certificate of Achievement"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Grade reports for courses with more students than this are generated in parallel
+# by subtasks which each grade this many students
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -202,6 +202,10 @@ filterwarnings('ignore', message='No request passed to the backend, unable to ra
 simplefilter('ignore')  # Change to "default" to see the first instance of each hit
                         # or "error" to convert all into errors
 
+# The bulk email tests fail particular messages by mocking each call to send_messages,
+# so send them one at a time unless a test says otherwise
+BULK_EMAIL_SEND_BATCH_SIZE = 1
+
 ######### Third-party auth ##########
 FEATURES['ENABLE_THIRD_PARTY_AUTH'] = True
 
@@ -6,33 +6,86 @@ forums, and to the cohort admin views.
 import logging
 import random
 
-from django.db.models.signals import post_save, m2m_changed
+from crum import get_current_request
+from django.db.models.signals import post_save, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.http import Http404
 from django.utils.translation import ugettext as _
 
 from courseware import courses
 from eventtracking import tracker
+from request_cache.middleware import RequestCache
 from student.models import get_user_by_username_or_email
 from .models import CourseUserGroup, CourseUserGroupPartitionGroup
 
 log = logging.getLogger(__name__)
 
+# The number of users whose cohorts get_cohorts_for_users looks up in each query
+COHORTS_FOR_USERS_CHUNK_SIZE = 1000
+
+
+def _get_request_cohort_cache():
+    """
+    Return the dict of the cohorts which get_cohort has found for each (course key, user id)
+    during the current request, or None outside of a request (where there's nothing to clear
+    the request cache).
+    """
+    if get_current_request() is None:
+        return None
+    return RequestCache.get_request_cache().data.setdefault('cohorts.membership', {})
+
+
+def _clear_cohort_memberships(course_keys, user_ids):
+    """
+    Remove the cached cohorts of the users in the courses.
+    """
+    cached_cohorts = _get_request_cohort_cache()
+    if cached_cohorts:
+        for course_key in set(course_keys):
+            for user_id in user_ids:
+                cached_cohorts.pop((course_key, user_id), None)
+
+
+def _clear_cached_cohort(cohort):
+    """
+    Remove the cohort from the cache, wherever it's cached as a user's cohort.
+    """
+    cached_cohorts = _get_request_cohort_cache()
+    if cached_cohorts:
+        for key, cached_cohort in cached_cohorts.items():
+            if cached_cohort.id == cohort.id:
+                del cached_cohorts[key]
+
 
 @receiver(post_save, sender=CourseUserGroup)
 def _cohort_added(sender, **kwargs):
-    """Emits a tracking log event each time a cohort is created"""
+    """
+    Emits a tracking log event each time a cohort is created, and removes an
+    updated cohort from the cached cohorts of its members.
+    """
     instance = kwargs["instance"]
     if kwargs["created"] and instance.group_type == CourseUserGroup.COHORT:
         tracker.emit(
             "edx.cohort.created",
             {"cohort_id": instance.id, "cohort_name": instance.name}
         )
+    elif not kwargs["created"]:
+        # the cohort's members have the old version cached
+        _clear_cached_cohort(instance)
+
+
+@receiver(pre_delete, sender=CourseUserGroup)
+def _cohort_deleted(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Removes a cohort from the cached cohorts of its members when it is deleted"""
+    _clear_cached_cohort(instance)
 
 
 @receiver(m2m_changed, sender=CourseUserGroup.users.through)
 def _cohort_membership_changed(sender, **kwargs):
-    """Emits a tracking log event each time cohort membership is modified"""
+    """
+    Emits a tracking log event each time cohort membership is modified, and
+    removes the changed users' cached cohorts.
+    """
     def get_event_iter(user_id_iter, cohort_iter):
         return (
             {"cohort_id": cohort.id, "cohort_name": cohort.name, "user_id": user_id}
@@ -65,7 +118,11 @@ def _cohort_membership_changed(sender, **kwargs):
         else:
             user_id_iter = pk_set
 
-    for event in get_event_iter(user_id_iter, cohort_iter):
+    user_ids = list(user_id_iter)
+    cohorts = list(cohort_iter)
+    _clear_cohort_memberships([cohort.course_id for cohort in cohorts], user_ids)
+
+    for event in get_event_iter(user_ids, cohorts):
         tracker.emit(event_name, event)
 
 
@@ -218,12 +275,19 @@ def get_cohort(user, course_key):
     if not course.is_cohorted:
         return None
 
+    cached_cohorts = _get_request_cohort_cache()
+    if cached_cohorts is not None and (course_key, user.id) in cached_cohorts:
+        return cached_cohorts[(course_key, user.id)]
+
     try:
-        return CourseUserGroup.objects.get(
+        cohort = CourseUserGroup.objects.get(
             course_id=course_key,
             group_type=CourseUserGroup.COHORT,
             users__id=user.id,
         )
+        if cached_cohorts is not None:
+            cached_cohorts[(course_key, user.id)] = cohort
+        return cohort
     except CourseUserGroup.DoesNotExist:
         # Didn't find the group.  We'll go on to create one if needed.
         pass
@@ -245,6 +309,55 @@ def get_cohort(user, course_key):
     return group
 
 
+def get_cohorts_for_users(course_key, user_ids=None):
+    """
+    Given a CourseKey and a list of user ids, return the cohorts of those users
+    in bulk, for reports and other tools which need the cohorts of many users.
+
+    Unlike get_cohort, this doesn't assign users to cohorts.
+
+    Arguments:
+        course_key: CourseKey
+        user_ids: a list of user ids, or None for all of the users in the course's cohorts
+
+    Returns:
+        A dict mapping the id of each of the users who has a cohort to their
+        CourseUserGroup.  Empty if the course isn't cohorted.
+
+    Raises:
+       ValueError if the CourseKey doesn't exist.
+    """
+    try:
+        course = courses.get_course_by_id(course_key)
+    except Http404:
+        raise ValueError("Invalid course_key")
+
+    if not course.is_cohorted:
+        return {}
+
+    memberships = CourseUserGroup.users.through.objects.filter(
+        courseusergroup__course_id=course_key,
+        courseusergroup__group_type=CourseUserGroup.COHORT,
+    ).select_related('courseusergroup')
+    if user_ids is None:
+        chunks = [memberships]
+    else:
+        user_ids = list(user_ids)
+        chunks = [
+            memberships.filter(user__id__in=user_ids[index:index + COHORTS_FOR_USERS_CHUNK_SIZE])
+            for index in xrange(0, len(user_ids), COHORTS_FOR_USERS_CHUNK_SIZE)
+        ]
+
+    cohorts = {}
+    user_cohorts = {}
+    for chunk in chunks:
+        for membership in chunk:
+            # share one instance of each cohort
+            cohort = cohorts.setdefault(membership.courseusergroup_id, membership.courseusergroup)
+            user_cohorts[membership.user_id] = cohort
+    return user_cohorts
+
+
 def get_course_cohorts(course):
     """
     Get a list of all the cohorts in the given course. This will include auto cohorts,
@@ -7,6 +7,7 @@ from django.test.utils import override_settings
 from mock import call, patch
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from request_cache.middleware import RequestCache
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory
 from xmodule.modulestore.django import modulestore, clear_existing_modulestores
@@ -207,6 +208,59 @@ class TestCohorts(TestCase):
             "other_user should be assigned to the default cohort"
         )
 
+    @patch("openedx.core.djangoapps.course_groups.cohorts.get_current_request")
+    def test_get_cohort_cached_within_request(self, mock_get_current_request):
+        """
+        Make sure cohorts.get_cohort() only looks up a user's cohort once per request,
+        until their membership changes.
+        """
+        self.addCleanup(RequestCache().clear_request_cache)
+        course = modulestore().get_course(self.toy_course_key)
+        config_course_cohorts(course, discussions=[], cohorted=True)
+        user = UserFactory(username="test", email="a@b.com")
+        first_cohort = CohortFactory(course_id=course.id, name="FirstCohort")
+        second_cohort = CohortFactory(course_id=course.id, name="SecondCohort")
+        first_cohort.users.add(user)
+
+        self.assertEqual(cohorts.get_cohort(user, course.id).id, first_cohort.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(cohorts.get_cohort(user, course.id).id, first_cohort.id)
+
+        cohorts.add_user_to_cohort(second_cohort, user.username)
+        self.assertEqual(cohorts.get_cohort(user, course.id).id, second_cohort.id)
+
+        # nothing is cached outside of a request
+        mock_get_current_request.return_value = None
+        with self.assertNumQueries(1):
+            cohorts.get_cohort(user, course.id)
+
+    def test_get_cohorts_for_users(self):
+        """
+        Make sure cohorts.get_cohorts_for_users() finds the cohorts of many users at once.
+        """
+        course = modulestore().get_course(self.toy_course_key)
+        users = [UserFactory() for __ in range(5)]
+        first_cohort = CohortFactory(course_id=course.id, name="FirstCohort", users=users[:2])
+        second_cohort = CohortFactory(course_id=course.id, name="SecondCohort", users=users[2:4])
+        user_ids = [user.id for user in users]
+
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, user_ids), {})
+
+        config_course_cohorts(course, discussions=[], cohorted=True)
+        with self.assertNumQueries(1):
+            user_cohorts = cohorts.get_cohorts_for_users(course.id, user_ids)
+        self.assertEqual(
+            dict((user_id, cohort.id) for user_id, cohort in user_cohorts.items()),
+            {
+                users[0].id: first_cohort.id, users[1].id: first_cohort.id,
+                users[2].id: second_cohort.id, users[3].id: second_cohort.id,
+            }
+        )
+        self.assertEqual(cohorts.get_cohorts_for_users(course.id, user_ids[:1]).keys(), [users[0].id])
+        self.assertEqual(len(cohorts.get_cohorts_for_users(course.id)), 4)
+        # users without a cohort aren't assigned one
+        self.assertFalse(users[4].course_groups.exists())
+
     def test_auto_cohorting(self):
         """
         Make sure cohorts.get_cohort() does the right thing with auto_cohort_groups
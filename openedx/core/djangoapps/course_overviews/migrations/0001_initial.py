@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseOverview'
+        db.create_table('course_overviews_courseoverview', (
+            ('id', self.gf('xmodule_django.models.CourseKeyField')(max_length=255, primary_key=True)),
+            ('course_block_id', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('display_name', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('display_name_with_default', self.gf('django.db.models.fields.TextField')()),
+            ('display_coursenumber', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('display_organization', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('course_image_url', self.gf('django.db.models.fields.TextField')()),
+            ('short_description', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('static_asset_path', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('start', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('end', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('advertised_start', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('announcement', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('is_new', self.gf('django.db.models.fields.NullBooleanField')(null=True, blank=True)),
+            ('days_early_for_beta', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('visible_to_staff_only', self.gf('django.db.models.fields.BooleanField')(default=False)),
+            ('catalog_visibility', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('enrollment_start', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('enrollment_end', self.gf('django.db.models.fields.DateTimeField')(null=True)),
+            ('enrollment_domain', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('invitation_only', self.gf('django.db.models.fields.BooleanField')(default=False)),
+            ('certificates_display_behavior', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('certificates_show_before_end', self.gf('django.db.models.fields.BooleanField')(default=False)),
+            ('cert_name_short', self.gf('django.db.models.fields.TextField')()),
+            ('cert_name_long', self.gf('django.db.models.fields.TextField')()),
+            ('lowest_passing_grade', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('end_of_course_survey_url', self.gf('django.db.models.fields.TextField')(null=True)),
+        ))
+        db.send_create_signal('course_overviews', ['CourseOverview'])
+
+    def backwards(self, orm):
+        # Deleting model 'CourseOverview'
+        db.delete_table('course_overviews_courseoverview')
+
+    models = {
+        'course_overviews.courseoverview': {
+            'Meta': {'object_name': 'CourseOverview'},
+            'advertised_start': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'announcement': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'catalog_visibility': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'cert_name_long': ('django.db.models.fields.TextField', [], {}),
+            'cert_name_short': ('django.db.models.fields.TextField', [], {}),
+            'certificates_display_behavior': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'certificates_show_before_end': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'course_block_id': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'course_image_url': ('django.db.models.fields.TextField', [], {}),
+            'days_early_for_beta': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'display_coursenumber': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'display_name': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'display_name_with_default': ('django.db.models.fields.TextField', [], {}),
+            'display_organization': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'end_of_course_survey_url': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'enrollment_domain': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'enrollment_end': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'enrollment_start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'id': ('xmodule_django.models.CourseKeyField', [], {'max_length': '255', 'primary_key': 'True'}),
+            'invitation_only': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_new': ('django.db.models.fields.NullBooleanField', [], {'blank': 'True', 'null': 'True'}),
+            'lowest_passing_grade': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'short_description': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'start': ('django.db.models.fields.DateTimeField', [], {'null': 'True'}),
+            'static_asset_path': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'visible_to_staff_only': ('django.db.models.fields.BooleanField', [], {'default': 'False'})
+        }
+    }
+
+    complete_apps = ['course_overviews']
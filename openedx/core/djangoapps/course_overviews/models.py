@@ -0,0 +1,187 @@
+"""
+Overviews of courses: the settings of each course which the course catalog and the student
+dashboard show, stored so that listing courses doesn't load them from the modulestore.
+"""
+import logging
+
+from django.db import models, IntegrityError
+from django.dispatch import receiver
+
+from static_replace import replace_static_urls
+from xmodule.course_module import CourseSummaryMixin
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore, course_published, ModuleI18nService
+from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule_django.models import CourseKeyField
+
+log = logging.getLogger(__name__)
+
+
+class CourseOverview(CourseSummaryMixin, models.Model):
+    """
+    The settings of a course which the catalog and dashboard use. An overview has the same
+    attributes as the CourseDescriptor for these settings (and the same date and display name
+    methods, from CourseSummaryMixin), so it can be used in place of the course by has_access
+    and the catalog and dashboard templates.
+
+    An overview is created from its course the first time it's needed, and deleted whenever
+    the course is edited, to be created again from the edited course (see
+    `invalidate_course_overview`). Overviews of XML courses, which are always in memory and
+    can't be edited, aren't stored.
+    """
+    id = CourseKeyField(max_length=255, primary_key=True)
+    course_block_id = models.CharField(max_length=255)
+
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_coursenumber = models.TextField(null=True)
+    display_organization = models.TextField(null=True)
+    course_image_url = models.TextField()
+    short_description = models.TextField(null=True)
+    static_asset_path = models.TextField(blank=True)
+
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    announcement = models.DateTimeField(null=True)
+    is_new = models.NullBooleanField()
+    days_early_for_beta = models.FloatField(null=True)
+    visible_to_staff_only = models.BooleanField(default=False)
+    ispublic = models.NullBooleanField()
+
+    catalog_visibility = models.TextField(null=True)
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    enrollment_domain = models.TextField(null=True)
+    invitation_only = models.BooleanField(default=False)
+
+    certificates_display_behavior = models.TextField(null=True)
+    certificates_show_before_end = models.BooleanField(default=False)
+    cert_name_short = models.TextField()
+    cert_name_long = models.TextField()
+    lowest_passing_grade = models.FloatField(null=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    @property
+    def location(self):
+        """
+        The usage key of the course's block.
+        """
+        return self.id.make_usage_key('course', self.course_block_id)
+
+    def summary_i18n_service(self):
+        return ModuleI18nService()
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Return the overview of the course, or None if the course doesn't exist or fails to load.
+        """
+        return cls.get_from_ids([course_id]).get(course_id)
+
+    @classmethod
+    def get_from_ids(cls, course_ids):
+        """
+        Return a dict of the overviews of the given courses, keyed by course id, with one query
+        for the stored overviews. The overviews which aren't stored yet are created from their
+        courses. Courses which don't exist or fail to load are left out.
+        """
+        course_ids = set(course_ids)
+        overviews = dict((overview.id, overview) for overview in cls.objects.filter(id__in=course_ids))
+        for course_id in course_ids.difference(overviews):
+            overview = cls._load_from_module_store(course_id)
+            if overview is not None:
+                overviews[course_id] = overview
+        return overviews
+
+    @classmethod
+    def _load_from_module_store(cls, course_id):
+        """
+        Create the overview of the course from the modulestore, and store it unless the course
+        is an XML course. Returns None if the course doesn't exist or fails to load.
+        """
+        store = modulestore()
+        with store.bulk_operations(course_id):
+            course = store.get_course(course_id)
+            if course is None or isinstance(course, ErrorDescriptor):
+                return None
+            overview = cls._create_from_course(course)
+
+        if store.get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+            try:
+                overview.save()
+            except IntegrityError:
+                # another process stored the course's overview first
+                log.info(u"The overview of %s was created concurrently", course_id)
+        return overview
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Return a new (unsaved) overview of the course.
+        """
+        # courseware is only installed in the LMS, which is the only place overviews are created
+        from courseware.courses import course_image_url
+
+        is_new = course.is_new
+        if isinstance(is_new, basestring):
+            is_new = is_new.lower() in ['true', 'yes', 'y']
+
+        return cls(
+            id=course.id,
+            course_block_id=course.location.block_id,
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_coursenumber=course.display_coursenumber,
+            display_organization=course.display_organization,
+            course_image_url=course_image_url(course),
+            short_description=cls._short_description(course),
+            static_asset_path=course.static_asset_path,
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            announcement=course.announcement,
+            is_new=is_new,
+            days_early_for_beta=course.days_early_for_beta,
+            visible_to_staff_only=course.visible_to_staff_only,
+            ispublic=course.ispublic,
+            catalog_visibility=course.catalog_visibility,
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            enrollment_domain=course.enrollment_domain,
+            invitation_only=course.invitation_only,
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            lowest_passing_grade=course.lowest_passing_grade,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+        )
+
+    @staticmethod
+    def _short_description(course):
+        """
+        Return the html of the course's short description about section, with its static urls
+        replaced, or None if the course doesn't have one.
+        """
+        location = course.location.replace(category='about', name='short_description')
+        try:
+            about = modulestore().get_item(location)
+        except ItemNotFoundError:
+            return None
+        return replace_static_urls(
+            about.data,
+            getattr(course, 'data_dir', None),
+            course_id=course.id,
+            static_asset_path=course.static_asset_path
+        )
+
+
+@receiver(course_published)
+def invalidate_course_overview(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete the overview of a course when the course is edited, so that it's created again from
+    the edited course the next time it's needed.
+    """
+    CourseOverview.objects.filter(id=course_key).delete()
@@ -0,0 +1,106 @@
+"""
+Tests of CourseOverview, the stored summaries of courses for the catalog and dashboard.
+"""
+import datetime
+import unittest
+
+import pytz
+from django.conf import settings
+from mock import patch
+
+from courseware.courses import course_image_url, get_course_about_section
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
+
+from ..models import CourseOverview
+
+
+@unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+class CourseOverviewTestCase(ModuleStoreTestCase):
+    """
+    Tests of creating, reading and invalidating course overviews.
+    """
+    def setUp(self):
+        super(CourseOverviewTestCase, self).setUp()
+        self.course = CourseFactory.create(
+            org='edX',
+            number='overview',
+            display_name=u'Overview of <Everything>',
+            display_coursenumber='OVR101',
+            start=datetime.datetime(2014, 1, 1, tzinfo=pytz.UTC),
+            end=datetime.datetime(2014, 6, 1, tzinfo=pytz.UTC),
+            advertised_start='Spring 2014',
+            announcement=datetime.datetime(2013, 10, 1, tzinfo=pytz.UTC),
+            invitation_only=True,
+            catalog_visibility='about',
+            certificates_display_behavior='early_no_info',
+            ispublic=True,
+        )
+        ItemFactory.create(
+            parent_location=self.course.location,
+            category='about',
+            display_name='short_description',
+            data=u'<p>A short description with <img src="/static/picture.png"/></p>',
+        )
+        self.course = modulestore().get_course(self.course.id)
+
+    def test_overview_matches_course(self):
+        overview = CourseOverview.get_from_id(self.course.id)
+
+        self.assertEqual(overview.id, self.course.id)
+        self.assertEqual(overview.location, self.course.location)
+        for attribute in (
+                'display_name', 'display_name_with_default', 'display_number_with_default',
+                'display_org_with_default', 'number', 'org', 'start', 'end', 'advertised_start',
+                'announcement', 'is_newish', 'sorting_score', 'start_date_is_still_default',
+                'invitation_only', 'catalog_visibility', 'cert_name_short', 'cert_name_long',
+                'lowest_passing_grade', 'end_of_course_survey_url', 'visible_to_staff_only', 'ispublic',
+        ):
+            self.assertEqual(getattr(overview, attribute), getattr(self.course, attribute), attribute)
+        for method in ('has_started', 'has_ended', 'may_certify', 'start_datetime_text', 'end_datetime_text'):
+            self.assertEqual(getattr(overview, method)(), getattr(self.course, method)(), method)
+
+        self.assertEqual(course_image_url(overview), course_image_url(self.course))
+        self.assertIn('/c4x/edX/overview/asset/picture.png', get_course_about_section(overview, 'short_description'))
+        self.assertEqual(get_course_about_section(overview, 'title'), self.course.display_name_with_default)
+
+    def test_stored_overview_read_without_modulestore(self):
+        CourseOverview.get_from_id(self.course.id)
+        with check_mongo_calls(0):
+            with self.assertNumQueries(1):
+                overview = CourseOverview.get_from_id(self.course.id)
+        self.assertEqual(overview.display_name, self.course.display_name)
+
+    def test_overview_invalidated_by_edit(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.course.display_name = u'Renamed'
+        modulestore().update_item(self.course, ModuleStoreEnum.UserID.test)
+
+        self.assertFalse(CourseOverview.objects.filter(id=self.course.id).exists())
+        self.assertEqual(CourseOverview.get_from_id(self.course.id).display_name, u'Renamed')
+
+    def test_overview_invalidated_after_bulk_operation(self):
+        CourseOverview.get_from_id(self.course.id)
+        store = modulestore()
+        with store.bulk_operations(self.course.id):
+            self.course.display_name = u'Renamed'
+            store.update_item(self.course, ModuleStoreEnum.UserID.test)
+            # the overview is deleted once, when the bulk operation ends
+            self.assertTrue(CourseOverview.objects.filter(id=self.course.id).exists())
+        self.assertFalse(CourseOverview.objects.filter(id=self.course.id).exists())
+
+    def test_missing_course(self):
+        course_key = self.course.id.replace(run='missing')
+        self.assertIsNone(CourseOverview.get_from_id(course_key))
+        self.assertFalse(CourseOverview.objects.filter(id=course_key).exists())
+
+    def test_get_from_ids(self):
+        other_course = CourseFactory.create(org='edX', number='other')
+        CourseOverview.get_from_id(self.course.id)
+        with patch.object(CourseOverview, '_load_from_module_store', wraps=CourseOverview._load_from_module_store):
+            overviews = CourseOverview.get_from_ids([self.course.id, other_course.id])
+            # only the overview which wasn't stored yet was loaded from the modulestore
+            CourseOverview._load_from_module_store.assert_called_once_with(other_course.id)  # pylint: disable=no-member
+        self.assertEqual(set(overviews), set([self.course.id, other_course.id]))